@@ -0,0 +1,369 @@
+"""Cliente HTTP compartido por las interfaces de BoxIA.
+
+Todas las ventanas hablan con el backend a través de este módulo: una URL
+base configurable (variable de entorno BOXIA_API_URL) y una sesión de
+requests con conexiones persistentes, timeouts por defecto y reintentos
+acotados con espera exponencial.
+
+BOXIA_API_URL acepta varias réplicas separadas por comas. Entonces
+/preguntar va a la réplica con menos preguntas en curso ponderadas por su
+tiempo hasta el primer byte, y el resto de los endpoints (reportes, cargas,
+administración) a una réplica fija, para que una carga por partes o un ETag
+no cambien de servidor a mitad de camino. Una réplica que no acepta la
+conexión queda fuera un tiempo creciente y la petición pasa a la siguiente;
+un hilo en segundo plano revisa las réplicas caídas para volver a usarlas.
+
+requests se importa recién con la primera petición: cuesta más de 100 ms y
+las ventanas no lo necesitan para mostrarse.
+
+Cada petición queda medida en diagnostics (conexión, primer byte, total,
+bytes y estado).
+"""
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from diagnostics import get_diagnostics, instrumentar_adaptador
+
+API_BASE = os.environ.get("BOXIA_API_URL", "http://localhost:8000").rstrip("/")
+
+# Tiempos máximos (segundos) de conexión y de lectura por defecto
+TIMEOUT_CONEXION = float(os.environ.get("BOXIA_TIMEOUT_CONEXION", 5))
+TIMEOUT_LECTURA = float(os.environ.get("BOXIA_TIMEOUT_LECTURA", 60))
+
+REINTENTOS = 3
+ESPERA_REINTENTO = 0.3
+CONEXIONES_POR_HOST = 10
+
+# Solo se reintentan lecturas y respuestas 502/503/504 en métodos idempotentes.
+# Los fallos al conectar se reintentan siempre: la petición aún no se envió.
+METODOS_IDEMPOTENTES = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Con varias réplicas: rutas que se reparten entre ellas (el resto va a la réplica fija)
+RUTAS_BALANCEADAS = frozenset({"/preguntar"})
+
+# Segundos que una réplica caída queda fuera (se duplica con cada fallo seguido
+# hasta el máximo) e intervalo de la revisión en segundo plano
+ESPERA_CAIDA = 5.0
+ESPERA_CAIDA_MAXIMA = 60.0
+INTERVALO_SALUD = 15.0
+
+# Peso de la última medición en el promedio móvil del tiempo hasta el primer byte
+PESO_LATENCIA = 0.3
+
+
+def separar_urls(urls):
+    if isinstance(urls, str):
+        urls = urls.split(",")
+    return [u.strip().rstrip("/") for u in urls if u.strip()]
+
+
+def conexion_rechazada(error):
+    """True si la petición no llegó a enviarse (no se pudo conectar): reintentarla en otra réplica es seguro."""
+    import requests
+    from urllib3.exceptions import NewConnectionError
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    motivo = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectionError) and isinstance(motivo, NewConnectionError)
+
+
+_hilo = threading.local()
+
+
+class Cancelacion:
+    """Corta desde otro hilo la petición en curso de un hilo (ver peticiones_cancelables).
+
+    cancel() cierra el socket de la conexión que espera o lee la respuesta:
+    la lectura bloqueada termina en el acto con un error de conexión, sin
+    esperar al servidor ni al timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conexion = None
+        self.cancelada = False
+
+    def usar(self, conexion):
+        with self._lock:
+            self._conexion = conexion
+            cancelada = self.cancelada
+        if cancelada and conexion is not None:
+            _cortar(conexion)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelada = True
+            conexion = self._conexion
+        if conexion is not None:
+            _cortar(conexion)
+
+
+def _cortar(conexion):
+    sock = getattr(conexion, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # ya cerrado
+
+
+def _al_esperar_respuesta(conexion):
+    cancelacion = getattr(_hilo, "cancelacion", None)
+    if cancelacion is not None:
+        cancelacion.usar(conexion)
+
+
+@contextmanager
+def peticiones_cancelables(cancelacion):
+    """Las peticiones de este hilo dentro del bloque se cortan con cancelacion.cancel()."""
+    _hilo.cancelacion = cancelacion
+    try:
+        yield cancelacion
+    finally:
+        _hilo.cancelacion = None
+        # La conexión vuelve al pool: cancelar después ya no debe tocarla
+        cancelacion.usar(None)
+
+
+class Backend:
+    """Una réplica del servidor: peticiones en curso, latencia y si está caída."""
+
+    def __init__(self, url):
+        self.url = url
+        self.en_curso = 0
+        self.latencia = None
+        self.fallos = 0
+        self.caida_hasta = 0.0
+
+    def disponible(self, ahora):
+        return self.caida_hasta <= ahora
+
+    def costo(self):
+        # Menos peticiones en curso y respuestas más rápidas; sin mediciones aún, se prueba primero
+        return (self.en_curso + 1) * (self.latencia or 0.0)
+
+    def caida(self):
+        self.fallos += 1
+        espera = min(ESPERA_CAIDA_MAXIMA, ESPERA_CAIDA * 2 ** (self.fallos - 1))
+        self.caida_hasta = time.monotonic() + espera
+
+    def respondio(self, segundos=None):
+        self.fallos = 0
+        self.caida_hasta = 0.0
+        if segundos is not None:
+            self.latencia = segundos if self.latencia is None else \
+                PESO_LATENCIA * segundos + (1 - PESO_LATENCIA) * self.latencia
+
+
+class ApiClient:
+    def __init__(self, base_url=API_BASE, timeout=(TIMEOUT_CONEXION, TIMEOUT_LECTURA),
+                 reintentos=REINTENTOS, conexiones=CONEXIONES_POR_HOST):
+        self.backends = [Backend(url) for url in separar_urls(base_url)]
+        # La primera réplica identifica al servidor (p. ej. en el registro de documentos cargados)
+        self.base_url = self.backends[0].url
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.conexiones = conexiones
+        self._session = None
+        self._capacidades = None
+        self._lock = threading.Lock()
+        self._fija = self.backends[0]
+        self._revision = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = self._crear_sesion()
+            return self._session
+
+    def _crear_sesion(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        reintentos = self.reintentos
+        retry = Retry(
+            total=reintentos,
+            # Con varias réplicas un fallo al conectar pasa a la siguiente sin esperar
+            connect=reintentos if len(self.backends) == 1 else 0,
+            read=reintentos,
+            status=reintentos,
+            backoff_factor=ESPERA_REINTENTO,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=METODOS_IDEMPOTENTES,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.conexiones, pool_maxsize=self.conexiones, max_retries=retry)
+        instrumentar_adaptador(adapter, _al_esperar_respuesta)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if len(self.backends) > 1:
+            self._revision = threading.Thread(target=self._revisar_caidas, name="revision-replicas", daemon=True)
+            self._revision.start()
+        return session
+
+    def url(self, ruta):
+        return f"{self._fija.url}/{ruta.lstrip('/')}"
+
+    def _candidatos(self, balanceada):
+        """Réplicas en el orden en que se prueban; las caídas van al final, como último recurso."""
+        ahora = time.monotonic()
+        with self._lock:
+            if balanceada:
+                orden = sorted(self.backends, key=lambda b: (b.costo(), b.en_curso, random.random()))
+            else:
+                orden = [self._fija] + [b for b in self.backends if b is not self._fija]
+            return [b for b in orden if b.disponible(ahora)] + [b for b in orden if not b.disponible(ahora)]
+
+    def request(self, method, ruta, **kwargs):
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session
+        stream = kwargs.get("stream", False)
+        varias = len(self.backends) > 1
+        balanceada = varias and ruta.split("?", 1)[0] in RUTAS_BALANCEADAS
+        candidatos = self._candidatos(balanceada)
+        for i, backend in enumerate(candidatos):
+            ultimo = i == len(candidatos) - 1
+            medicion = get_diagnostics().iniciar_peticion(method, ruta, backend.url if varias else None)
+            with self._lock:
+                backend.en_curso += 1
+            try:
+                response = session.request(method, f"{backend.url}/{ruta.lstrip('/')}", **kwargs)
+            except Exception as e:
+                with self._lock:
+                    backend.en_curso -= 1
+                medicion.fallo(e)
+                if varias and isinstance(e, requests.RequestException) and conexion_rechazada(e):
+                    with self._lock:
+                        backend.caida()
+                    if not ultimo:
+                        continue
+                raise
+            ocupada = balanceada and response.status_code == 503
+            with self._lock:
+                if ocupada:
+                    # Su 503 llega rápido: medirlo la haría parecer la réplica más conveniente
+                    backend.caida()
+                else:
+                    backend.respondio(response.elapsed.total_seconds() if balanceada else None)
+            # Con stream=True la medición termina al cerrar la respuesta
+            medicion.recibida(response, stream)
+            if ocupada and not ultimo:
+                # Réplica ocupada: la pregunta no se procesó, se prueba en la siguiente
+                response.close()
+                with self._lock:
+                    backend.en_curso -= 1
+                continue
+            if not balanceada and backend is not self._fija:
+                self._cambiar_fija(backend)
+            self._liberar_al_cerrar(backend, response, stream)
+            return response
+
+    def _liberar_al_cerrar(self, backend, response, stream):
+        """La petición sigue en curso (para elegir réplica) hasta que se lee o cierra la respuesta."""
+        if not stream:
+            with self._lock:
+                backend.en_curso -= 1
+            return
+        cerrar = response.close
+        liberada = []
+
+        def close():
+            cerrar()
+            with self._lock:
+                if not liberada:
+                    liberada.append(True)
+                    backend.en_curso -= 1
+
+        response.close = close
+
+    def _cambiar_fija(self, backend):
+        with self._lock:
+            self._fija = backend
+            # Otra réplica puede anunciar otras capacidades
+            self._capacidades = None
+
+    def _revisar_caidas(self):
+        while True:
+            time.sleep(INTERVALO_SALUD)
+            ahora = time.monotonic()
+            with self._lock:
+                caidas = [b for b in self.backends if b.fallos and not b.disponible(ahora + INTERVALO_SALUD)]
+            session = self._session
+            if session is None:
+                return  # se cerró el cliente
+            for backend in caidas:
+                try:
+                    # Cualquier respuesta HTTP (aunque sea 404) indica que la réplica vuelve a aceptar conexiones
+                    session.get(f"{backend.url}/capacidades", timeout=(TIMEOUT_CONEXION, 5)).close()
+                except Exception:
+                    continue
+                with self._lock:
+                    backend.respondio()
+
+    def backends_status(self):
+        """Por réplica: url, peticiones en curso, latencia (s), si está disponible y si es la fija."""
+        ahora = time.monotonic()
+        with self._lock:
+            return [{"url": b.url, "en_curso": b.en_curso, "latencia": b.latencia,
+                     "disponible": b.disponible(ahora), "fija": b is self._fija} for b in self.backends]
+
+    def get(self, ruta, **kwargs):
+        return self.request("GET", ruta, **kwargs)
+
+    def post(self, ruta, **kwargs):
+        return self.request("POST", ruta, **kwargs)
+
+    def put(self, ruta, **kwargs):
+        return self.request("PUT", ruta, **kwargs)
+
+    def capabilities(self):
+        """Funciones opcionales que anuncia el servidor en GET /capacidades.
+
+        Un servidor sin ese endpoint no anuncia nada ({}). Si no hay conexión
+        tampoco, pero el resultado no se guarda para volver a consultar luego.
+        """
+        import requests
+
+        with self._lock:
+            if self._capacidades is not None:
+                return self._capacidades
+        try:
+            r = self.get("/capacidades", timeout=(TIMEOUT_CONEXION, 5))
+        except requests.RequestException:
+            return {}
+        try:
+            capacidades = r.json() if r.status_code == 200 else {}
+        except ValueError:
+            capacidades = {}
+        with self._lock:
+            self._capacidades = capacidades if isinstance(capacidades, dict) else {}
+            return self._capacidades
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def get_client():
+    """Devuelve el cliente compartido del proceso, creándolo la primera vez."""
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = ApiClient()
+        return _cliente
@@ -0,0 +1,252 @@
+"""Mediciones de las peticiones al backend y del tiempo de la interfaz.
+
+ApiClient registra cada petición: tiempo de conexión (solo si se abrió una
+conexión nueva), tiempo hasta el primer byte (cabeceras de la respuesta),
+tiempo total (con el cuerpo ya leído o la respuesta cerrada), bytes enviados
+y recibidos y estado HTTP. Las ventanas registran además lo que tarda la
+interfaz en mostrar los datos con medir_ui().
+
+Cada medición se escribe como una línea JSON en un registro rotativo
+(data_dir("diagnostico")/peticiones.jsonl, 2 MB x 3 archivos; se desactiva
+con BOXIA_DIAGNOSTICO=0) y se guarda en memoria para el panel de
+diagnóstico, que muestra p50/p95 por endpoint.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from local_data import data_dir
+
+REGISTRO_ACTIVO = os.environ.get("BOXIA_DIAGNOSTICO", "1") != "0"
+TAM_REGISTRO = 2 * 1024 * 1024
+ARCHIVOS_REGISTRO = 3
+
+# Mediciones que se conservan en memoria por endpoint para calcular percentiles
+MUESTRAS_POR_ENDPOINT = 1000
+
+# Segmentos de ruta que son identificadores (números, huellas, ids de carga)
+_IDENTIFICADOR = re.compile(r"^(\d+|[0-9a-fA-F]{16,})$")
+
+_hilo = threading.local()
+
+
+def ruta_registro():
+    return os.path.join(data_dir("diagnostico"), "peticiones.jsonl")
+
+
+def nombre_endpoint(metodo, ruta):
+    """"GET /cargas-pdf/{id}": sin parámetros y con los identificadores agrupados."""
+    ruta = ruta.split("?", 1)[0]
+    segmentos = ["{id}" if _IDENTIFICADOR.match(s) else s for s in ruta.strip("/").split("/")]
+    return f"{metodo.upper()} /{'/'.join(segmentos)}"
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Diagnostics:
+    def __init__(self, path=None, activo=REGISTRO_ACTIVO):
+        self.path = path or (ruta_registro() if activo else None)
+        self.app = os.path.splitext(os.path.basename(sys.argv[0] or "boxia"))[0]
+        self._lock = threading.Lock()
+        self._muestras = {}
+        self._logger = None
+
+    def _registro(self):
+        # El manejador se crea con la primera medición: abrir el archivo no debe demorar el arranque
+        if self._logger is None and self.path:
+            import logging
+            from logging.handlers import RotatingFileHandler
+
+            logger = logging.getLogger(f"boxia.diagnostico.{id(self)}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            manejador = RotatingFileHandler(self.path, maxBytes=TAM_REGISTRO, backupCount=ARCHIVOS_REGISTRO,
+                                            encoding="utf-8", delay=True)
+            manejador.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(manejador)
+            self._logger = logger
+        return self._logger
+
+    def registrar(self, clave, medicion):
+        medicion = dict(medicion, t=round(time.time(), 3), app=self.app)
+        with self._lock:
+            if clave not in self._muestras:
+                self._muestras[clave] = deque(maxlen=MUESTRAS_POR_ENDPOINT)
+            self._muestras[clave].append(medicion)
+            logger = self._registro()
+        if logger:
+            try:
+                logger.info(json.dumps(medicion, ensure_ascii=False))
+            except Exception:
+                pass
+
+    def resumen(self):
+        """Por cada endpoint (y medición de la interfaz): cantidad, errores y p50/p95 de cada tiempo."""
+        with self._lock:
+            muestras = {clave: list(filas) for clave, filas in self._muestras.items()}
+        resumen = []
+        for clave, filas in sorted(muestras.items()):
+            fila = {
+                "endpoint": clave,
+                "n": len(filas),
+                "errores": sum(1 for m in filas if m.get("error") or (m.get("estado") or 0) >= 400),
+                "bytes_enviados": sum(m.get("bytes_enviados") or 0 for m in filas),
+                "bytes_recibidos": sum(m.get("bytes_recibidos") or 0 for m in filas),
+            }
+            for campo in ("conexion_ms", "ttfb_ms", "total_ms"):
+                valores = [m[campo] for m in filas if m.get(campo) is not None]
+                fila[campo] = (percentil(valores, 50), percentil(valores, 95))
+            resumen.append(fila)
+        return resumen
+
+    def limpiar(self):
+        with self._lock:
+            self._muestras.clear()
+
+    # --- peticiones ---------------------------------------------------------
+
+    def iniciar_peticion(self, metodo, ruta, backend=None):
+        _hilo.conexion = None
+        return MedicionPeticion(self, metodo, ruta, backend)
+
+    # --- interfaz -----------------------------------------------------------
+
+    @contextmanager
+    def medir_ui(self, nombre, **datos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = (time.perf_counter() - inicio) * 1000
+            self.registrar(f"UI {nombre}", dict(datos, tipo="ui", nombre=nombre, total_ms=round(total, 3)))
+
+
+class MedicionPeticion:
+    """Una petición en curso; terminar() se llama una sola vez, al leer o cerrar la respuesta."""
+
+    def __init__(self, diagnostics, metodo, ruta, backend=None):
+        self.diagnostics = diagnostics
+        self.endpoint = nombre_endpoint(metodo, ruta)
+        self.backend = backend
+        self.inicio = time.perf_counter()
+        self._terminada = False
+        self._leidos = 0
+
+    def _base(self):
+        conexion = getattr(_hilo, "conexion", None)
+        _hilo.conexion = None
+        base = {"tipo": "http", "endpoint": self.endpoint,
+                "conexion_ms": None if conexion is None else round(conexion * 1000, 3)}
+        if self.backend:
+            # Solo con varias réplicas: a cuál fue la petición
+            base["backend"] = self.backend
+        return base
+
+    def fallo(self, error):
+        medicion = self._base()
+        medicion.update(error=type(error).__name__, total_ms=round((time.perf_counter() - self.inicio) * 1000, 3))
+        self._terminada = True
+        self.diagnostics.registrar(self.endpoint, medicion)
+
+    def recibida(self, response, stream):
+        """Llamar al volver de requests: sin stream la respuesta ya está completa."""
+        self._medicion = self._base()
+        self._medicion.update(
+            estado=response.status_code,
+            # requests mide elapsed hasta tener las cabeceras, antes de leer el cuerpo
+            ttfb_ms=round(response.elapsed.total_seconds() * 1000, 3),
+            bytes_enviados=int(response.request.headers.get("Content-Length") or 0),
+        )
+        if not stream:
+            self.terminar(response)
+            return
+        cerrar = response.close
+        iter_content = response.iter_content
+
+        def close():
+            cerrar()
+            self.terminar(response)
+
+        def contar(*args, **kwargs):
+            # urllib3 no cuenta en tell() lo leído de una respuesta "chunked" (p. ej. el streaming del chat)
+            for trozo in iter_content(*args, **kwargs):
+                self._leidos += len(trozo)
+                yield trozo
+
+        response.close = close
+        response.iter_content = contar
+
+    def terminar(self, response):
+        if self._terminada:
+            return
+        self._terminada = True
+        try:
+            # Bytes leídos de la red (comprimidos, si el servidor usó compresión)
+            recibidos = max(response.raw.tell(), self._leidos)
+        except Exception:
+            recibidos = self._leidos or None
+        self._medicion.update(bytes_recibidos=recibidos,
+                              total_ms=round((time.perf_counter() - self.inicio) * 1000, 3))
+        self.diagnostics.registrar(self.endpoint, self._medicion)
+
+
+def instrumentar_adaptador(adapter, al_esperar_respuesta=None):
+    """Hace que las conexiones del adaptador anoten su tiempo de conexión en el hilo actual.
+
+    al_esperar_respuesta(conexion), si se indica, se llama en el hilo de la
+    petición justo antes de esperar la respuesta del servidor.
+    """
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def medir_conexion(clase):
+        class ConexionMedida(clase):
+            def connect(self):
+                inicio = time.perf_counter()
+                try:
+                    super().connect()
+                finally:
+                    # Con reintentos se suman los intentos de conexión de la misma petición
+                    _hilo.conexion = (getattr(_hilo, "conexion", None) or 0.0) + time.perf_counter() - inicio
+
+            def getresponse(self, *args, **kwargs):
+                if al_esperar_respuesta is not None:
+                    al_esperar_respuesta(self)
+                return super().getresponse(*args, **kwargs)
+
+        return ConexionMedida
+
+    class PoolHTTP(HTTPConnectionPool):
+        ConnectionCls = medir_conexion(HTTPConnection)
+
+    class PoolHTTPS(HTTPSConnectionPool):
+        ConnectionCls = medir_conexion(HTTPSConnection)
+
+    adapter.poolmanager.pool_classes_by_scheme = {"http": PoolHTTP, "https": PoolHTTPS}
+
+
+_diagnostics = None
+_diagnostics_lock = threading.Lock()
+
+
+def get_diagnostics():
+    """Devuelve el registro de mediciones del proceso, creándolo la primera vez."""
+    global _diagnostics
+    with _diagnostics_lock:
+        if _diagnostics is None:
+            _diagnostics = Diagnostics()
+        return _diagnostics
+
+
+def medir_ui(nombre, **datos):
+    return get_diagnostics().medir_ui(nombre, **datos)
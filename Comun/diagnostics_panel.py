@@ -0,0 +1,137 @@
+"""Panel de diagnóstico: p50/p95 por endpoint de las peticiones de esta sesión.
+
+Se abre con Ctrl+Shift+D desde cualquier ventana que llame a
+install_diagnostics_shortcut(). Los mismos datos quedan en el registro
+rotativo de diagnostics (ver diagnostics.py).
+"""
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView
+)
+from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtCore import Qt, QTimer
+
+from api_client import get_client
+from diagnostics import get_diagnostics
+
+ATAJO = "Ctrl+Shift+D"
+INTERVALO_ACTUALIZACION = 1000
+
+COLUMNAS = [
+    "Endpoint", "N", "Errores", "Conexión p50/p95", "Primer byte p50/p95", "Total p50/p95",
+    "Enviado", "Recibido",
+]
+
+
+def _ms(par):
+    p50, p95 = par
+    if p50 is None:
+        return "—"
+    return f"{p50:.0f} / {p95:.0f} ms"
+
+
+def _tamano(bytes_):
+    for unidad in ("B", "KB", "MB"):
+        if bytes_ < 1024:
+            return f"{bytes_:.0f} {unidad}"
+        bytes_ /= 1024
+    return f"{bytes_:.1f} GB"
+
+
+class DiagnosticsPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.Window)
+        self.setWindowTitle("BoxIA - Diagnóstico")
+        self.resize(980, 360)
+        self.diagnostics = get_diagnostics()
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(COLUMNAS))
+        self.table.setHorizontalHeaderLabels(COLUMNAS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        # Solo con varias réplicas en BOXIA_API_URL
+        self.backends_label = QLabel("")
+        self.backends_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.backends_label.hide()
+        layout.addWidget(self.backends_label)
+
+        pie = QHBoxLayout()
+        registro = self.diagnostics.path or "desactivado (BOXIA_DIAGNOSTICO=0)"
+        self.log_label = QLabel(f"Registro: {registro}")
+        self.log_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        pie.addWidget(self.log_label, 1)
+        limpiar = QPushButton("🧹 Reiniciar")
+        limpiar.setToolTip("Descarta las mediciones de esta sesión (el registro en disco se conserva)")
+        limpiar.clicked.connect(self.clear)
+        pie.addWidget(limpiar)
+        layout.addLayout(pie)
+
+        # Solo se actualiza mientras el panel está visible
+        self._timer = QTimer(self)
+        self._timer.setInterval(INTERVALO_ACTUALIZACION)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        filas = self.diagnostics.resumen()
+        self.table.setRowCount(len(filas))
+        for i, fila in enumerate(filas):
+            valores = [
+                fila["endpoint"], str(fila["n"]), str(fila["errores"]),
+                _ms(fila["conexion_ms"]), _ms(fila["ttfb_ms"]), _ms(fila["total_ms"]),
+                _tamano(fila["bytes_enviados"]), _tamano(fila["bytes_recibidos"]),
+            ]
+            for col, valor in enumerate(valores):
+                item = QTableWidgetItem(valor)
+                if col:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(i, col, item)
+        self.table.resizeColumnsToContents()
+        self.refresh_backends()
+
+    def refresh_backends(self):
+        replicas = get_client().backends_status()
+        if len(replicas) < 2:
+            return
+        partes = []
+        for r in replicas:
+            estado = "✔" if r["disponible"] else "✖ caída"
+            latencia = "—" if r["latencia"] is None else f"{r['latencia'] * 1000:.0f} ms"
+            fija = " (fija)" if r["fija"] else ""
+            partes.append(f"{r['url']}{fija}: {estado}, {r['en_curso']} en curso, primer byte {latencia}")
+        self.backends_label.setText("Réplicas: " + " | ".join(partes))
+        self.backends_label.show()
+
+    def clear(self):
+        self.diagnostics.limpiar()
+        self.refresh()
+
+
+_panel = None
+
+
+def show_diagnostics_panel():
+    global _panel
+    if _panel is None:
+        _panel = DiagnosticsPanel()
+    _panel.show()
+    _panel.raise_()
+    _panel.activateWindow()
+
+
+def install_diagnostics_shortcut(window):
+    atajo = QShortcut(QKeySequence(ATAJO), window)
+    atajo.activated.connect(show_diagnostics_panel)
+    return atajo
@@ -0,0 +1,13 @@
+"""Ubicación de los datos locales de las interfaces (cachés, historiales, etc.)."""
+import os
+
+
+def data_dir(*partes):
+    """Devuelve (creándola si hace falta) una carpeta dentro de BOXIA_DATA_DIR.
+
+    Por defecto se usa ~/.boxia.
+    """
+    base = os.environ.get("BOXIA_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".boxia")
+    ruta = os.path.join(base, *partes)
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
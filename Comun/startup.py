@@ -0,0 +1,24 @@
+"""Medición del arranque de las interfaces (ver Herramientas/medir_arranque.py).
+
+Si BOXIA_MEDIR_ARRANQUE indica un archivo, la aplicación escribe en él la
+hora (time.time()) en que la primera ventana ya se mostró y se cierra. Se usa
+un archivo y no la salida estándar porque los ejecutables --windowed no
+tienen consola.
+"""
+import os
+import time
+
+
+def report_first_window(app):
+    destino = os.environ.get("BOXIA_MEDIR_ARRANQUE")
+    if not destino:
+        return
+    from PyQt6.QtCore import QTimer
+
+    def ventana_lista():
+        with open(destino, "w") as f:
+            f.write(f"{time.time():.6f}")
+        app.quit()
+
+    # Con intervalo 0 se ejecuta cuando el bucle de eventos ya procesó el show() inicial
+    QTimer.singleShot(0, ventana_lista)
@@ -0,0 +1,58 @@
+"""Tareas en segundo plano para las ventanas Qt.
+
+Worker ejecuta una función en el QThreadPool global y devuelve el resultado
+por señales, que Qt entrega en el hilo de la interfaz. La función recibe el
+propio worker como primer argumento para consultar is_cancelled() o emitir
+progreso con worker.signals.progreso. El resultado también queda en
+worker.resultado, para quien canceló y aun así necesita saber cómo terminó.
+"""
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    resultado = pyqtSignal(object)
+    error = pyqtSignal(object)
+    progreso = pyqtSignal(object)
+    terminado = pyqtSignal()
+
+
+class Worker(QRunnable):
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancelado = threading.Event()
+        self.resultado = None
+
+    def cancel(self):
+        self._cancelado.set()
+
+    def is_cancelled(self):
+        return self._cancelado.is_set()
+
+    def run(self):
+        try:
+            resultado = self.resultado = self.fn(self, *self.args, **self.kwargs)
+        except Exception as e:
+            if not self.is_cancelled():
+                self.signals.error.emit(e)
+        else:
+            if not self.is_cancelled():
+                self.signals.resultado.emit(resultado)
+        finally:
+            self.signals.terminado.emit()
+
+
+# Referencias a los workers en curso para que Python no los libere antes de tiempo
+_activos = set()
+
+
+def start(worker, pool=None):
+    _activos.add(worker)
+    worker.signals.terminado.connect(lambda: _activos.discard(worker))
+    (pool or QThreadPool.globalInstance()).start(worker)
+    return worker
@@ -0,0 +1,487 @@
+"""Mide el rendimiento de las interfaces contra el servidor simulado.
+
+Uso:
+    python3 benchmark_interfaces.py [--pruebas chat,reportes,exportacion,carga]
+                                    [--historial 100,1000,5000] [--preguntas 5]
+                                    [--filas 1000,10000] [--pdfs 20] [--tam-pdf 1]
+                                    [--concurrencia 1,3] [--latencia 0] [--tokens 200]
+                                    [--retardo-token 0.005] [--largo-texto 200]
+                                    [--retardo-carga 0.05] [--ancho-banda 0]
+                                    [--salida resultados.jsonl] [--con-pantalla]
+
+Levanta Herramientas/mock_backend.py en un puerto libre (se reinicia para
+cada cantidad de filas) y maneja ChatUI, UploadUI y ReportsUI sin pantalla
+(QT_QPA_PLATFORM=offscreen), sin diálogos y con una carpeta de datos vacía.
+
+Pruebas:
+  chat         costo de agregar un mensaje según el largo del historial, y
+               primer token / total de /preguntar, reporte de la respuesta (guardarlo
+               en la bandeja de salida) y tiempo hasta que el servidor recibe todos
+  reportes     load_reports: primera página y todas las filas, según la cantidad,
+               y cada tecla de la búsqueda sobre las filas cargadas; al cambiar de
+               estado, cuándo se ven las filas y cuándo termina la revalidación
+  exportacion  descarga de /exportar-preguntas y subida a /subir-respuestas-excel
+  carga        MB/s y documentos/min de la cola de PDFs según la concurrencia
+
+Cada medición se agrega como una línea JSON a --salida (por defecto
+~/.boxia/benchmark.jsonl) con la fecha, el commit y los parámetros, y se
+muestra junto al valor de la ejecución anterior con los mismos parámetros.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+MOCK = os.path.join(RAIZ, "Herramientas", "mock_backend.py")
+for carpeta in ("Comun", "UsuarioGeneral", "UsuarioExperto"):
+    sys.path.insert(0, os.path.join(RAIZ, carpeta))
+
+from local_data import data_dir
+
+PRUEBAS = ["chat", "reportes", "exportacion", "carga"]
+
+# Métrica que se compara con la ejecución anterior en el resumen de cada prueba
+METRICA_PRINCIPAL = {
+    "chat_agregar": "p95_ms",
+    "chat_pregunta": "total_p50_ms",
+    "reportes_cargar": "todas_ms",
+    "reportes_buscar": "tecla_p95_ms",
+    "reportes_cambiar_estado": "mostrar_p50_ms",
+    "exportacion": "mb_s",
+    "carga_pdfs": "mb_s",
+}
+
+LIMITE_ESPERA = 300
+TEXTO_MENSAJE = "Mensaje de prueba para medir el historial del chat. " * 4
+
+
+def lista_enteros(texto):
+    return [int(v) for v in texto.split(",") if v.strip()]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def resumen_ms(segundos):
+    ms = [s * 1000 for s in segundos]
+    return {"n": len(ms), "media_ms": round(statistics.fmean(ms), 3), "p50_ms": round(percentil(ms, 50), 3),
+            "p95_ms": round(percentil(ms, 95), 3), "max_ms": round(max(ms), 3)}
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def commit_actual():
+    try:
+        salida = subprocess.run(["git", "-C", RAIZ, "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, timeout=10)
+    except OSError:
+        return None
+    return salida.stdout.strip() or None
+
+
+class ServidorSimulado:
+    """mock_backend.py en un proceso aparte, para no competir por el GIL con la interfaz."""
+
+    def __init__(self, puerto, opciones):
+        self.puerto = puerto
+        self.opciones = opciones
+        self.proceso = None
+
+    def iniciar(self, **extra):
+        self.detener()
+        argumentos = []
+        for clave, valor in dict(self.opciones, **extra).items():
+            argumentos += [f"--{clave.replace('_', '-')}", str(valor)]
+        self.proceso = subprocess.Popen([sys.executable, MOCK, "--puerto", str(self.puerto), *argumentos],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        limite = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.puerto}/capacidades", timeout=1).close()
+                return
+            except OSError:
+                if self.proceso.poll() is not None or time.monotonic() > limite:
+                    raise RuntimeError("No arrancó el servidor simulado")
+                time.sleep(0.05)
+
+    def detener(self):
+        if self.proceso is not None:
+            self.proceso.terminate()
+            self.proceso.wait()
+            self.proceso = None
+            # Las conexiones abiertas del cliente apuntan al proceso anterior
+            from api_client import get_client
+            get_client().close()
+
+
+class Benchmark:
+    def __init__(self, app, servidor, args):
+        self.app = app
+        self.servidor = servidor
+        self.args = args
+        self.dialogos = []
+        self.resultados = []
+        self.carpeta = tempfile.mkdtemp(prefix="boxia-benchmark-")
+
+    # --- utilidades ---------------------------------------------------------
+
+    def procesar(self):
+        from PyQt6.QtCore import QEventLoop
+        self.app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+
+    def esperar(self, condicion, descripcion):
+        limite = time.monotonic() + LIMITE_ESPERA
+        while not condicion():
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Tiempo agotado esperando {descripcion}")
+            self.procesar()
+
+    def registrar(self, prueba, parametros, resultado):
+        self.resultados.append({"prueba": prueba, "parametros": parametros, "resultado": resultado})
+
+    def sin_dialogos(self, *modulos):
+        """Reemplaza QMessageBox en los módulos dados: los avisos se anotan en self.dialogos."""
+        from PyQt6.QtWidgets import QMessageBox
+        dialogos = self.dialogos
+
+        class Avisos:
+            StandardButton = QMessageBox.StandardButton
+
+            @staticmethod
+            def _anotar(tipo, titulo, texto, respuesta):
+                dialogos.append((tipo, titulo, texto))
+                return respuesta
+
+            @classmethod
+            def information(cls, parent, titulo, texto, *args):
+                return cls._anotar("informacion", titulo, texto, QMessageBox.StandardButton.Ok)
+
+            @classmethod
+            def warning(cls, parent, titulo, texto, *args):
+                return cls._anotar("advertencia", titulo, texto, QMessageBox.StandardButton.Ok)
+
+            @classmethod
+            def critical(cls, parent, titulo, texto, *args):
+                return cls._anotar("error", titulo, texto, QMessageBox.StandardButton.Ok)
+
+            @classmethod
+            def question(cls, parent, titulo, texto, *args):
+                return cls._anotar("pregunta", titulo, texto, QMessageBox.StandardButton.Yes)
+
+        for modulo in modulos:
+            modulo.QMessageBox = Avisos
+
+    def errores_desde(self, inicio):
+        return [d for d in self.dialogos[inicio:] if d[0] == "error"]
+
+    # --- pruebas ------------------------------------------------------------
+
+    def chat(self):
+        import interfaz_chat
+        self.sin_dialogos(interfaz_chat)
+        ui = interfaz_chat.ChatUI(usar_cache=False)
+        ui.show()
+        self.procesar()
+
+        # Costo de agregar un mensaje (modelo, delegado y repintado) según el historial
+        for largo in lista_enteros(self.args.historial):
+            ui.clear_chat()
+            for i in range(largo):
+                ui.chat_model.append("user" if i % 2 == 0 else "bot", TEXTO_MENSAJE)
+            ui.chat_view.scrollToBottom()
+            self.procesar()
+            tiempos = []
+            for i in range(self.args.agregados):
+                inicio = time.perf_counter()
+                if i % 2 == 0:
+                    ui.add_message("user", TEXTO_MENSAJE)
+                else:
+                    ui.add_bot_response_with_button(TEXTO_MENSAJE)
+                self.procesar()
+                tiempos.append(time.perf_counter() - inicio)
+            self.registrar("chat_agregar", {"historial": largo, "largo_mensaje": len(TEXTO_MENSAJE)},
+                           resumen_ms(tiempos))
+
+        # Pregunta completa por la interfaz (streaming) y reporte de la respuesta
+        ui.clear_chat()
+        self.servidor.iniciar()
+        ttft, totales, reportes = [], [], []
+        for i in range(self.args.preguntas):
+            avisos = len(self.dialogos)
+            ui.input_box.setPlainText(f"¿Pregunta de prueba {i}?")
+            inicio = time.perf_counter()
+            ui.send_message()
+            self.esperar(lambda: ui._worker_actual is None, "la respuesta del chat")
+            totales.append(time.perf_counter() - inicio)
+            if self.errores_desde(avisos):
+                raise RuntimeError(f"Error en /preguntar: {self.errores_desde(avisos)}")
+            ttft.append(ui.ultimo_ttft or 0.0)
+            inicio = time.perf_counter()
+            ui.reportar_respuesta()
+            reportes.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        ui.report_sender.flush()
+        self.esperar(lambda: ui.report_sender.pendientes() == 0, "el envío de los reportes")
+        entrega = time.perf_counter() - inicio
+        primer_token, total, reporte = resumen_ms(ttft), resumen_ms(totales), resumen_ms(reportes)
+        self.registrar("chat_pregunta", self.parametros_servidor("tokens", "retardo_token", "latencia"), {
+            "n": total["n"], "ttft_p50_ms": primer_token["p50_ms"], "ttft_p95_ms": primer_token["p95_ms"],
+            "total_p50_ms": total["p50_ms"], "total_p95_ms": total["p95_ms"],
+            "reportar_p50_ms": reporte["p50_ms"], "reportar_p95_ms": reporte["p95_ms"],
+            "reportes_entregados_ms": round(entrega * 1000, 3),
+        })
+        ui.close()
+
+    def reportes(self, exportar=False):
+        import manage_reports
+        self.sin_dialogos(manage_reports)
+        for filas in lista_enteros(self.args.filas):
+            self.servidor.iniciar(reportes=filas)
+            ui = manage_reports.ReportsUI()
+            ui.show()
+            self.procesar()
+
+            avisos = len(self.dialogos)
+            inicio = time.perf_counter()
+            ui.load_reports()
+            self.esperar(lambda: ui.model.rowCount() > 0 or len(self.dialogos) > avisos, "la primera página")
+            primera = time.perf_counter() - inicio
+            # Como el desplazamiento de la vista: se piden páginas hasta completar la lista
+            while not ui.model.is_complete():
+                if ui.model.canFetchMore():
+                    ui.model.fetchMore()
+                self.procesar()
+            todas = time.perf_counter() - inicio
+            if self.errores_desde(avisos):
+                raise RuntimeError(f"Error al cargar reportes: {self.errores_desde(avisos)}")
+            self.registrar("reportes_cargar", dict(self.parametros_servidor("latencia", "largo_texto"), filas=filas), {
+                "filas_cargadas": ui.model.rowCount(), "primera_pagina_ms": round(primera * 1000, 3),
+                "todas_ms": round(todas * 1000, 3),
+                "filas_s": round(ui.model.rowCount() / todas, 1) if todas else None,
+            })
+            self.busqueda(ui, filas)
+            self.cambio_estado(ui, filas)
+            if exportar:
+                self.exportacion(manage_reports, ui, filas)
+            ui.close()
+            self.procesar()
+
+    def busqueda(self, ui, filas):
+        # Se escribe y se borra la consulta letra por letra, como un usuario
+        consulta = "prueba 12"
+        tiempos = []
+        textos = [consulta[:i] for i in range(1, len(consulta) + 1)]
+        for texto in textos + textos[-2::-1] + [""]:
+            inicio = time.perf_counter()
+            ui.search_box.setText(texto)
+            tiempos.append(time.perf_counter() - inicio)
+            self.procesar()
+        tecla = resumen_ms(tiempos)
+        self.registrar("reportes_buscar", {"filas": filas}, {
+            "teclas": tecla["n"], "tecla_p50_ms": tecla["p50_ms"], "tecla_p95_ms": tecla["p95_ms"],
+        })
+
+    def cambio_estado(self, ui, filas):
+        def revalidado():
+            return not ui.status_label.text().startswith("⏳") and not ui._prefetching
+
+        self.esperar(revalidado, "la precarga de los otros estados")
+        mostrar, revalidar = [], []
+        for indice in [1, 2, 0] * 3:
+            inicio = time.perf_counter()
+            ui.status_filter.setCurrentIndex(indice)
+            estado = ui.status_filter.currentText().lower()
+            self.esperar(lambda: ui.model.estado == estado, "las filas del nuevo estado")
+            mostrar.append(time.perf_counter() - inicio)
+            self.esperar(revalidado, "la revalidación del estado")
+            revalidar.append(time.perf_counter() - inicio)
+        mostrado, revalidado_ms = resumen_ms(mostrar), resumen_ms(revalidar)
+        self.registrar("reportes_cambiar_estado", dict(self.parametros_servidor("latencia"), filas=filas), {
+            "cambios": mostrado["n"], "mostrar_p50_ms": mostrado["p50_ms"], "mostrar_p95_ms": mostrado["p95_ms"],
+            "revalidar_p50_ms": revalidado_ms["p50_ms"], "revalidar_p95_ms": revalidado_ms["p95_ms"],
+        })
+
+    def exportacion(self, manage_reports, ui, filas):
+        destino = os.path.join(self.carpeta, f"exportacion_{filas}.xlsx")
+        manage_reports.QFileDialog.getSaveFileName = staticmethod(lambda *a, **k: (destino, ""))
+        avisos = len(self.dialogos)
+        inicio = time.perf_counter()
+        ui.export_excel()
+        self.esperar(lambda: ui._export_worker is None, "la exportación")
+        descarga = time.perf_counter() - inicio
+        if self.errores_desde(avisos) or not os.path.exists(destino):
+            raise RuntimeError(f"Error al exportar: {self.errores_desde(avisos)}")
+        tamano = os.path.getsize(destino)
+
+        avisos = len(self.dialogos)
+        inicio = time.perf_counter()
+        ui.upload_full_excel(destino)
+        self.esperar(lambda: len(self.dialogos) > avisos, "la subida del Excel")
+        subida = time.perf_counter() - inicio
+        if self.errores_desde(avisos):
+            raise RuntimeError(f"Error al subir el Excel: {self.errores_desde(avisos)}")
+        self.registrar("exportacion", dict(self.parametros_servidor("latencia", "largo_texto", "ancho_banda"),
+                                           filas=filas), {
+            "bytes": tamano, "descarga_ms": round(descarga * 1000, 3),
+            "mb_s": round(tamano / descarga / 1e6, 3), "subida_ms": round(subida * 1000, 3),
+        })
+
+    def carga(self):
+        import interfaz_docs
+        self.sin_dialogos(interfaz_docs)
+        carpeta = os.path.join(self.carpeta, "pdfs")
+        os.makedirs(carpeta, exist_ok=True)
+        tamano = int(self.args.tam_pdf * 1024 * 1024)
+        rutas = []
+        for i in range(self.args.pdfs):
+            ruta = os.path.join(carpeta, f"documento_{i:04d}.pdf")
+            with open(ruta, "wb") as f:
+                f.write(b"%PDF-1.4\n")
+                f.write(os.urandom(max(0, tamano - 9)))
+            rutas.append(ruta)
+
+        self.servidor.iniciar()
+        for concurrencia in lista_enteros(self.args.concurrencia):
+            ui = interfaz_docs.UploadUI()
+            ui.show()
+            # Los mismos archivos se suben en cada ronda: no se omiten por repetidos
+            ui.queue.set_omitir_duplicados(False)
+            ui.queue.set_concurrencia(concurrencia)
+            terminado = []
+            ui.queue.terminado.connect(lambda: terminado.append(True))
+            inicio = time.perf_counter()
+            ui.add_to_queue(rutas)
+            ui.upload_files()
+            self.esperar(lambda: terminado, "la cola de carga")
+            transcurrido = time.perf_counter() - inicio
+            archivos, cargados, errores, _, bytes_totales, _ = ui.queue_model.totales()
+            mb_s, docs_min = ui.queue.rendimiento()
+            self.registrar("carga_pdfs", dict(self.parametros_servidor("retardo_carga", "ancho_banda"),
+                                              concurrencia=concurrencia, pdfs=archivos, tam_pdf_mb=self.args.tam_pdf), {
+                "cargados": cargados, "errores": errores, "total_ms": round(transcurrido * 1000, 3),
+                "mb_s": round(mb_s, 3), "docs_min": round(docs_min, 1),
+                "mb_s_con_huellas": round(bytes_totales / transcurrido / 1e6, 3),
+            })
+            ui.close()
+            ui.manifest.close()
+            self.procesar()
+
+    def parametros_servidor(self, *claves):
+        return {clave: self.servidor.opciones.get(clave, 0) for clave in claves}
+
+    def limpiar(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+
+def anteriores(salida):
+    """Último resultado registrado para cada (prueba, parámetros)."""
+    previos = {}
+    if not os.path.exists(salida):
+        return previos
+    with open(salida, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                continue
+            previos[(fila.get("prueba"), json.dumps(fila.get("parametros"), sort_keys=True))] = fila
+    return previos
+
+
+def mostrar(resultados, previos):
+    for fila in resultados:
+        parametros = " ".join(f"{k}={v}" for k, v in fila["parametros"].items())
+        metrica = METRICA_PRINCIPAL[fila["prueba"]]
+        valor = fila["resultado"].get(metrica)
+        texto = f"{fila['prueba']:16s} {parametros:50s} {metrica}={valor}"
+        previo = previos.get((fila["prueba"], json.dumps(fila["parametros"], sort_keys=True)))
+        anterior = previo and previo["resultado"].get(metrica)
+        if anterior and valor is not None:
+            texto += f"  (anterior {anterior}, {100 * (valor - anterior) / anterior:+.1f} %, {previo.get('commit')})"
+        print(texto)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las interfaces de BoxIA contra el servidor simulado")
+    parser.add_argument("--pruebas", default=",".join(PRUEBAS), help=f"separadas por comas: {', '.join(PRUEBAS)}")
+    parser.add_argument("--historial", default="100,1000,5000", help="largos del historial del chat")
+    parser.add_argument("--agregados", type=int, default=50, help="mensajes agregados por cada largo de historial")
+    parser.add_argument("--preguntas", type=int, default=5, help="preguntas completas enviadas por el chat")
+    parser.add_argument("--filas", default="1000,10000", help="cantidades de preguntas reportadas en el servidor")
+    parser.add_argument("--pdfs", type=int, default=20, help="cantidad de PDFs a subir")
+    parser.add_argument("--tam-pdf", type=float, default=1.0, help="tamaño de cada PDF en MB")
+    parser.add_argument("--concurrencia", default="1,3", help="concurrencias de la cola de carga")
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos extra en las respuestas sobre reportes")
+    parser.add_argument("--tokens", type=int, default=200, help="tokens de cada respuesta del chat")
+    parser.add_argument("--retardo-token", type=float, default=0.005, help="segundos entre tokens")
+    parser.add_argument("--largo-texto", type=int, default=200, help="caracteres de relleno en cada reporte")
+    parser.add_argument("--retardo-carga", type=float, default=0.05, help="segundos de proceso de cada PDF")
+    parser.add_argument("--ancho-banda", type=float, default=0.0, help="MB/s del servidor (0 = sin límite)")
+    parser.add_argument("--salida", default=os.path.join(data_dir(), "benchmark.jsonl"),
+                        help="archivo JSONL donde se agregan los resultados")
+    parser.add_argument("--con-pantalla", action="store_true", help="mostrar las ventanas en lugar de offscreen")
+    args = parser.parse_args()
+
+    pruebas = [p.strip() for p in args.pruebas.split(",") if p.strip()]
+    desconocidas = set(pruebas) - set(PRUEBAS)
+    if desconocidas:
+        parser.error(f"pruebas desconocidas: {', '.join(sorted(desconocidas))}")
+
+    # Antes de importar las interfaces: el cliente lee la URL al cargarse
+    puerto = puerto_libre()
+    os.environ["BOXIA_API_URL"] = f"http://127.0.0.1:{puerto}"
+    os.environ["BOXIA_DATA_DIR"] = tempfile.mkdtemp(prefix="boxia-benchmark-datos-")
+    if not args.con_pantalla:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+
+    servidor = ServidorSimulado(puerto, {
+        "latencia": args.latencia, "tokens": args.tokens, "retardo_token": args.retardo_token,
+        "largo_texto": args.largo_texto, "retardo_carga": args.retardo_carga, "ancho_banda": args.ancho_banda,
+    })
+    benchmark = Benchmark(app, servidor, args)
+    try:
+        if "chat" in pruebas:
+            benchmark.chat()
+        if "reportes" in pruebas or "exportacion" in pruebas:
+            benchmark.reportes(exportar="exportacion" in pruebas)
+        if "carga" in pruebas:
+            benchmark.carga()
+    finally:
+        servidor.detener()
+        benchmark.limpiar()
+        shutil.rmtree(os.environ["BOXIA_DATA_DIR"], ignore_errors=True)
+
+    previos = anteriores(args.salida)
+    comunes = {"fecha": datetime.now().isoformat(timespec="seconds"), "commit": commit_actual(),
+               "maquina": platform.node(), "python": platform.python_version(),
+               "plataforma": os.environ.get("QT_QPA_PLATFORM") or "pantalla"}
+    with open(args.salida, "a", encoding="utf-8") as f:
+        for fila in benchmark.resultados:
+            f.write(json.dumps(dict(comunes, **fila), ensure_ascii=False) + "\n")
+    mostrar(benchmark.resultados, previos)
+    print(f"\nResultados agregados a {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
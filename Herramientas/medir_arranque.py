@@ -0,0 +1,100 @@
+"""Mide el tiempo hasta la primera ventana de BoxIA-Chat y BoxIA-Experto.
+
+Uso:
+    python3 medir_arranque.py [--app chat|experto|ambas] [--repeticiones 10]
+                              [--ejecutable-chat dist/BoxIA-Chat/BoxIA-Chat]
+                              [--ejecutable-experto dist/BoxIA-Experto.exe]
+                              [--offscreen] [--importtime]
+
+Sin --ejecutable-* se lanzan los scripts con este mismo intérprete. Cada
+medición arranca un proceso nuevo con BOXIA_MEDIR_ARRANQUE (ver
+Comun/startup.py), una carpeta de datos vacía y sin servidor, y cuenta desde
+el lanzamiento hasta que la ventana ya se mostró. La primera ejecución de
+cada app se descarta (calienta la caché de disco y, en onefile, la carpeta
+temporal). Con --importtime muestra además los módulos que más tardan en
+importarse (solo para scripts).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SCRIPTS = {
+    "chat": os.path.join(RAIZ, "UsuarioGeneral", "interfaz_chat.py"),
+    "experto": os.path.join(RAIZ, "UsuarioExperto", "interfaz_docs.py"),
+}
+LIMITE_SEGUNDOS = 60
+
+
+def comando(app, ejecutable, extra=()):
+    if ejecutable:
+        return [ejecutable]
+    return [sys.executable, *extra, SCRIPTS[app]]
+
+
+def medir_una_vez(cmd, entorno):
+    with tempfile.TemporaryDirectory(prefix="boxia-arranque-") as carpeta:
+        marca = os.path.join(carpeta, "ventana")
+        entorno = dict(entorno, BOXIA_MEDIR_ARRANQUE=marca, BOXIA_DATA_DIR=os.path.join(carpeta, "datos"))
+        inicio = time.time()
+        proceso = subprocess.run(cmd, env=entorno, cwd=os.path.dirname(cmd[-1]) or None,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=LIMITE_SEGUNDOS)
+        if not os.path.exists(marca):
+            raise RuntimeError(f"{cmd[-1]} terminó sin mostrar la ventana:\n"
+                               + proceso.stderr.decode("utf-8", "replace")[-2000:])
+        with open(marca) as f:
+            return float(f.read()) - inicio
+
+
+def importaciones_mas_lentas(app, entorno, cantidad=15):
+    """Módulos de mayor tiempo acumulado según python -X importtime."""
+    with tempfile.TemporaryDirectory(prefix="boxia-arranque-") as carpeta:
+        entorno = dict(entorno, BOXIA_MEDIR_ARRANQUE=os.path.join(carpeta, "ventana"),
+                       BOXIA_DATA_DIR=os.path.join(carpeta, "datos"))
+        proceso = subprocess.run(comando(app, None, ("-X", "importtime")), env=entorno,
+                                 cwd=os.path.dirname(SCRIPTS[app]), capture_output=True, timeout=LIMITE_SEGUNDOS)
+    filas = []
+    for linea in proceso.stderr.decode("utf-8", "replace").splitlines():
+        if linea.startswith("import time:") and "|" in linea:
+            _, acumulado, modulo = linea[len("import time:"):].split("|")
+            if acumulado.strip().isdigit():
+                filas.append((int(acumulado), modulo.rstrip()))
+    return sorted(filas, reverse=True)[:cantidad]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo hasta la primera ventana de las interfaces de BoxIA")
+    parser.add_argument("--app", choices=["chat", "experto", "ambas"], default="ambas")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--ejecutable-chat", help="ejecutable generado por PyInstaller en lugar del script")
+    parser.add_argument("--ejecutable-experto", help="ejecutable generado por PyInstaller en lugar del script")
+    parser.add_argument("--offscreen", action="store_true", help="usar QT_QPA_PLATFORM=offscreen (sin pantalla)")
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args()
+
+    entorno = dict(os.environ)
+    # Un servidor inexistente: el arranque no debe depender de la red
+    entorno["BOXIA_API_URL"] = "http://127.0.0.1:9"
+    if args.offscreen:
+        entorno["QT_QPA_PLATFORM"] = "offscreen"
+
+    apps = ["chat", "experto"] if args.app == "ambas" else [args.app]
+    for app in apps:
+        ejecutable = args.ejecutable_chat if app == "chat" else args.ejecutable_experto
+        cmd = comando(app, ejecutable)
+        medir_una_vez(cmd, entorno)
+        tiempos = [medir_una_vez(cmd, entorno) for _ in range(args.repeticiones)]
+        ms = sorted(t * 1000 for t in tiempos)
+        print(f"{app:8s} {'ejecutable' if ejecutable else 'script':10s} n={len(ms)}  "
+              f"mín {ms[0]:.0f} ms  mediana {statistics.median(ms):.0f} ms  máx {ms[-1]:.0f} ms")
+        if args.importtime and not ejecutable:
+            for acumulado, modulo in importaciones_mas_lentas(app, entorno):
+                print(f"    {acumulado / 1000:8.1f} ms  {modulo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,628 @@
+"""Servidor simulado de BoxIA para probar las interfaces sin el backend real.
+
+Uso:
+    python3 mock_backend.py [--puerto 8000] [--retardo-token 0.05] [--sin-streaming]
+                            [--retardo-pregunta 0.5] [--capacidad 4]
+                            [--reportes 5000] [--latencia 0.2] [--sin-lotes] [--sin-etag]
+                            [--eventos 5] [--sin-cambios]
+                            [--retardo-carga 0.2] [--fallo-carga 0.1]
+                            [--ancho-banda 20] [--sin-partes] [--sin-consulta-hash]
+                            [--tokens 200] [--largo-texto 500]
+
+/preguntar responde por SSE (text/event-stream) cuando el cliente lo acepta,
+enviando una lista fija de tokens, y con el JSON de siempre en otro caso.
+/preguntas-reportadas sigue el contrato paginado descrito en
+UsuarioExperto/README.txt, igual que /capacidades y las acciones por lote.
+"""
+import argparse
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from xml.sax.saxutils import escape
+import zipfile
+
+TOKENS = [
+    "Hola", ", ", "soy", " BoxIA", ". ", "Esta", " es", " una",
+    " respuesta", " simulada", " enviada", " por", " partes", ".",
+]
+
+
+# Estado en que queda una pregunta tras cada acción del experto
+ACCIONES_REPORTE = {
+    "/marcar-revisado": "revisada",
+    "/eliminar-pregunta": "eliminada",
+    "/eliminar-de-chroma": "eliminada",
+    "/reactivar-pregunta": "reportada",
+}
+
+
+def tokens_respuesta(cantidad=None):
+    """Tokens de la respuesta simulada; con `cantidad` se repite la lista fija hasta ese largo."""
+    if not cantidad:
+        return TOKENS
+    return [TOKENS[i % len(TOKENS)] for i in range(cantidad)]
+
+
+def relleno(largo):
+    return (" Texto de relleno para simular contenidos largos." * (largo // 50 + 1))[:largo]
+
+
+def generar_reportes(cantidad, largo_texto=0):
+    inicio = datetime(2025, 1, 1, 8, 0, 0)
+    estados = ["reportada", "reportada", "revisada", "eliminada"]
+    extra = relleno(largo_texto)
+    reportes = []
+    for i in range(1, cantidad + 1):
+        estado = estados[i % len(estados)]
+        reportes.append({
+            "id": i,
+            "pregunta": f"¿Pregunta de prueba número {i}?{extra}",
+            "respuesta": f"Respuesta simulada para la pregunta {i}.{extra}",
+            "fecha": (inicio + timedelta(minutes=17 * i)).isoformat(),
+            "estado": estado,
+            "respuesta_experto": f"Respuesta del experto {i}." if estado != "reportada" else "",
+        })
+    return reportes
+
+
+def registrar_cambio(servidor, reporte_id, *estados):
+    """Llamar con el lock tomado: anota el cambio para /preguntas-reportadas/cambios
+    y cambia el ETag de las listas de esos estados."""
+    for estado in estados:
+        servidor.versiones[estado] = servidor.versiones.get(estado, 0) + 1
+    servidor.cambios.append(reporte_id)
+    servidor.hay_cambios.notify_all()
+
+
+def simular_eventos(servidor, intervalo):
+    """Cada `intervalo` segundos (en promedio) llega una pregunta reportada o un experto cambia un estado."""
+    estados = ["reportada", "revisada", "eliminada"]
+    while True:
+        time.sleep(random.expovariate(1 / intervalo))
+        with servidor.lock:
+            if random.random() < 0.5 or not servidor.reportes:
+                servidor.ultimo_id += 1
+                servidor.reportes.append({
+                    "id": servidor.ultimo_id,
+                    "pregunta": f"¿Pregunta reportada en vivo {servidor.ultimo_id}?",
+                    "respuesta": f"Respuesta simulada {servidor.ultimo_id}.",
+                    "fecha": datetime.now().isoformat(timespec="seconds"),
+                    "estado": "reportada",
+                    "respuesta_experto": "",
+                })
+                registrar_cambio(servidor, servidor.ultimo_id, "reportada")
+            else:
+                reporte = random.choice(servidor.reportes)
+                nuevo = random.choice([e for e in estados if e != reporte["estado"]])
+                registrar_cambio(servidor, reporte["id"], reporte["estado"], nuevo)
+                reporte["estado"] = nuevo
+
+
+COLUMNAS_EXPORTACION = ["id", "pregunta", "respuesta", "fecha", "estado", "respuesta_experto"]
+
+
+def generar_xlsx(filas):
+    """Libro .xlsx mínimo (una hoja, texto en línea) sin depender de openpyxl."""
+    def celda(valor):
+        if isinstance(valor, int):
+            return f"<c><v>{valor}</v></c>"
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(valor or ""))}</t></is></c>'
+
+    filas_xml = ["<row>" + "".join(celda(c) for c in COLUMNAS_EXPORTACION) + "</row>"]
+    filas_xml += ["<row>" + "".join(celda(f.get(c)) for c in COLUMNAS_EXPORTACION) + "</row>" for f in filas]
+    hoja = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            + "".join(filas_xml) + "</sheetData></worksheet>")
+    archivos = {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="xl/workbook.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'),
+        "xl/workbook.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Preguntas" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+        "xl/_rels/workbook.xml.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+            '</Relationships>'),
+        "xl/worksheets/sheet1.xml": hoja,
+    }
+    salida = io.BytesIO()
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in archivos.items():
+            libro.writestr(nombre, contenido)
+    return salida.getvalue()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "BoxIA-Mock/1.0"
+    # Cabeceras y cuerpo van en escrituras separadas: sin esto Nagle y el ACK
+    # diferido del cliente suman ~40 ms a cada respuesta pequeña
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.opciones.get("verbose"):
+            super().log_message(format, *args)
+
+    # --- utilidades -------------------------------------------------------
+
+    def _leer_cuerpo(self):
+        largo = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(largo) if largo else b""
+
+    def _consumir_cuerpo(self, cabeza=4096):
+        """Lee el cuerpo por bloques sin guardarlo (salvo los primeros bytes).
+
+        Con --ancho-banda se limita la velocidad de lectura para simular una
+        red lenta. Devuelve (bytes leídos, cabeza del cuerpo).
+        """
+        largo = int(self.headers.get("Content-Length") or 0)
+        ancho_banda = self.server.opciones.get("ancho_banda", 0) * 1e6
+        leidos, inicio_cuerpo = 0, b""
+        inicio = time.monotonic()
+        while leidos < largo:
+            bloque = self.rfile.read(min(256 * 1024, largo - leidos))
+            if not bloque:
+                break
+            if len(inicio_cuerpo) < cabeza:
+                inicio_cuerpo += bloque[:cabeza - len(inicio_cuerpo)]
+            leidos += len(bloque)
+            if ancho_banda:
+                adelanto = leidos / ancho_banda - (time.monotonic() - inicio)
+                if adelanto > 0:
+                    time.sleep(adelanto)
+        return leidos, inicio_cuerpo
+
+    def _leer_json(self):
+        cuerpo = self._leer_cuerpo()
+        try:
+            return json.loads(cuerpo) if cuerpo else {}
+        except ValueError:
+            return {}
+
+    def _json(self, status, datos, headers=None):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for clave, valor in (headers or {}).items():
+            self.send_header(clave, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _chunk(self, datos):
+        self.wfile.write(f"{len(datos):X}\r\n".encode("ascii") + datos + b"\r\n")
+        self.wfile.flush()
+
+    # --- rutas ------------------------------------------------------------
+
+    def do_POST(self):
+        ruta = urlsplit(self.path).path
+        if ruta == "/preguntar":
+            self._preguntar(self._leer_json())
+        elif ruta == "/cargar-documento-pdf":
+            self._cargar_documento(*self._consumir_cuerpo())
+        elif ruta == "/cargas-pdf" and self.server.opciones.get("partes", True):
+            self._crear_carga(self._leer_json())
+        elif ruta.startswith("/cargas-pdf/") and ruta.endswith("/completar"):
+            self._leer_cuerpo()
+            self._completar_carga(ruta.split("/")[2])
+        elif ruta == "/reportar-pregunta":
+            datos = self._leer_json()
+            time.sleep(self.server.opciones.get("latencia", 0))
+            self._registrar_reportes([datos])
+            self._json(200, {"mensaje": "Reporte registrado."})
+        elif ruta == "/reportar-pregunta-lote" and self.server.opciones.get("lotes", True):
+            datos = self._leer_json()
+            time.sleep(self.server.opciones.get("latencia", 0))
+            fallidos = self._registrar_reportes(datos.get("reportes", []))
+            self._json(200, {"fallidos": fallidos})
+        elif ruta in ACCIONES_REPORTE:
+            self._accion_reporte(ACCIONES_REPORTE[ruta], self._leer_json())
+        elif ruta == "/respuestas-experto-lote" and self.server.opciones.get("lotes", True):
+            self._respuestas_lote(self._leer_json())
+        elif ruta == "/subir-respuestas-excel":
+            self._consumir_cuerpo()
+            time.sleep(self.server.opciones.get("latencia", 0))
+            self._json(200, {"mensaje": "Respuestas procesadas."})
+        elif ruta.endswith("-lote") and ruta[:-5] in ACCIONES_REPORTE and self.server.opciones.get("lotes", True):
+            self._accion_reporte_lote(ACCIONES_REPORTE[ruta[:-5]], self._leer_json())
+        else:
+            self._leer_cuerpo()
+            self._json(404, {"detail": "No encontrado"})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+        with self.server.lock:
+            # Las primeras N consultas fallan como un servidor que aún no está listo
+            no_disponible = self.server.fallos_503 > 0
+            if no_disponible:
+                self.server.fallos_503 -= 1
+        if no_disponible:
+            self._json(503, {"detail": "Servicio no disponible"})
+        elif url.path == "/preguntas-reportadas":
+            self._preguntas_reportadas(params)
+        elif url.path == "/preguntas-reportadas/cambios" and self.server.opciones.get("cambios", True):
+            self._cambios_reportes(params)
+        elif url.path == "/exportar-preguntas":
+            self._exportar_preguntas(params)
+        elif url.path.startswith("/documentos/") and self.server.opciones.get("consulta_hash", True):
+            documento = self.server.documentos.get(url.path.split("/")[2])
+            if documento is None:
+                self._json(404, {"detail": "Documento desconocido"})
+            else:
+                self._json(200, documento)
+        elif url.path.startswith("/cargas-pdf/"):
+            carga = self.server.cargas.get(url.path.split("/")[2])
+            if carga is None:
+                self._json(404, {"detail": "Carga desconocida"})
+            else:
+                self._json(200, {"recibido": carga["recibido"], "tamano": carga["tamano"]})
+        elif url.path == "/capacidades":
+            self._json(200, self._capacidades())
+        else:
+            self._json(404, {"detail": "No encontrado"})
+
+    def _cambios_reportes(self, params):
+        """Consulta larga: responde en cuanto hay cambios después de `desde` o al pasar `espera` segundos."""
+        espera = min(float(params.get("espera", 25)), 60)
+        limite = time.monotonic() + espera
+        with self.server.lock:
+            if "desde" in params:
+                desde = int(params["desde"])
+                while len(self.server.cambios) <= desde and time.monotonic() < limite:
+                    self.server.hay_cambios.wait(limite - time.monotonic())
+            else:
+                desde = len(self.server.cambios)
+            cursor = len(self.server.cambios)
+            ids = set(self.server.cambios[desde:cursor])
+            filas = [dict(r) for r in self.server.reportes if r["id"] in ids] if ids else []
+        self._json(200, {"cambios": filas, "cursor": cursor})
+
+    def _preguntas_reportadas(self, params):
+        time.sleep(self.server.opciones.get("latencia", 0))
+        estado = params.get("estado")
+        with self.server.lock:
+            if estado:
+                version = self.server.versiones.get(estado, 0)
+            else:
+                version = sum(self.server.versiones.values())
+            etag = f'"{estado or "todos"}-{version}"'
+            if self.server.opciones.get("etag", True) and self.headers.get("If-None-Match") == etag:
+                filas = None
+            else:
+                # Como en el contrato, los items no traen su estado (sí en /preguntas-reportadas/cambios)
+                filas = [{k: v for k, v in r.items() if k != "estado"}
+                         for r in self.server.reportes if not estado or r["estado"] == estado]
+        if filas is None:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        cabeceras = {"ETag": etag} if self.server.opciones.get("etag", True) else None
+        filas.sort(key=lambda r: r["fecha"], reverse=params.get("orden", "-fecha").startswith("-"))
+
+        # Sin "limit" se responde como el backend original: la lista completa
+        if "limit" not in params:
+            self._json(200, filas, cabeceras)
+            return
+        limite = max(1, min(int(params["limit"]), 1000))
+        offset = max(0, int(params.get("offset", 0)))
+        pagina = filas[offset:offset + limite]
+        siguiente = offset + limite if offset + limite < len(filas) else None
+        self._json(200, {"items": pagina, "total": len(filas), "offset": offset, "siguiente": siguiente}, cabeceras)
+
+    def do_PUT(self):
+        url = urlsplit(self.path)
+        params = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+        carga = self.server.cargas.get(url.path.split("/")[2]) if url.path.startswith("/cargas-pdf/") else None
+        if carga is None:
+            self._leer_cuerpo()
+            self._json(404, {"detail": "Carga desconocida"})
+            return
+        offset = int(params.get("offset", -1))
+        if offset != carga["recibido"]:
+            self._consumir_cuerpo()
+            self._json(409, {"detail": "Offset inesperado", "recibido": carga["recibido"]})
+            return
+        leidos, _ = self._consumir_cuerpo()
+        # Solo se confirma lo que llegó completo; una parte cortada se vuelve a pedir
+        if leidos == int(self.headers.get("Content-Length") or 0):
+            carga["recibido"] = min(carga["tamano"], carga["recibido"] + leidos)
+        self._json(200, {"recibido": carga["recibido"]})
+
+    def _exportar_preguntas(self, params):
+        time.sleep(self.server.opciones.get("latencia", 0))
+        estado = params.get("estado")
+        with self.server.lock:
+            filas = [dict(r) for r in self.server.reportes if not estado or r["estado"] == estado]
+        cuerpo = generar_xlsx(filas)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        ancho_banda = self.server.opciones.get("ancho_banda", 0) * 1e6
+        bloque = 64 * 1024
+        for i in range(0, len(cuerpo), bloque):
+            self.wfile.write(cuerpo[i:i + bloque])
+            if ancho_banda:
+                time.sleep(bloque / ancho_banda)
+
+    def _capacidades(self):
+        opciones = self.server.opciones
+        capacidades = {
+            "acciones_lote": bool(opciones.get("lotes", True)),
+            "respuestas_lote": bool(opciones.get("lotes", True)),
+            "reportes_lote": bool(opciones.get("lotes", True)),
+            "cambios_reportes": bool(opciones.get("cambios", True)),
+        }
+        if opciones.get("partes", True):
+            capacidades["carga_por_partes"] = True
+        if opciones.get("consulta_hash", True):
+            capacidades["consulta_hash"] = True
+        return capacidades
+
+    def _crear_carga(self, datos):
+        carga_id = uuid.uuid4().hex
+        self.server.cargas[carga_id] = {
+            "nombre": datos.get("nombre", "documento.pdf"),
+            "tamano": int(datos.get("tamano", 0)),
+            "recibido": 0,
+            "sha256": datos.get("sha256"),
+        }
+        self._json(200, {"id": carga_id, "recibido": 0, "tam_parte": self.server.opciones.get("tam_parte")})
+
+    def _completar_carga(self, carga_id):
+        carga = self.server.cargas.get(carga_id)
+        if carga is None:
+            self._json(404, {"detail": "Carga desconocida"})
+        elif carga["recibido"] < carga["tamano"]:
+            self._json(409, {"detail": "Carga incompleta", "recibido": carga["recibido"]})
+        else:
+            self._cargar_documento(carga["tamano"], f'filename="{carga["nombre"]}"'.encode("utf-8"), carga["sha256"])
+            self.server.cargas.pop(carga_id, None)
+
+    def _registrar_reportes(self, reportes):
+        """Agrega los reportes como preguntas "reportada"; devuelve los fallidos del lote.
+
+        Un id_cliente ya recibido no se vuelve a agregar (reintento del cliente).
+        """
+        fallidos = []
+        with self.server.lock:
+            for datos in reportes:
+                id_cliente = datos.get("id_cliente")
+                if not datos.get("pregunta"):
+                    fallidos.append({"id_cliente": id_cliente, "detalle": "Falta la pregunta"})
+                    continue
+                if id_cliente and id_cliente in self.server.reportes_recibidos:
+                    continue
+                self.server.reportes_recibidos.add(id_cliente)
+                self.server.ultimo_id += 1
+                self.server.reportes.append({
+                    "id": self.server.ultimo_id,
+                    "pregunta": datos["pregunta"],
+                    "respuesta": datos.get("respuesta", ""),
+                    "fecha": datetime.now().isoformat(timespec="seconds"),
+                    "estado": "reportada",
+                    "respuesta_experto": "",
+                })
+                registrar_cambio(self.server, self.server.ultimo_id, "reportada")
+        return fallidos
+
+    def _accion_reporte_lote(self, nuevo_estado, datos):
+        time.sleep(self.server.opciones.get("latencia", 0))
+        ids = set(datos.get("ids", []))
+        with self.server.lock:
+            for reporte in self.server.reportes:
+                if reporte["id"] in ids:
+                    registrar_cambio(self.server, reporte["id"], reporte["estado"], nuevo_estado)
+                    reporte["estado"] = nuevo_estado
+                    ids.discard(reporte["id"])
+        fallidos = [{"id": rid, "detalle": "No existe la pregunta"} for rid in sorted(ids)]
+        self._json(200, {"fallidos": fallidos})
+
+    def _respuestas_lote(self, datos):
+        respuestas = {r.get("id"): r.get("respuesta_experto", "") for r in datos.get("respuestas", [])}
+        with self.server.lock:
+            for reporte in self.server.reportes:
+                if reporte["id"] in respuestas:
+                    registrar_cambio(self.server, reporte["id"], reporte["estado"])
+                    reporte["respuesta_experto"] = respuestas.pop(reporte["id"])
+        fallidos = [{"id": rid, "detalle": "No existe la pregunta"} for rid in respuestas]
+        self._json(200, {"fallidos": fallidos})
+
+    def _accion_reporte(self, nuevo_estado, datos):
+        time.sleep(self.server.opciones.get("latencia", 0))
+        with self.server.lock:
+            for reporte in self.server.reportes:
+                if reporte["id"] == datos.get("id"):
+                    registrar_cambio(self.server, reporte["id"], reporte["estado"], nuevo_estado)
+                    reporte["estado"] = nuevo_estado
+                    break
+            else:
+                reporte = None
+        if reporte is None:
+            self._json(404, {"detail": f"No existe la pregunta {datos.get('id')}"})
+        else:
+            self._json(200, {"mensaje": "Actualizado", "id": reporte["id"], "estado": nuevo_estado})
+
+    def _cargar_documento(self, largo, cuerpo, sha256=None):
+        opciones = self.server.opciones
+        nombre = re.search(rb'filename="([^"]*)"', cuerpo)
+        nombre = nombre.group(1).decode("utf-8", "replace") if nombre else "documento.pdf"
+        time.sleep(opciones.get("retardo_carga", 0.2))
+        if random.random() < opciones.get("fallo_carga", 0.0):
+            self._json(503, {"detail": "Servicio de ingesta ocupado"})
+            return
+        sha256 = sha256 or self.headers.get("X-Contenido-SHA256")
+        if sha256:
+            self.server.documentos[sha256] = {"nombre": nombre, "tamano": largo}
+        self._json(200, {"mensaje": f"Documento {nombre} cargado ({largo} bytes)."})
+
+    def _preguntar(self, datos):
+        opciones = self.server.opciones
+        capacidad = opciones.get("capacidad", 0)
+        with self.server.lock:
+            if capacidad and self.server.preguntas_en_curso >= capacidad:
+                ocupado = True
+            else:
+                ocupado = False
+                self.server.preguntas_en_curso += 1
+                self.server.preguntas_atendidas += 1
+        if ocupado:
+            self._json(503, {"detail": "Réplica ocupada"})
+            return
+        try:
+            time.sleep(opciones.get("retardo_pregunta", 0.0))
+            self._responder_pregunta(datos)
+        finally:
+            with self.server.lock:
+                self.server.preguntas_en_curso -= 1
+
+    def _responder_pregunta(self, datos):
+        opciones = self.server.opciones
+        pregunta = datos.get("pregunta", "")
+        tokens = tokens_respuesta(opciones.get("tokens"))
+        acepta_sse = "text/event-stream" in self.headers.get("Accept", "")
+
+        if not acepta_sse or not opciones.get("streaming", True):
+            time.sleep(opciones.get("retardo_token", 0.05) * len(tokens))
+            self._json(200, {"respuesta": "".join(tokens), "pregunta": pregunta})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            time.sleep(opciones.get("retardo_token", 0.05))
+            evento = json.dumps({"token": token}, ensure_ascii=False)
+            self._chunk(f"data: {evento}\n\n".encode("utf-8"))
+        self._chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def crear_servidor(puerto=8000, host="127.0.0.1", **opciones):
+    """Crea (sin arrancar) un servidor simulado; útil para scripts y pruebas."""
+    servidor = ThreadingHTTPServer((host, puerto), MockHandler)
+    servidor.daemon_threads = True
+    servidor.opciones = opciones
+    servidor.lock = threading.Lock()
+    servidor.reportes = generar_reportes(opciones.get("reportes", 200), opciones.get("largo_texto", 0))
+    servidor.versiones = {}
+    servidor.cambios = []
+    servidor.hay_cambios = threading.Condition(servidor.lock)
+    servidor.reportes_recibidos = set()
+    servidor.ultimo_id = max((r["id"] for r in servidor.reportes), default=0)
+    servidor.cargas = {}
+    servidor.documentos = {}
+    servidor.preguntas_en_curso = 0
+    servidor.preguntas_atendidas = 0
+    servidor.fallos_503 = opciones.get("fallos_503", 0)
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor simulado de BoxIA")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--retardo-token", type=float, default=0.05,
+                        help="segundos entre tokens de /preguntar")
+    parser.add_argument("--retardo-pregunta", type=float, default=0.0,
+                        help="segundos antes de empezar a responder /preguntar (réplica lenta u ocupada)")
+    parser.add_argument("--capacidad", type=int, default=0,
+                        help="preguntas simultáneas que atiende; las demás reciben 503 (0 = sin límite)")
+    parser.add_argument("--fallos-503", type=int, default=0,
+                        help="responder 503 a las primeras N consultas GET (prueba de reintentos)")
+    parser.add_argument("--sin-streaming", action="store_true",
+                        help="responder siempre con JSON completo")
+    parser.add_argument("--latencia", type=float, default=0.0,
+                        help="segundos de espera extra en las respuestas sobre reportes (lista, acciones, exportación)")
+    parser.add_argument("--sin-lotes", action="store_true",
+                        help="no anunciar ni aceptar los endpoints de acciones, respuestas y reportes por lote")
+    parser.add_argument("--sin-etag", action="store_true",
+                        help="no enviar ETag en /preguntas-reportadas ni responder 304")
+    parser.add_argument("--sin-cambios", action="store_true",
+                        help="no anunciar ni responder /preguntas-reportadas/cambios (consulta larga)")
+    parser.add_argument("--eventos", type=float, default=0.0,
+                        help="segundos promedio entre reportes nuevos o cambios de estado simulados (0 = ninguno)")
+    parser.add_argument("--retardo-carga", type=float, default=0.2,
+                        help="segundos que tarda en procesarse cada PDF subido")
+    parser.add_argument("--fallo-carga", type=float, default=0.0,
+                        help="probabilidad (0-1) de responder 503 a una carga de PDF")
+    parser.add_argument("--ancho-banda", type=float, default=0.0,
+                        help="MB/s máximos al recibir PDFs y al enviar exportaciones (0 = sin límite)")
+    parser.add_argument("--sin-partes", action="store_true",
+                        help="no anunciar ni aceptar la carga de PDFs por partes")
+    parser.add_argument("--sin-consulta-hash", action="store_true",
+                        help="no anunciar ni responder GET /documentos/<sha256>")
+    parser.add_argument("--reportes", type=int, default=200,
+                        help="cantidad de preguntas reportadas simuladas")
+    parser.add_argument("--largo-texto", type=int, default=0,
+                        help="caracteres de relleno en la pregunta y respuesta de cada reporte")
+    parser.add_argument("--tokens", type=int, default=0,
+                        help="tokens de cada respuesta de /preguntar (0 = la frase fija)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    servidor = crear_servidor(
+        args.puerto, args.host,
+        retardo_token=args.retardo_token,
+        retardo_pregunta=args.retardo_pregunta,
+        capacidad=args.capacidad,
+        fallos_503=args.fallos_503,
+        streaming=not args.sin_streaming,
+        reportes=args.reportes,
+        largo_texto=args.largo_texto,
+        tokens=args.tokens,
+        latencia=args.latencia,
+        lotes=not args.sin_lotes,
+        etag=not args.sin_etag,
+        cambios=not args.sin_cambios,
+        retardo_carga=args.retardo_carga,
+        fallo_carga=args.fallo_carga,
+        ancho_banda=args.ancho_banda,
+        partes=not args.sin_partes,
+        consulta_hash=not args.sin_consulta_hash,
+        verbose=args.verbose,
+    )
+    if args.eventos > 0:
+        threading.Thread(target=simular_eventos, args=(servidor, args.eventos), daemon=True).start()
+    print(f"Servidor simulado en http://{args.host}:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Lectura y validación local de la planilla de respuestas del experto.
+
+El Excel que se exporta desde la gestión de reportes vuelve con la columna
+"respuesta_experto" completada. Antes de enviarlo se lee aquí (openpyxl en
+modo solo lectura, fila a fila) y se compara con las preguntas cargadas en
+la tabla, para mandar solo las respuestas que cambiaron.
+"""
+import os
+
+# Nombres aceptados en la fila de títulos (se comparan sin mayúsculas, espacios ni guiones)
+COLUMNA_ID = "id"
+COLUMNAS_RESPUESTA = {"respuestaexperto", "respuestadelexperto"}
+
+# Cuántos ejemplos de cada problema se muestran al experto
+MAX_EJEMPLOS = 10
+
+
+class ErrorExcel(Exception):
+    pass
+
+
+def soporta_lectura_local(path):
+    """Solo los .xlsx se leen localmente; el resto se sube entero como antes."""
+    if not path.lower().endswith((".xlsx", ".xlsm")):
+        return False
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _normalizar_titulo(valor):
+    return "".join(c for c in str(valor or "").casefold() if c.isalnum())
+
+
+def _leer_id(valor):
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    if isinstance(valor, str) and valor.strip().isdigit():
+        return int(valor.strip())
+    return None
+
+
+def comparar_respuestas(path, actuales):
+    """Compara la planilla con `actuales` ({id: respuesta_experto}) y devuelve un resumen.
+
+    El resumen es un dict con:
+      cambios: [(id, respuesta)] a enviar
+      sin_cambios, vacias: cantidades de filas que no hace falta enviar
+      desconocidos: ids que no están entre las preguntas cargadas
+      invalidas: [(fila, valor)] con un ID que no es un número
+      duplicados: ids que aparecen más de una vez (se usa la última)
+    Lanza ErrorExcel si el archivo no tiene las columnas esperadas.
+    """
+    from openpyxl import load_workbook
+
+    try:
+        libro = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise ErrorExcel(f"No se pudo leer {os.path.basename(path)}: {e}") from e
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        titulos = [_normalizar_titulo(t) for t in next(filas, ())]
+        if COLUMNA_ID not in titulos:
+            raise ErrorExcel("La primera fila no tiene una columna \"id\".")
+        col_respuesta = next((i for i, t in enumerate(titulos) if t in COLUMNAS_RESPUESTA), None)
+        if col_respuesta is None:
+            raise ErrorExcel("La primera fila no tiene una columna \"respuesta_experto\".")
+        col_id = titulos.index(COLUMNA_ID)
+
+        respuestas = {}
+        duplicados, invalidas = [], []
+        for numero, fila in enumerate(filas, start=2):
+            valor_id = fila[col_id] if col_id < len(fila) else None
+            respuesta = fila[col_respuesta] if col_respuesta < len(fila) else None
+            if valor_id is None and respuesta is None:
+                continue
+            report_id = _leer_id(valor_id)
+            if report_id is None:
+                invalidas.append((numero, valor_id))
+                continue
+            if report_id in respuestas:
+                duplicados.append(report_id)
+            respuestas[report_id] = "" if respuesta is None else str(respuesta).strip()
+    finally:
+        libro.close()
+
+    resumen = {"cambios": [], "sin_cambios": 0, "vacias": 0, "desconocidos": [],
+               "invalidas": invalidas, "duplicados": duplicados}
+    for report_id, respuesta in respuestas.items():
+        if report_id not in actuales:
+            resumen["desconocidos"].append(report_id)
+        elif not respuesta:
+            resumen["vacias"] += 1
+        elif respuesta == (actuales[report_id] or "").strip():
+            resumen["sin_cambios"] += 1
+        else:
+            resumen["cambios"].append((report_id, respuesta))
+    return resumen
+
+
+def describir_resumen(resumen):
+    """Texto para el experto con lo que se va a enviar y los problemas encontrados."""
+    lineas = [
+        f"Respuestas nuevas o modificadas: {len(resumen['cambios'])}",
+        f"Sin cambios: {resumen['sin_cambios']}",
+        f"Sin respuesta: {resumen['vacias']}",
+    ]
+    problemas = [
+        ("IDs que no están en la lista cargada", resumen["desconocidos"]),
+        ("IDs repetidos (se usa la última fila)", resumen["duplicados"]),
+        ("Filas con un ID que no es un número",
+         [f"fila {numero} ({valor!r})" for numero, valor in resumen["invalidas"]]),
+    ]
+    for titulo, ejemplos in problemas:
+        if ejemplos:
+            muestra = ", ".join(str(e) for e in ejemplos[:MAX_EJEMPLOS])
+            if len(ejemplos) > MAX_EJEMPLOS:
+                muestra += ", ..."
+            lineas.append(f"{titulo}: {len(ejemplos)} ({muestra})")
+    return "\n".join(lineas)
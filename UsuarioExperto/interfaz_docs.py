@@ -1,20 +1,43 @@
+import os
 import sys
-import requests
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QFileDialog
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog,
+    QTableView, QHeaderView, QAbstractItemView, QProgressBar, QSpinBox, QCheckBox
 )
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
-from manage_reports import ReportsUI  # Importa la ventana de gestión
+from PyQt6.QtCore import Qt, QTimer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Comun"))
+from api_client import get_client
+from startup import report_first_window
+from diagnostics import medir_ui
+from diagnostics_panel import install_diagnostics_shortcut
+from upload_manifest import UploadManifest
+from upload_queue import (
+    UploadQueue, UploadQueueModel, ProgressDelegate, buscar_pdfs, formatear_tamano,
+    CONCURRENCIA_CARGA, MAX_CONCURRENCIA_CARGA,
+)
+
+# Cada cuánto (ms) se refresca el rendimiento mientras hay cargas en curso
+INTERVALO_ESTADISTICAS = 500
 
 class UploadUI(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Carga de Documentos - BOX IA")
-        self.setGeometry(100, 100, 500, 300)
-        self.selected_file = None
+        self.setGeometry(100, 100, 820, 560)
+        self.api = get_client()
+        self.queue_model = UploadQueueModel(self)
+        self.manifest = UploadManifest(self.api.base_url)
+        self.queue = UploadQueue(self.api, self.queue_model, self.manifest, CONCURRENCIA_CARGA, self)
+        self.queue.cambio.connect(self.update_stats)
+        self.queue.terminado.connect(self.on_queue_finished)
+        self._stats_timer = QTimer(self)
+        self._stats_timer.setInterval(INTERVALO_ESTADISTICAS)
+        self._stats_timer.timeout.connect(self.update_stats)
         self.init_ui()
         self.apply_styles()
+        install_diagnostics_shortcut(self)
 
     def apply_styles(self):
         self.setStyleSheet("""
@@ -38,6 +61,24 @@ class UploadUI(QWidget):
             QPushButton:hover {
                 background-color: #3a3a3a;
             }
+            QTableView {
+                background-color: #2a2a2a;
+                color: white;
+                gridline-color: #444;
+                border: none;
+            }
+            QHeaderView::section {
+                background-color: #3a3a3a;
+                color: white;
+                padding: 6px;
+                border: none;
+            }
+            QSpinBox {
+                background-color: #2a2a2a;
+                color: white;
+                padding: 4px;
+                border-radius: 6px;
+            }
             QPushButton#uploadButton {
                 background-color: #00BFFF;
                 color: white;
@@ -65,60 +106,165 @@ class UploadUI(QWidget):
         btn_manage.clicked.connect(self.open_reports_window)
         layout.addWidget(btn_manage)
 
-        # Botón de selección de archivo
-        btn_select = QPushButton("🗂️ Seleccionar archivo")
-        btn_select.clicked.connect(self.select_file)
-        layout.addWidget(btn_select)
+        # Selección de archivos: varios PDF sueltos o una carpeta completa
+        select_layout = QHBoxLayout()
+        btn_select = QPushButton("🗂️ Seleccionar archivos")
+        btn_select.clicked.connect(self.select_files)
+        btn_folder = QPushButton("📁 Agregar carpeta")
+        btn_folder.clicked.connect(self.select_folder)
+        btn_clear = QPushButton("🧹 Quitar cargados")
+        btn_clear.clicked.connect(self.clear_finished)
+        for btn in (btn_select, btn_folder, btn_clear):
+            select_layout.addWidget(btn)
+        layout.addLayout(select_layout)
+
+        # Contenido ya cargado antes (misma huella SHA-256): omitirlo o subirlo con aviso
+        self.skip_duplicates_check = QCheckBox("Omitir documentos ya cargados")
+        self.skip_duplicates_check.setChecked(self.queue.omitir_duplicados)
+        self.skip_duplicates_check.toggled.connect(self.queue.set_omitir_duplicados)
+        layout.addWidget(self.skip_duplicates_check)
+
+        # Cola de carga: un archivo por fila con su estado y progreso
+        self.queue_view = QTableView()
+        self.queue_view.setModel(self.queue_model)
+        self.queue_view.verticalHeader().setVisible(False)
+        self.queue_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.queue_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.queue_view.setWordWrap(False)
+        self.queue_view.setItemDelegateForColumn(3, ProgressDelegate(self.queue_view))
+        header = self.queue_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setStretchLastSection(True)
+        for col, ancho in enumerate((240, 80, 150, 110, 70)):
+            self.queue_view.setColumnWidth(col, ancho)
+        layout.addWidget(self.queue_view)
+
+        self.total_progress = QProgressBar()
+        self.total_progress.setRange(0, 1000)
+        self.total_progress.setValue(0)
+        layout.addWidget(self.total_progress)
+        self.stats_label = QLabel("")
+        self.stats_label.setStyleSheet("color: #aaaaaa;")
+        layout.addWidget(self.stats_label)
+
+        upload_layout = QHBoxLayout()
+        upload_layout.addWidget(QLabel("Cargas simultáneas:"))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, MAX_CONCURRENCIA_CARGA)
+        self.concurrency_spin.setValue(self.queue.concurrencia)
+        self.concurrency_spin.valueChanged.connect(self.queue.set_concurrencia)
+        upload_layout.addWidget(self.concurrency_spin)
 
         # Botón de subida
         btn_upload = QPushButton("📤 Subir a la IA")
         btn_upload.setObjectName("uploadButton")
-        btn_upload.clicked.connect(self.upload_file)
-        layout.addWidget(btn_upload)
+        btn_upload.clicked.connect(self.upload_files)
+        upload_layout.addWidget(btn_upload, 1)
+
+        btn_stop = QPushButton("⏹️ Detener")
+        btn_stop.clicked.connect(self.stop_upload)
+        upload_layout.addWidget(btn_stop)
+        self.retry_button = QPushButton("🔁 Reintentar fallidos")
+        self.retry_button.clicked.connect(self.retry_failed)
+        upload_layout.addWidget(self.retry_button)
+        layout.addLayout(upload_layout)
 
         self.setLayout(layout)
+        self.update_stats()
 
     def open_reports_window(self):
+        # La ventana de gestión se importa al abrirla por primera vez, no al iniciar
+        from manage_reports import ReportsUI
+
         self.reports_window = ReportsUI()
         self.reports_window.show()
 
-    def select_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(
+    def select_files(self):
+        rutas, _ = QFileDialog.getOpenFileNames(
             self,
-            "Seleccionar archivo",
+            "Seleccionar archivos",
             "",
             "Archivos PDF (*.pdf)"
         )
-        if file_path:
-            self.selected_file = file_path
-            self.status_label.setText(f"📁 Archivo seleccionado: {file_path}")
-        else:
-            self.status_label.setText("❌ No se seleccionó ningún archivo.")
+        self.add_to_queue([r for r in rutas if r.lower().endswith(".pdf")])
+
+    def select_folder(self):
+        carpeta = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta con PDFs")
+        if carpeta:
+            self.add_to_queue(buscar_pdfs(carpeta))
 
-    def upload_file(self):
-        if not self.selected_file:
-            self.status_label.setText("❗ Primero selecciona un archivo.")
+    def add_to_queue(self, rutas):
+        if not rutas:
+            self.status_label.setText("❌ No se seleccionó ningún archivo PDF.")
             return
+        with medir_ui("carga.agregar_archivos", archivos=len(rutas)):
+            agregados = self.queue.agregar(rutas)
+        repetidos = len(rutas) - agregados
+        texto = f"📁 {agregados} archivo(s) agregados a la cola."
+        if repetidos:
+            texto += f" {repetidos} ya estaban en la lista."
+        self.status_label.setText(texto)
+        self.update_stats()
+        # Si la cola ya está subiendo, los nuevos entran en la misma tanda
+        if self.queue.en_marcha():
+            self.queue.iniciar()
 
-        if not self.selected_file.lower().endswith(".pdf"):
-            self.status_label.setText("❌ Solo se permiten archivos PDF.")
+    def upload_files(self):
+        if self.queue_model.rowCount() == 0:
+            self.status_label.setText("❗ Primero selecciona uno o más archivos.")
             return
+        if not self.queue.iniciar():
+            self.status_label.setText("ℹ️ No hay archivos pendientes en la cola.")
+            return
+        self.status_label.setText("📤 Subiendo documentos...")
+        self._stats_timer.start()
+
+    def stop_upload(self):
+        # on_queue_finished informa cuántos quedaron pendientes
+        self.queue.detener()
+
+    def retry_failed(self):
+        if self.queue.reintentar_fallidos():
+            self.status_label.setText("🔁 Reintentando archivos con error...")
+            self._stats_timer.start()
+        else:
+            self.status_label.setText("ℹ️ No hay archivos con error.")
+
+    def clear_finished(self):
+        self.queue_model.clear_finished()
+        self.update_stats()
 
-        try:
-            endpoint = "http://localhost:8000/cargar-documento-pdf"
-            with open(self.selected_file, "rb") as f:
-                files = {"archivo": f}
-                r = requests.post(endpoint, files=files)
+    def update_stats(self):
+        archivos, cargados, errores, omitidos, bytes_totales, bytes_cargados = self.queue_model.totales()
+        self.total_progress.setValue(int(1000 * bytes_cargados / bytes_totales) if bytes_totales else 0)
+        mb_s, docs_min = self.queue.rendimiento()
+        texto = (f"{cargados} de {archivos} documentos · "
+                 f"{formatear_tamano(bytes_cargados)} de {formatear_tamano(bytes_totales)} · "
+                 f"{mb_s:.2f} MB/s · {docs_min:.1f} docs/min")
+        if omitidos:
+            texto += f" · {omitidos} ya cargados (omitidos)"
+        if errores:
+            texto += f" · {errores} con error"
+        self.stats_label.setText(texto)
+        self.retry_button.setEnabled(errores > 0)
 
-            if r.status_code == 200:
-                self.status_label.setText("✅ Documento cargado correctamente.")
-            else:
-                self.status_label.setText("❌ Error al cargar el documento.")
-        except Exception as e:
-            self.status_label.setText(f"⚠️ Error: {e}")
+    def on_queue_finished(self):
+        self._stats_timer.stop()
+        self.update_stats()
+        archivos, cargados, errores, omitidos, _, _ = self.queue_model.totales()
+        pendientes = archivos - cargados - errores - omitidos
+        if pendientes:
+            self.status_label.setText(f"⏹️ Carga detenida: {cargados} cargados, {pendientes} pendientes.")
+        elif errores:
+            self.status_label.setText(f"⚠️ Carga terminada: {cargados} cargados, {errores} con error.")
+        elif omitidos:
+            self.status_label.setText(f"✅ {cargados} cargados; {omitidos} ya estaban cargados y se omitieron.")
+        else:
+            self.status_label.setText("✅ Documentos cargados correctamente.")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = UploadUI()
     window.show()
+    report_first_window(app)
     sys.exit(app.exec())
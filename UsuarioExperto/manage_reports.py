@@ -1,22 +1,80 @@
-import sys, os, requests
-from datetime import datetime
+import sys, os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QTableWidget, QTableWidgetItem,
-    QFileDialog, QMessageBox, QAbstractItemView, QComboBox, QHeaderView
+    QPushButton, QLabel, QTableView, QProgressBar, QCheckBox,
+    QFileDialog, QMessageBox, QAbstractItemView, QComboBox, QHeaderView, QLineEdit, QDateEdit
 )
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
-
-API_BASE = "http://localhost:8000"
+from PyQt6.QtCore import Qt, QDate, QEvent, QTimer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Comun"))
+from api_client import get_client
+from startup import report_first_window
+from diagnostics import medir_ui
+from diagnostics_panel import install_diagnostics_shortcut
+from workers import Worker, start
+from reports_model import ReportsModel, ReportActionsDelegate
+from reports_filter import ReportsFilterModel
+from reports_live import LiveUpdates
+from expert_answers import ErrorExcel, comparar_respuestas, describir_resumen, soporta_lectura_local
+
+# Filas por página de /preguntas-reportadas
+TAM_PAGINA = 200
+
+# Actualización en vivo de la tabla (ver reports_live); BOXIA_REPORTES_EN_VIVO=0 la apaga al abrir
+EN_VIVO = os.environ.get("BOXIA_REPORTES_EN_VIVO", "1") != "0"
+
+# Tiempo (ms) que se muestra un aviso de acción antes de ocultarse
+DURACION_AVISO_MS = 4000
+
+# Endpoint por id de cada acción sobre reportes (por fila y masivas) y tamaño de lote / concurrencia
+RUTAS_ACCION = {
+    "revisar": "/marcar-revisado",
+    "eliminar_postgres": "/eliminar-pregunta",
+    "eliminar_chroma": "/eliminar-de-chroma",
+    "reactivar": "/reactivar-pregunta",
+}
+TAM_LOTE = 100
+CONCURRENCIA_LOTE = 8
+
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Descarga de la exportación: bloques de red de 64 KB (cada uno es un punto de
+# cancelación), escritos a disco con un búfer de 1 MB, y aviso de progreso
+# como máximo cada 0,1 s
+TAM_BLOQUE_DESCARGA = 64 * 1024
+BUFFER_ESCRITURA = 1024 * 1024
+INTERVALO_PROGRESO_DESCARGA = 0.1
+
+# Alto fijo de fila: el texto largo se recorta y se ve completo en el tooltip
+ALTO_FILA = 34
+
+# Fecha mínima de los selectores de rango: mostrarla significa "sin límite"
+FECHA_SIN_LIMITE = QDate(2000, 1, 1)
+ANCHOS_COLUMNA = {"id": 60, "pregunta": 280, "respuesta": 280, "fecha": 150, "respuesta_experto": 220}
 
 class ReportsUI(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("BoxIA - Gestión de Preguntas Reportadas")
         self.resize(950, 550)
+        self.api = get_client()
+        self._generacion = 0
+        # Por estado: ETag de la página 0 y, para los que no se están viendo, las filas
+        # cargadas (filas, hay_mas, total, indice). Ver load_reports.
+        self._cache = {}
+        self._prefetching = set()
+        self.live = LiveUpdates(
+            self.api, lambda: self.model.estado,
+            lambda estado, etag: fetch_reports_page(None, self.api, estado, 0, TAM_PAGINA, etag), self)
+        self.live.cambios.connect(self.on_live_changes)
+        self.live.pagina.connect(self.on_live_page)
         self.init_ui()
         self.apply_styles()
+        install_diagnostics_shortcut(self)
 
     def apply_styles(self):
         self.setStyleSheet("""
@@ -25,7 +83,7 @@ class ReportsUI(QWidget):
                 color: white;
                 font-family: 'Segoe UI', sans-serif;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #2a2a2a;
                 color: white;
                 gridline-color: #444;
@@ -65,18 +123,93 @@ class ReportsUI(QWidget):
         self.status_filter = QComboBox()
         self.status_filter.addItems(["Reportada", "Revisada", "Eliminada"])
         self.status_filter.currentIndexChanged.connect(self.load_reports)
-        layout.addWidget(self.status_filter)
-
-        self.table = QTableWidget(0, 5)
-        self.table.setHorizontalHeaderLabels(["ID", "Pregunta", "Respuesta", "Fecha", "Acción"])
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.status_filter, 1)
+        self.live_check = QCheckBox("🟢 En vivo")
+        self.live_check.setToolTip("Agrega y actualiza las filas a medida que cambian en el servidor")
+        self.live_check.setChecked(EN_VIVO)
+        self.live_check.toggled.connect(self.live.set_enabled)
+        self.live.consultado.connect(self.live_check.setToolTip)
+        filter_layout.addWidget(self.live_check)
+        layout.addLayout(filter_layout)
+
+        # Búsqueda y rango de fechas sobre las filas ya cargadas, sin consultar al servidor
+        search_layout = QHBoxLayout()
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("🔎 Buscar en pregunta, respuesta o ID...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.apply_filter)
+        search_layout.addWidget(self.search_box, 1)
+        self.date_from = QDateEdit()
+        self.date_to = QDateEdit()
+        for texto, selector in (("Desde", self.date_from), ("Hasta", self.date_to)):
+            selector.setCalendarPopup(True)
+            selector.setDisplayFormat("yyyy-MM-dd")
+            selector.setMinimumDate(FECHA_SIN_LIMITE)
+            selector.setSpecialValueText("sin límite")
+            selector.setDate(FECHA_SIN_LIMITE)
+            selector.dateChanged.connect(self.apply_filter)
+            search_layout.addWidget(QLabel(texto))
+            search_layout.addWidget(selector)
+        layout.addLayout(search_layout)
+
+        self.model = ReportsModel(self)
+        self.model.fetch_requested.connect(self.fetch_page)
+        self.proxy = ReportsFilterModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.actions_delegate = ReportActionsDelegate(self.model, self)
+        self.actions_delegate.accion.connect(self.on_row_action)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(ALTO_FILA)
         self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.table.setWordWrap(True)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.setWordWrap(False)
+        self.table.setTextElideMode(Qt.TextElideMode.ElideRight)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self._columnas_configuradas = None
+        self.model.modelReset.connect(self.configure_columns)
+        self.configure_columns()
         layout.addWidget(self.table)
 
+        # Acciones sobre todas las filas seleccionadas; cambian según el estado
+        self.bulk_layout = QHBoxLayout()
+        self.bulk_buttons = []
+        self._estado_bulk = None
+        self.model.modelReset.connect(self.update_bulk_buttons)
+        self.update_bulk_buttons()
+        layout.addLayout(self.bulk_layout)
+
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #aaaaaa;")
+        self.notice_label = QLabel("")
+        self.notice_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self._notice_timer = QTimer(self)
+        self._notice_timer.setSingleShot(True)
+        self._notice_timer.timeout.connect(lambda: self.notice_label.setText(""))
+        self.bulk_progress = QProgressBar()
+        self.bulk_progress.setMaximumWidth(220)
+        self.bulk_progress.hide()
+        self.export_progress = QProgressBar()
+        self.export_progress.setMaximumWidth(220)
+        self.export_progress.hide()
+        self.cancel_export_button = QPushButton("✖ Cancelar exportación")
+        self.cancel_export_button.clicked.connect(self.cancel_export)
+        self.cancel_export_button.hide()
+        self._export_worker = None
+        status_layout.addWidget(self.status_label)
+        status_layout.addWidget(self.bulk_progress)
+        status_layout.addWidget(self.export_progress)
+        status_layout.addWidget(self.cancel_export_button)
+        status_layout.addWidget(self.notice_label, 1)
+        layout.addLayout(status_layout)
+
         btn_layout = QHBoxLayout()
         for text, handler in [
             ("🔄 Cargar Lista", self.load_reports),
@@ -86,164 +219,584 @@ class ReportsUI(QWidget):
             btn = QPushButton(text)
             btn.clicked.connect(handler)
             btn_layout.addWidget(btn)
+            if handler == self.export_excel:
+                self.export_button = btn
         layout.addLayout(btn_layout)
 
         self.setLayout(layout)
 
     def load_reports(self):
-        estado = self.status_filter.currentText().lower()
-        params = {} if estado == "todas" else {"estado": estado}
+        """Muestra el estado elegido y lo revalida con el servidor.
 
-        try:
-            r = requests.get(f"{API_BASE}/preguntas-reportadas", params=params)
-            r.raise_for_status()
-            data = r.json()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo cargar: {e}")
+        Si el estado ya se había cargado (o se precargó), sus filas se muestran
+        al instante desde la caché y la página 0 se pide con If-None-Match: un
+        304 confirma lo mostrado sin volver a descargarlo.
+        """
+        estado = self.status_filter.currentText().lower()
+        # Una nueva carga invalida las páginas que sigan en camino
+        self._generacion += 1
+        entrada = self._cache.get(estado)
+        if estado != self.model.estado:
+            self._save_current_to_cache()
+            if entrada is not None and "filas" in entrada:
+                with medir_ui("reportes.desde_cache", filas=len(entrada["filas"])):
+                    self.model.set_reports(estado, entrada["filas"], entrada["hay_mas"], entrada["total"],
+                                           entrada["indice"])
+                    if self.proxy.is_active():
+                        self.apply_filter()
+                self.update_status()
+        etag = entrada.get("etag") if entrada else None
+        self.status_label.setText("⏳ Comprobando cambios..." if etag else "⏳ Cargando...")
+        self._start_page_request(estado, 0, etag)
+
+    def _save_current_to_cache(self):
+        # Solo si su página 0 llegó alguna vez: si no, no hay nada que valga la pena mostrar
+        entrada = self._cache.get(self.model.estado)
+        if entrada is not None:
+            entrada["filas"], entrada["hay_mas"], entrada["total"], entrada["indice"] = self.model.state()
+
+    def invalidate_cache(self):
+        """Las filas guardadas pueden no coincidir con el servidor: la próxima carga no será condicional."""
+        for entrada in self._cache.values():
+            entrada["etag"] = None
+
+    def prefetch_other_statuses(self, actual):
+        for i in range(self.status_filter.count()):
+            estado = self.status_filter.itemText(i).lower()
+            if estado == actual or estado in self._prefetching:
+                continue
+            entrada = self._cache.get(estado)
+            if entrada is not None and not entrada.get("etag"):
+                # Sin ETag no hay revalidación barata: se actualiza recién al elegirlo
+                continue
+            self._prefetching.add(estado)
+            worker = Worker(fetch_reports_page, self.api, estado, 0, TAM_PAGINA, entrada and entrada.get("etag"))
+            worker.signals.resultado.connect(lambda pagina, e=estado: self.on_prefetched(e, pagina))
+            # Si falla no se avisa: al elegir el estado se carga como siempre
+            worker.signals.terminado.connect(lambda e=estado: self._prefetching.discard(e))
+            start(worker)
+
+    def on_prefetched(self, estado, pagina):
+        # None es un 304: lo guardado sigue vigente. Si el estado se está viendo, manda su propia carga
+        if pagina is None or estado == self.model.estado:
             return
-
-        if not data:
-            self.table.setRowCount(0)
+        filas, hay_mas, total, etag = pagina
+        self._cache[estado] = {"etag": etag, "filas": filas, "hay_mas": hay_mas, "total": total, "indice": None}
+
+    def fetch_page(self, offset):
+        self.status_label.setText("⏳ Cargando más filas...")
+        self._start_page_request(self.model.estado, offset)
+
+    def _start_page_request(self, estado, offset, etag=None):
+        generacion = self._generacion
+        worker = Worker(fetch_reports_page, self.api, estado, offset, TAM_PAGINA, etag)
+        worker.signals.resultado.connect(
+            lambda pagina: self.on_page_loaded(generacion, estado, offset, pagina))
+        worker.signals.error.connect(lambda e: self.on_page_error(generacion, offset, e))
+        start(worker)
+
+    def on_page_loaded(self, generacion, estado, offset, pagina):
+        if generacion != self._generacion:
+            return
+        if pagina is None:
+            # 304: las filas que se muestran (desde la caché) siguen vigentes
+            self.update_status()
+            self.prefetch_other_statuses(estado)
+            return
+        filas, hay_mas, total, etag = pagina
+        # Lo que tarda la tabla en recibir la página (modelo, columnas y vista)
+        with medir_ui("reportes.llenar_tabla", filas=len(filas), offset=offset):
+            if offset == 0:
+                self.model.set_reports(estado, filas, hay_mas, total)
+            else:
+                self.model.append_reports(filas, hay_mas, total)
+            if self.proxy.is_active():
+                # Las filas nuevas ya están en el índice: se repite la búsqueda para incluirlas
+                self.apply_filter()
+        if offset == 0:
+            self._cache[estado] = {"etag": etag}
+            self.prefetch_other_statuses(estado)
+        if offset == 0 and not filas:
+            self.status_label.setText("")
             QMessageBox.information(self, "Sin datos", "No hay preguntas reportadas.")
             return
+        self.update_status()
 
-        mostrar_experto = estado in {"revisada", "eliminada"}
-        columnas = ["ID", "Pregunta", "Respuesta", "Fecha"]
-        if mostrar_experto:
-            columnas.append("Respuesta Experto")
-        columnas.append("Acción")
-
-        self.table.setColumnCount(len(columnas))
-        self.table.setHorizontalHeaderLabels(columnas)
-        self.table.clearContents()
-        self.table.setRowCount(len(data))
-
-        for i, row in enumerate(data):
-            self.table.setItem(i, 0, QTableWidgetItem(str(row["id"])))
-            self.table.setItem(i, 1, QTableWidgetItem(row["pregunta"]))
-            self.table.setItem(i, 2, QTableWidgetItem(row["respuesta"]))
-            dt = datetime.fromisoformat(row["fecha"])
-            self.table.setItem(i, 3, QTableWidgetItem(dt.strftime("%Y-%m-%d %H:%M:%S")))
-
-            col_offset = 4
-            if mostrar_experto:
-                self.table.setItem(i, col_offset, QTableWidgetItem(row.get("respuesta_experto", "")))
-                col_offset += 1
-
-            btns_layout = QHBoxLayout()
-            btns_widget = QWidget()
-
-            if estado == "reportada":
-                for icon, tooltip, handler in [
-                    ("✔️", "Marcar como revisada", self.mark_as_checked),
-                    ("🗑️", "Eliminar de PostgreSQL", self.delete_from_postgres)
-                ]:
-                    btn = QPushButton(icon)
-                    btn.setToolTip(tooltip)
-                    btn.clicked.connect(lambda _, rid=row["id"], h=handler: h(rid))
-                    btns_layout.addWidget(btn)
-
-            elif estado == "revisada":
-                for icon, tooltip, handler in [
-                    ("🗑️", "Eliminar de Chroma", self.delete_from_chroma),
-                    ("🔄", "Reactivar reporte", self.reactivate_report)
-                ]:
-                    btn = QPushButton(icon)
-                    btn.setToolTip(tooltip)
-                    btn.clicked.connect(lambda _, rid=row["id"], h=handler: h(rid))
-                    btns_layout.addWidget(btn)
-
-            elif estado == "eliminada":
-                btn = QPushButton("🔄")
-                btn.setToolTip("Reactivar reporte")
-                btn.clicked.connect(lambda _, rid=row["id"]: self.reactivate_report(rid))
-                btns_layout.addWidget(btn)
-
-            btns_layout.setContentsMargins(0, 0, 0, 0)
-            btns_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            btns_widget.setLayout(btns_layout)
-            self.table.setCellWidget(i, col_offset, btns_widget)
+    def on_page_error(self, generacion, offset, error):
+        if generacion != self._generacion:
+            return
+        self.model.fetch_failed()
+        self.update_status()
+        QMessageBox.critical(self, "Error", f"No se pudo cargar: {error}")
+
+    def on_live_changes(self, cambios):
+        with medir_ui("reportes.cambios_en_vivo", filas=len(cambios)):
+            cambiadas = self.model.merge_changes(cambios)
+            if cambiadas and self.proxy.is_active():
+                self.apply_filter()
+        self._avisar_cambios(cambiadas)
+
+    def on_live_page(self, estado, filas, hay_mas):
+        # Sin el endpoint de cambios: la primera página vuelta a pedir también dice qué se quitó
+        with medir_ui("reportes.cambios_en_vivo", filas=len(filas)):
+            cambiadas = self.model.merge_first_page(estado, filas, hay_mas)
+            if cambiadas and self.proxy.is_active():
+                self.apply_filter()
+        self._avisar_cambios(cambiadas)
+
+    def _avisar_cambios(self, cambiadas):
+        if not cambiadas:
+            return
+        self.update_status()
+        self.notify(f"🆕 {cambiadas} {'cambio' if cambiadas == 1 else 'cambios'} en la lista")
+
+    # La actualización en vivo no consulta con la ventana minimizada y espera más
+    # entre consultas mientras otra ventana tiene el foco
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.live.set_paused(False)
+        if self.live_check.isChecked() and not self.live.is_enabled():
+            self.live.set_enabled(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.live.set_paused(True)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.live.set_paused(self.isMinimized())
+        elif event.type() == QEvent.Type.ActivationChange:
+            self.live.set_window_active(self.isActiveWindow())
+
+    def update_status(self):
+        cargadas = self.model.rowCount()
+        de_total = f" de {self.model.total}" if self.model.total is not None else ""
+        if self.proxy.is_active():
+            self.status_label.setText(f"{self.proxy.rowCount()} coincidencias en {cargadas}{de_total} cargadas")
+        else:
+            self.status_label.setText(f"Mostrando {cargadas}{de_total}")
+
+    def apply_filter(self):
+        def fecha(selector):
+            valor = selector.date()
+            return None if valor == FECHA_SIN_LIMITE else valor.toString("yyyy-MM-dd")
+
+        with medir_ui("reportes.filtrar", filas=self.model.rowCount()):
+            ids = self.model.index_busqueda.search(self.search_box.text())
+            self.proxy.set_filter(ids, fecha(self.date_from), fecha(self.date_to))
+        self.update_status()
+
+    def configure_columns(self):
+        # Las columnas cambian según el estado; si no cambiaron se respetan los anchos del usuario
+        columnas = self.model.columnCount()
+        if columnas == self._columnas_configuradas:
+            return
+        self._columnas_configuradas = columnas
+        for col in range(columnas):
+            self.table.setItemDelegateForColumn(col, None)
+        self.table.setItemDelegateForColumn(self.model.columna("accion"), self.actions_delegate)
+        for clave, ancho in ANCHOS_COLUMNA.items():
+            col = self.model.columna(clave)
+            if col >= 0:
+                self.table.setColumnWidth(col, ancho)
+
+    def on_row_action(self, accion, report_id):
+        handlers = {
+            "revisar": self.mark_as_checked,
+            "eliminar_postgres": self.delete_from_postgres,
+            "eliminar_chroma": self.delete_from_chroma,
+            "reactivar": self.reactivate_report,
+        }
+        handlers[accion](report_id)
 
     def export_excel(self):
-        if self.table.rowCount() == 0:
+        if self.model.rowCount() == 0:
             QMessageBox.information(self, "Sin datos", "No hay preguntas reportadas.")
             return
 
         estado = self.status_filter.currentText().lower()
 
-        try:
-            r = requests.get(f"{API_BASE}/exportar-preguntas", params={"estado": estado}, stream=True)
-            r.raise_for_status()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo exportar: {e}")
-            return
-
+        # Primero el destino: no se abre ninguna conexión mientras se elige
         sugerido = f"preguntas_{estado}.xlsx"
         path, _ = QFileDialog.getSaveFileName(self, "Guardar Excel", sugerido, "Excel Files (*.xlsx)")
         if not path:
             return
 
-        try:
-            with open(path, "wb") as f:
-                for chunk in r.iter_content(1024):
-                    f.write(chunk)
-            QMessageBox.information(self, "Exportado", f"Guardado en:\n{path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo guardar el archivo:\n{e}")
+        self.export_button.setEnabled(False)
+        self.export_progress.setRange(0, 0)
+        self.export_progress.setFormat("Exportando... %p%")
+        self.export_progress.show()
+        self.cancel_export_button.show()
+
+        worker = Worker(download_export, self.api, estado, path)
+        worker.signals.progreso.connect(self.on_export_progress)
+        worker.signals.resultado.connect(self.on_export_done)
+        worker.signals.error.connect(self.on_export_error)
+        self._export_worker = start(worker)
+
+    def on_export_progress(self, progreso):
+        recibidos, total = progreso
+        if total:
+            # Con compresión HTTP lo recibido (ya descomprimido) puede superar Content-Length
+            self.export_progress.setRange(0, total)
+            self.export_progress.setValue(min(recibidos, total))
+        else:
+            # Sin Content-Length solo se puede mostrar lo descargado
+            self.export_progress.setFormat(f"Exportando... {recibidos / 1e6:.1f} MB")
+
+    def on_export_done(self, path):
+        self._finish_export()
+        QMessageBox.information(self, "Exportado", f"Guardado en:\n{path}")
+
+    def on_export_error(self, error):
+        self._finish_export()
+        QMessageBox.critical(self, "Error", f"No se pudo exportar: {error}")
+
+    def cancel_export(self):
+        if self._export_worker is not None:
+            # El worker borra el archivo temporal en cuanto lee el siguiente bloque
+            self._export_worker.cancel()
+            self._finish_export()
+            self.notify("Exportación cancelada.")
+
+    def _finish_export(self):
+        self._export_worker = None
+        self.export_progress.hide()
+        self.cancel_export_button.hide()
+        self.export_button.setEnabled(True)
 
     def upload_excel(self):
         path, _ = QFileDialog.getOpenFileName(self, "Selecciona archivo Excel", "", "Excel Files (*.xlsx *.xls)")
         if not path:
             return
 
-        try:
-            with open(path, "rb") as f:
-                files = {"file": (os.path.basename(path), f, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
-                r = requests.post(f"{API_BASE}/subir-respuestas-excel", files=files)
-                r.raise_for_status()
-            QMessageBox.information(self, "Éxito", "Archivo subido y procesado correctamente.")
-            self.load_reports()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo subir el archivo:\n{e}")
+        if not soporta_lectura_local(path):
+            self.upload_full_excel(path)
+            return
+
+        # Se compara con las preguntas de la tabla para enviar solo lo que cambió
+        self.status_label.setText("⏳ Revisando la planilla...")
+        worker = Worker(analyze_answers, self.api, path, self.model.respuestas_experto())
+        worker.signals.resultado.connect(lambda r: self.on_answers_analyzed(path, *r))
+        worker.signals.error.connect(lambda e: self.on_answers_error(path, e))
+        start(worker)
+
+    def on_answers_analyzed(self, path, resumen, por_lotes):
+        self.update_status()
+        cambios = resumen["cambios"]
+        detalle = describir_resumen(resumen)
+        if resumen["desconocidos"] and not self.model.is_complete():
+            detalle += ("\n\nLa lista aún no tiene todas las preguntas: baja hasta el final "
+                        "para cargarlas y volver a comparar, o sube el archivo completo.")
+        if not por_lotes:
+            # El servidor no acepta respuestas sueltas: se revisó igual, pero se envía el archivo
+            respuesta = QMessageBox.question(
+                self, "Subir respuestas", f"{detalle}\n\n¿Subir el archivo completo?")
+            if respuesta == QMessageBox.StandardButton.Yes:
+                self.upload_full_excel(path)
+            return
+
+        dialogo = QMessageBox(QMessageBox.Icon.Question, "Subir respuestas", detalle,
+                              QMessageBox.StandardButton.Cancel, self)
+        enviar = None
+        if cambios:
+            enviar = dialogo.addButton(f"Enviar {len(cambios)} cambios", QMessageBox.ButtonRole.AcceptRole)
+        completo = dialogo.addButton("Subir archivo completo", QMessageBox.ButtonRole.ActionRole)
+        dialogo.exec()
+        if enviar is not None and dialogo.clickedButton() == enviar:
+            self.send_answer_changes(cambios)
+        elif dialogo.clickedButton() == completo:
+            self.upload_full_excel(path)
+
+    def on_answers_error(self, path, error):
+        self.update_status()
+        if not isinstance(error, ErrorExcel):
+            QMessageBox.critical(self, "Error", f"No se pudo revisar la planilla:\n{error}")
+            return
+        respuesta = QMessageBox.question(
+            self, "Planilla no reconocida",
+            f"{error}\n\nNo se pudo validar localmente. ¿Subir el archivo completo de todos modos?")
+        if respuesta == QMessageBox.StandardButton.Yes:
+            self.upload_full_excel(path)
+
+    def send_answer_changes(self, cambios):
+        self.bulk_progress.setRange(0, len(cambios))
+        self.bulk_progress.setValue(0)
+        self.bulk_progress.show()
+        worker = Worker(send_answer_batches, self.api, cambios)
+        worker.signals.progreso.connect(lambda p: self.bulk_progress.setValue(p[0]))
+        worker.signals.resultado.connect(lambda fallidos: self.on_answers_sent(len(cambios), fallidos))
+        worker.signals.error.connect(
+            lambda e: self.on_answers_sent(len(cambios), [(rid, str(e)) for rid, _ in cambios]))
+        start(worker)
+
+    def on_answers_sent(self, total, fallidos):
+        self.bulk_progress.hide()
+        if not fallidos:
+            QMessageBox.information(self, "Éxito", f"Se guardaron {total} respuestas.")
+        else:
+            informe = QMessageBox(QMessageBox.Icon.Warning, "Respuestas incompletas",
+                                  f"{len(fallidos)} de {total} respuestas no se pudieron guardar.",
+                                  QMessageBox.StandardButton.Ok, self)
+            informe.setDetailedText("\n".join(f"ID {rid}: {detalle}" for rid, detalle in fallidos))
+            informe.setModal(False)
+            informe.show()
+        self.load_reports()
+
+    def upload_full_excel(self, path):
+        self.status_label.setText("⏳ Subiendo archivo...")
+        worker = Worker(upload_answers_file, self.api, path)
+        worker.signals.resultado.connect(lambda _: self.on_full_excel_uploaded())
+        worker.signals.error.connect(
+            lambda e: QMessageBox.critical(self, "Error", f"No se pudo subir el archivo:\n{e}"))
+        worker.signals.terminado.connect(self.update_status)
+        start(worker)
+
+    def on_full_excel_uploaded(self):
+        QMessageBox.information(self, "Éxito", "Archivo subido y procesado correctamente.")
+        self.load_reports()
 
     def mark_as_checked(self, report_id):
-        try:
-            r = requests.post(f"{API_BASE}/marcar-revisado", json={"id": report_id})
-            r.raise_for_status()
-            QMessageBox.information(self, "Actualizado", f"Pregunta con el ID {report_id} marcada como revisada.")
-            self.load_reports()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo actualizar:\n{e}")
+        self.apply_row_action(
+            RUTAS_ACCION["revisar"], report_id,
+            f"✔️ Pregunta con el ID {report_id} marcada como revisada.", "No se pudo actualizar")
 
     def delete_from_postgres(self, report_id):
-        try:
-            r = requests.post(f"{API_BASE}/eliminar-pregunta", json={"id": report_id})
-            r.raise_for_status()
-            QMessageBox.information(self, "Eliminado", f"Pregunta con el ID {report_id} eliminada de PostgreSQL.")
-            self.load_reports()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo eliminar:\n{e}")
+        self.apply_row_action(
+            RUTAS_ACCION["eliminar_postgres"], report_id,
+            f"🗑️ Pregunta con el ID {report_id} eliminada de PostgreSQL.", "No se pudo eliminar")
 
     def delete_from_chroma(self, report_id):
-        try:
-            r = requests.post(f"{API_BASE}/eliminar-de-chroma", json={"id": report_id})
-            r.raise_for_status()
-            QMessageBox.information(self, "Chroma", f"Respuesta eliminada de Chroma para el ID {report_id}.")
-            self.load_reports()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo eliminar de Chroma:\n{e}")
+        self.apply_row_action(
+            RUTAS_ACCION["eliminar_chroma"], report_id,
+            f"🗑️ Respuesta eliminada de Chroma para el ID {report_id}.", "No se pudo eliminar de Chroma")
 
     def reactivate_report(self, report_id):
+        self.apply_row_action(
+            RUTAS_ACCION["reactivar"], report_id,
+            f"🔄 Pregunta con el ID {report_id} reactivada como reportada.", "No se pudo reactivar")
+
+    def apply_row_action(self, ruta, report_id, mensaje_ok, mensaje_error):
+        # Cualquier acción saca la fila del estado que se está viendo: se quita
+        # de inmediato y se restaura en su lugar si el servidor la rechaza.
+        quitado = self.model.take_report(report_id)
+        if quitado is None:
+            return
+        self.invalidate_cache()
+        self.update_status()
+        generacion = self._generacion
+        worker = Worker(post_report_action, self.api, ruta, report_id)
+        worker.signals.resultado.connect(lambda _: self.notify(mensaje_ok))
+        worker.signals.error.connect(
+            lambda e: self.rollback_row_action(generacion, quitado, f"❌ {mensaje_error} (ID {report_id}): {e}"))
+        start(worker)
+
+    def rollback_row_action(self, generacion, quitado, mensaje):
+        # Si la lista se recargó mientras tanto, ya refleja el estado del servidor
+        if generacion == self._generacion:
+            self.model.restore_report(*quitado)
+            self.update_status()
+        self.notify(mensaje, error=True)
+
+    def update_bulk_buttons(self):
+        if self.model.estado == self._estado_bulk:
+            return
+        self._estado_bulk = self.model.estado
+        for btn in self.bulk_buttons:
+            btn.setParent(None)
+        self.bulk_buttons = []
+        for clave, icono, descripcion in self.model.acciones():
+            btn = QPushButton(f"{icono} {descripcion} (selección)")
+            btn.clicked.connect(lambda _, c=clave, d=descripcion: self.bulk_action(c, d))
+            self.bulk_layout.addWidget(btn)
+            self.bulk_buttons.append(btn)
+
+    def selected_report_ids(self):
+        # La selección está en filas de la tabla filtrada: se pasan a filas del modelo
+        filas = sorted(self.proxy.mapToSource(index).row() for index in self.table.selectionModel().selectedRows())
+        return self.model.ids(filas)
+
+    def bulk_action(self, accion, descripcion):
+        ids = self.selected_report_ids()
+        if not ids:
+            self.notify("Selecciona una o más filas primero.", error=True)
+            return
+        # Igual que en las acciones por fila: se quitan ya y se restauran las que fallen
+        quitados = self.model.take_reports(ids)
+        self.invalidate_cache()
+        self.update_status()
+        generacion = self._generacion
+        for btn in self.bulk_buttons:
+            btn.setEnabled(False)
+        self.bulk_progress.setRange(0, len(ids))
+        self.bulk_progress.setValue(0)
+        self.bulk_progress.show()
+
+        worker = Worker(run_bulk_action, self.api, RUTAS_ACCION[accion], ids)
+        worker.signals.progreso.connect(lambda p: self.bulk_progress.setValue(p[0]))
+        worker.signals.resultado.connect(
+            lambda fallidos: self.on_bulk_done(generacion, descripcion, quitados, fallidos))
+        worker.signals.error.connect(
+            lambda e: self.on_bulk_done(generacion, descripcion, quitados, [(rid, str(e)) for rid in ids]))
+        start(worker)
+
+    def on_bulk_done(self, generacion, descripcion, quitados, fallidos):
+        self.bulk_progress.hide()
+        for btn in self.bulk_buttons:
+            btn.setEnabled(True)
+        if fallidos and generacion == self._generacion:
+            self.model.restore_reports(quitados, {rid for rid, _ in fallidos})
+        self.update_status()
+
+        correctos = len(quitados) - len(fallidos)
+        if not fallidos:
+            self.notify(f"✔️ {descripcion}: {correctos} preguntas actualizadas.")
+            return
+        self.notify(f"❌ {descripcion}: {correctos} correctas, {len(fallidos)} con error.", error=True)
+        # Informe por pregunta, sin bloquear la ventana
+        informe = QMessageBox(QMessageBox.Icon.Warning, "Acción masiva incompleta",
+                              f"{descripcion}: {len(fallidos)} de {len(quitados)} preguntas no se pudieron procesar.",
+                              QMessageBox.StandardButton.Ok, self)
+        informe.setDetailedText("\n".join(f"ID {rid}: {detalle}" for rid, detalle in fallidos))
+        informe.setModal(False)
+        informe.show()
+
+    def notify(self, mensaje, error=False):
+        self.notice_label.setStyleSheet(f"color: {'#ff6b6b' if error else '#7CFC00'};")
+        self.notice_label.setText(mensaje)
+        self._notice_timer.start(DURACION_AVISO_MS * (2 if error else 1))
+
+
+def fetch_reports_page(worker, api, estado, offset, limite, etag=None):
+    """Descarga una página de /preguntas-reportadas ordenada por fecha (más recientes primero).
+
+    Devuelve (filas, hay_mas, total, etag). Con `etag` la petición es
+    condicional (If-None-Match) y devuelve None si el servidor responde 304.
+    Un servidor sin paginación responde con la lista completa, que se ordena
+    aquí y se trata como página única.
+    """
+    params = {"estado": estado, "limit": limite, "offset": offset, "orden": "-fecha"}
+    headers = {"If-None-Match": etag} if etag else None
+    r = api.get("/preguntas-reportadas", params=params, headers=headers)
+    if r.status_code == 304:
+        return None
+    r.raise_for_status()
+    etag = r.headers.get("ETag")
+    data = r.json()
+    if isinstance(data, list):
+        return sorted(data, key=lambda fila: fila.get("fecha") or "", reverse=True), False, len(data), etag
+    filas = data.get("items", [])
+    return filas, data.get("siguiente") is not None, data.get("total"), etag
+
+
+def download_export(worker, api, estado, destino):
+    """Descarga /exportar-preguntas en un temporal junto a `destino` y lo renombra al terminar.
+
+    Emite (bytes recibidos, total o None) por worker.signals.progreso. Si se
+    cancela o falla, el temporal se borra y `destino` queda como estaba.
+    """
+    carpeta = os.path.dirname(os.path.abspath(destino))
+    fd, temporal = tempfile.mkstemp(dir=carpeta, prefix=f".{os.path.basename(destino)}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb", buffering=BUFFER_ESCRITURA) as f, api.get("/exportar-preguntas", params={"estado": estado}, stream=True) as r:
+            r.raise_for_status()
+            total = int(r.headers.get("Content-Length") or 0) or None
+            recibidos, ultimo_aviso = 0, 0.0
+            worker.signals.progreso.emit((0, total))
+            for bloque in r.iter_content(TAM_BLOQUE_DESCARGA):
+                if worker.is_cancelled():
+                    raise InterruptedError("Exportación cancelada")
+                f.write(bloque)
+                recibidos += len(bloque)
+                ahora = time.monotonic()
+                if ahora - ultimo_aviso >= INTERVALO_PROGRESO_DESCARGA:
+                    ultimo_aviso = ahora
+                    worker.signals.progreso.emit((recibidos, total))
+        os.replace(temporal, destino)
+    except BaseException:
         try:
-            r = requests.post(f"{API_BASE}/reactivar-pregunta", json={"id": report_id})
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+    return destino
+
+
+def analyze_answers(worker, api, path, actuales):
+    """Devuelve (resumen de la planilla, si el servidor acepta respuestas por lotes)."""
+    resumen = comparar_respuestas(path, actuales)
+    return resumen, bool(api.capabilities().get("respuestas_lote"))
+
+
+def send_answer_batches(worker, api, cambios):
+    """Envía [(id, respuesta)] a /respuestas-experto-lote por bloques; devuelve [(id, error)]."""
+    fallidos = []
+    for i in range(0, len(cambios), TAM_LOTE):
+        bloque = cambios[i:i + TAM_LOTE]
+        try:
+            r = api.post("/respuestas-experto-lote", json={
+                "respuestas": [{"id": rid, "respuesta_experto": respuesta} for rid, respuesta in bloque]})
             r.raise_for_status()
-            QMessageBox.information(self, "Reactivado", f"Pregunta con el ID {report_id} reactivada como reportada.")
-            self.load_reports()
+            fallidos.extend((f["id"], f.get("detalle", "Error")) for f in r.json().get("fallidos", []))
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo reactivar:\n{e}")
+            fallidos.extend((rid, str(e)) for rid, _ in bloque)
+        worker.signals.progreso.emit((min(i + TAM_LOTE, len(cambios)), len(cambios)))
+    return fallidos
+
+
+def upload_answers_file(worker, api, path):
+    with open(path, "rb") as f:
+        files = {"file": (os.path.basename(path), f, TIPO_XLSX)}
+        r = api.post("/subir-respuestas-excel", files=files)
+        r.raise_for_status()
+    return path
+
+
+def post_report_action(worker, api, ruta, report_id):
+    r = api.post(ruta, json={"id": report_id})
+    r.raise_for_status()
+    return report_id
+
+
+def run_bulk_action(worker, api, ruta, ids):
+    """Aplica la acción de `ruta` a todos los ids y devuelve [(id, error)] de los que fallaron.
+
+    Si el servidor anuncia "acciones_lote" en /capacidades se usa `<ruta>-lote`
+    por bloques; si no, se envían los POST por id con concurrencia acotada.
+    """
+    total = len(ids)
+    fallidos = []
+
+    if api.capabilities().get("acciones_lote"):
+        for i in range(0, total, TAM_LOTE):
+            bloque = ids[i:i + TAM_LOTE]
+            try:
+                r = api.post(f"{ruta}-lote", json={"ids": bloque})
+                r.raise_for_status()
+                fallidos.extend((f["id"], f.get("detalle", "Error")) for f in r.json().get("fallidos", []))
+            except Exception as e:
+                fallidos.extend((rid, str(e)) for rid in bloque)
+            worker.signals.progreso.emit((min(i + TAM_LOTE, total), total))
+        return fallidos
+
+    hechos = 0
+    with ThreadPoolExecutor(max_workers=CONCURRENCIA_LOTE) as pool:
+        futuros = {pool.submit(post_report_action, worker, api, ruta, rid): rid for rid in ids}
+        for futuro in as_completed(futuros):
+            try:
+                futuro.result()
+            except Exception as e:
+                fallidos.append((futuros[futuro], str(e)))
+            hechos += 1
+            worker.signals.progreso.emit((hechos, total))
+    return fallidos
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = ReportsUI()
     window.show()
+    report_first_window(app)
     sys.exit(app.exec())
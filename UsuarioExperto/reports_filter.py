@@ -0,0 +1,241 @@
+"""Búsqueda instantánea y filtro por fecha sobre las preguntas reportadas.
+
+ReportsIndex guarda, por cada palabra (sin tildes ni mayúsculas) de la
+pregunta, la respuesta y la respuesta del experto, los IDs de los reportes
+que la contienen. Se completa a medida que llegan las páginas, así que
+buscar no recorre los textos: cada palabra de la búsqueda se resuelve como
+prefijo sobre la lista ordenada de palabras y se intersectan los IDs.
+
+ReportsFilterModel es el proxy que usa la tabla: deja pasar solo los IDs
+encontrados y las fechas dentro del rango elegido. No usa
+QSortFilterProxyModel porque éste llama a filterAcceptsRow (en Python) una
+vez por fila en cada tecla; aquí las filas visibles se calculan con una sola
+pasada sobre la lista del modelo y el mapeo de filas es una búsqueda binaria.
+"""
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+from PyQt6.QtCore import QAbstractProxyModel, QModelIndex
+
+CAMPOS_BUSQUEDA = ("pregunta", "respuesta", "respuesta_experto")
+
+_PALABRA = re.compile(r"\w+")
+# Marcas diacríticas que deja NFKD (tildes, diéresis, la virgulilla de la ñ)
+_DIACRITICOS = re.compile(r"[\u0300-\u036f]")
+
+
+def normalizar(texto):
+    return _DIACRITICOS.sub("", unicodedata.normalize("NFKD", texto)).casefold()
+
+
+def palabras(texto):
+    return _PALABRA.findall(normalizar(texto))
+
+
+class ReportsIndex:
+    def __init__(self):
+        self._ids_por_palabra = {}
+        self._ordenadas = []
+
+    def clear(self):
+        self._ids_por_palabra = {}
+        self._ordenadas = []
+
+    def add(self, filas):
+        nuevas = []
+        for fila in filas:
+            report_id = fila["id"]
+            texto = " ".join(str(fila.get(campo) or "") for campo in CAMPOS_BUSQUEDA)
+            for palabra in set(palabras(texto)) | {str(report_id)}:
+                ids = self._ids_por_palabra.get(palabra)
+                if ids is None:
+                    ids = self._ids_por_palabra[palabra] = set()
+                    nuevas.append(palabra)
+                ids.add(report_id)
+        if nuevas:
+            # Una vez por página: la lista ya ordenada más las nuevas ordenadas son dos
+            # tramos que sort() une en tiempo lineal
+            self._ordenadas.extend(sorted(nuevas))
+            self._ordenadas.sort()
+
+    def search(self, texto):
+        """IDs que contienen todas las palabras de `texto` (como prefijo), o None si no hay palabras."""
+        consulta = set(palabras(texto))
+        if not consulta:
+            return None
+        resultado = None
+        # Las palabras más largas coinciden con menos IDs: se empieza por ellas
+        for palabra in sorted(consulta, key=len, reverse=True):
+            ids = self._con_prefijo(palabra)
+            resultado = ids if resultado is None else resultado & ids
+            if not resultado:
+                return set()
+        return resultado
+
+    def _con_prefijo(self, prefijo):
+        exacta = self._ids_por_palabra.get(prefijo)
+        ids = set(exacta) if exacta else set()
+        i = bisect_left(self._ordenadas, prefijo)
+        if exacta:
+            i += 1
+        while i < len(self._ordenadas) and self._ordenadas[i].startswith(prefijo):
+            ids |= self._ids_por_palabra[self._ordenadas[i]]
+            i += 1
+        return ids
+
+
+class ReportsFilterModel(QAbstractProxyModel):
+    """Proxy de ReportsModel con las filas que cumplen la búsqueda y el rango de fechas."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ids = None
+        self._desde = None
+        self._hasta = None
+        # Filas del modelo visibles, en orden; None si no hay filtro (se ven todas)
+        self._visibles = None
+        self._quitando = None
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._source_reset)
+        model.rowsAboutToBeInserted.connect(self._source_about_to_insert)
+        model.rowsInserted.connect(self._source_inserted)
+        model.rowsAboutToBeRemoved.connect(self._source_about_to_remove)
+        model.rowsRemoved.connect(self._source_removed)
+        model.dataChanged.connect(self._source_data_changed)
+        model.headerDataChanged.connect(self.headerDataChanged)
+
+    # --- filtro -------------------------------------------------------------
+
+    def set_filter(self, ids=None, desde=None, hasta=None):
+        """ids: conjunto de IDs visibles (None = todos); desde/hasta: "AAAA-MM-DD" incluidos o None."""
+        self._ids, self._desde, self._hasta = ids, desde, hasta
+        anteriores = self._visibles
+        visibles = self._calcular(0, self.sourceModel().rowCount()) if self.is_active() else None
+        if visibles == anteriores:
+            return
+        total = self.sourceModel().rowCount()
+        previas = total if anteriores is None else len(anteriores)
+        if visibles is not None and len(visibles) > previas \
+                and visibles[:previas] == (list(range(previas)) if anteriores is None else anteriores):
+            # Solo se agregan filas al final (p. ej. llegó otra página): se conserva la selección
+            self.beginInsertRows(QModelIndex(), previas, len(visibles) - 1)
+            self._visibles = visibles
+            self.endInsertRows()
+            return
+        self.beginResetModel()
+        self._visibles = visibles
+        self.endResetModel()
+
+    def is_active(self):
+        return self._ids is not None or self._desde is not None or self._hasta is not None
+
+    def _calcular(self, inicio, fin):
+        """Filas del modelo entre inicio y fin (sin incluir) que cumplen el filtro."""
+        model = self.sourceModel()
+        ids, desde, hasta = self._ids, self._desde, self._hasta
+        filas = range(inicio, fin)
+        if ids is not None:
+            filas = [f for f in filas if model.report_id(f) in ids]
+        if desde is not None or hasta is not None:
+            desde = desde or ""
+            hasta = hasta or "9999"
+            # Las fechas son ISO 8601: comparar los primeros 10 caracteres compara el día
+            filas = [f for f in filas if desde <= str(model.report(f).get("fecha") or "")[:10] <= hasta]
+        return list(filas)
+
+    # --- mapeo --------------------------------------------------------------
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        fila = index.row() if self._visibles is None else self._visibles[index.row()]
+        return self.sourceModel().index(fila, index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        fila = index.row()
+        if self._visibles is not None:
+            i = bisect_left(self._visibles, fila)
+            if i == len(self._visibles) or self._visibles[i] != fila:
+                return QModelIndex()
+            fila = i
+        return self.createIndex(fila, index.column())
+
+    def index(self, fila, columna, parent=QModelIndex()):
+        if parent.isValid() or not self.hasIndex(fila, columna, parent):
+            return QModelIndex()
+        return self.createIndex(fila, columna)
+
+    def parent(self, index=None):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().rowCount() if self._visibles is None else len(self._visibles)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    # --- cambios del modelo -------------------------------------------------
+
+    def _source_reset(self):
+        if self._visibles is not None:
+            self._visibles = self._calcular(0, self.sourceModel().rowCount())
+        self.endResetModel()
+
+    def _source_about_to_insert(self, parent, inicio, fin):
+        if self._visibles is None:
+            self.beginInsertRows(QModelIndex(), inicio, fin)
+
+    def _source_inserted(self, parent, inicio, fin):
+        if self._visibles is None:
+            self.endInsertRows()
+            return
+        # Las filas existentes desde `inicio` se corren; las nuevas se filtran con el criterio actual
+        n = fin - inicio + 1
+        pos = bisect_left(self._visibles, inicio)
+        self._visibles[pos:] = [f + n for f in self._visibles[pos:]]
+        nuevas = self._calcular(inicio, fin + 1)
+        if nuevas:
+            self.beginInsertRows(QModelIndex(), pos, pos + len(nuevas) - 1)
+            self._visibles[pos:pos] = nuevas
+            self.endInsertRows()
+
+    def _source_about_to_remove(self, parent, inicio, fin):
+        if self._visibles is None:
+            self.beginRemoveRows(QModelIndex(), inicio, fin)
+            return
+        desde = bisect_left(self._visibles, inicio)
+        hasta = bisect_right(self._visibles, fin)
+        self._quitando = (desde, hasta)
+        if hasta > desde:
+            self.beginRemoveRows(QModelIndex(), desde, hasta - 1)
+
+    def _source_removed(self, parent, inicio, fin):
+        if self._visibles is None:
+            self.endRemoveRows()
+            return
+        desde, hasta = self._quitando
+        self._quitando = None
+        n = fin - inicio + 1
+        self._visibles[desde:] = [f - n for f in self._visibles[hasta:]]
+        if hasta > desde:
+            self.endRemoveRows()
+
+    def _source_data_changed(self, arriba, abajo, roles=()):
+        if self._visibles is None:
+            desde, hasta = arriba.row(), abajo.row()
+        else:
+            desde = bisect_left(self._visibles, arriba.row())
+            hasta = bisect_right(self._visibles, abajo.row()) - 1
+            if hasta < desde:
+                return
+        self.dataChanged.emit(self.index(desde, arriba.column()), self.index(hasta, abajo.column()), roles)
@@ -0,0 +1,189 @@
+"""Actualización en vivo de la tabla de preguntas reportadas.
+
+Si el servidor anuncia "cambios_reportes" en /capacidades, LiveUpdates hace
+una consulta larga (long polling) a /preguntas-reportadas/cambios: el
+servidor la retiene hasta que hay cambios o pasan ESPERA_CAMBIOS segundos y
+responde solo las filas nuevas o modificadas desde el cursor anterior. Si no,
+revisa la primera página del estado que se ve con If-None-Match, que sin
+cambios es un 304 sin cuerpo; así las filas que otro experto revisó o borró
+solo desaparecen si estaban en las fechas de esa primera página (las más
+antiguas esperan a que se recargue la lista).
+
+Para que varias ventanas abiertas todo el día casi no carguen al servidor:
+con la ventana minimizada no se consulta nada, y con la ventana en segundo
+plano la pausa entre consultas sin cambios se duplica hasta PAUSA_MAXIMA.
+Al volver a la ventana se consulta en el momento.
+"""
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from api_client import TIMEOUT_CONEXION
+
+# Segundos que el servidor puede retener una consulta de cambios sin responder
+ESPERA_CAMBIOS = 25
+
+# Pausas (s) entre consultas: sin el endpoint de cambios, con la ventana en
+# segundo plano y sin novedades, y tras un error; se duplican hasta el máximo
+INTERVALO_RESPALDO = 10
+PAUSA_INACTIVA = 5
+PAUSA_MAXIMA = 120
+PAUSA_ERROR = 2
+PAUSA_ERROR_MAXIMA = 300
+
+
+def fetch_report_changes(api, cursor, espera=ESPERA_CAMBIOS):
+    """Devuelve (filas nuevas o modificadas, cursor siguiente).
+
+    Sin cursor el servidor responde en el momento con el cursor actual y sin filas.
+    """
+    params = {"espera": espera}
+    if cursor is not None:
+        params["desde"] = cursor
+    r = api.get("/preguntas-reportadas/cambios", params=params, timeout=(TIMEOUT_CONEXION, espera + 15))
+    r.raise_for_status()
+    data = r.json()
+    return data.get("cambios", []), data.get("cursor")
+
+
+def pausa_creciente(inicial, veces, maximo):
+    return min(maximo, inicial * 2 ** max(0, veces - 1))
+
+
+class LiveUpdates(QObject):
+    """Consulta cambios de a una petición por vez y emite cambios con las filas recibidas.
+
+    `revisar_pagina(estado, etag)` se usa sin el endpoint de cambios: debe
+    devolver None (304) o (filas, hay_mas, total, etag), como fetch_reports_page;
+    cada página que cambió se emite por pagina(estado, filas, hay_mas).
+    `estado_actual()` es el estado que muestra la tabla.
+    """
+
+    cambios = pyqtSignal(list)
+    pagina = pyqtSignal(str, list, bool)
+    consultado = pyqtSignal(str)
+    _respuesta = pyqtSignal(int, object, object)
+
+    def __init__(self, api, estado_actual, revisar_pagina, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.estado_actual = estado_actual
+        self.revisar_pagina = revisar_pagina
+        self._activo = False
+        self._pausado = False
+        self._ventana_activa = True
+        self._consultando = False
+        self._generacion = 0
+        self._cursor = None
+        self._etags = {}
+        self._vacias = 0
+        self._errores = 0
+        self._inicio = (0.0, None)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._consultar)
+        self._respuesta.connect(self._on_respuesta)
+
+    def set_enabled(self, activo):
+        self._activo = activo
+        if activo:
+            self._vacias = self._errores = 0
+            self._siguiente(0)
+        else:
+            self._detener()
+
+    def is_enabled(self):
+        return self._activo
+
+    def set_paused(self, pausado):
+        """Pausa mientras la ventana está minimizada u oculta; al reanudar consulta en el momento."""
+        if pausado == self._pausado:
+            return
+        self._pausado = pausado
+        if pausado:
+            self._detener()
+        elif self._activo:
+            self._vacias = 0
+            self._siguiente(0)
+
+    def set_window_active(self, activa):
+        self._ventana_activa = activa
+        if activa and self._activo and not self._pausado and not self._consultando and self._timer.isActive():
+            # Se estaba esperando por inactividad: al volver se consulta ya
+            self._vacias = 0
+            self._siguiente(0)
+
+    def _detener(self):
+        self._timer.stop()
+        # Una consulta larga en curso no se puede cortar: su respuesta se descarta
+        self._generacion += 1
+        self._consultando = False
+
+    def _siguiente(self, segundos):
+        if self._activo and not self._pausado and not self._consultando:
+            self._timer.start(int(segundos * 1000))
+
+    def _consultar(self):
+        if not self._activo or self._pausado or self._consultando:
+            return
+        self._consultando = True
+        generacion = self._generacion
+        estado, cursor = self.estado_actual(), self._cursor
+        etag = self._etags.get(estado)
+        self._inicio = (time.monotonic(), cursor)
+
+        def consultar():
+            try:
+                if self.api.capabilities().get("cambios_reportes"):
+                    resultado = ("cambios",) + fetch_report_changes(self.api, cursor)
+                else:
+                    resultado = ("pagina", estado, self.revisar_pagina(estado, etag))
+                error = None
+            except Exception as e:
+                resultado, error = None, e
+            try:
+                self._respuesta.emit(generacion, resultado, error)
+            except RuntimeError:
+                pass  # la ventana ya se cerró
+
+        # Hilo propio y no el QThreadPool: una consulta retenida 25 s no debe ocupar un
+        # hilo del pool compartido ni demorar el cierre de la aplicación
+        threading.Thread(target=consultar, name="reportes-en-vivo", daemon=True).start()
+
+    def _on_respuesta(self, generacion, resultado, error):
+        if generacion != self._generacion:
+            return
+        self._consultando = False
+        hora = time.strftime("%H:%M:%S")
+        if error is not None:
+            self._errores += 1
+            pausa = pausa_creciente(PAUSA_ERROR, self._errores, PAUSA_ERROR_MAXIMA)
+            self.consultado.emit(f"Sin conexión ({hora}); se reintenta en {pausa:.0f} s")
+            self._siguiente(pausa)
+            return
+        self._errores = 0
+        if resultado[0] == "cambios":
+            _, filas, self._cursor = resultado
+            inicio, cursor_enviado = self._inicio
+            # Un servidor que no retiene la consulta no debe recibir una tras otra
+            rapida = cursor_enviado is not None and time.monotonic() - inicio < ESPERA_CAMBIOS / 2
+            intervalo = INTERVALO_RESPALDO if rapida and not filas else 0
+            novedades = bool(filas)
+            if novedades:
+                self.cambios.emit(filas)
+        else:
+            _, estado, pagina = resultado
+            novedades = pagina is not None
+            if novedades:
+                # La primera vez son filas que la tabla ya tiene: merge_first_page no las cuenta.
+                # Se emite con el estado consultado, que puede no ser el que se ve si el
+                # experto cambió de estado mientras tanto
+                filas, hay_mas, _, self._etags[estado] = pagina
+                self.pagina.emit(estado, filas, hay_mas)
+            intervalo = INTERVALO_RESPALDO
+        self._vacias = 0 if novedades else self._vacias + 1
+        self.consultado.emit(f"Última comprobación: {hora}")
+        if not novedades and not self._ventana_activa:
+            intervalo = max(intervalo, pausa_creciente(PAUSA_INACTIVA, self._vacias, PAUSA_MAXIMA))
+        self._siguiente(intervalo)
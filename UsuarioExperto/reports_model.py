@@ -0,0 +1,365 @@
+"""Modelo y delegado de la tabla de preguntas reportadas.
+
+ReportsModel guarda las filas tal como llegan de /preguntas-reportadas y
+ReportActionsDelegate dibuja los botones de acción de cada fila, de modo que
+la tabla no crea ningún widget por fila y solo pinta lo visible.
+
+Las filas se cargan por páginas: cuando la vista llega al final, Qt llama a
+fetchMore y el modelo emite fetch_requested con el offset de la página
+siguiente; la ventana la descarga y la agrega con append_reports. Cada
+página cargada se agrega también al índice de búsqueda (index_busqueda).
+"""
+from datetime import datetime
+
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QToolTip
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QAbstractTableModel, QEvent, QModelIndex, QRect, pyqtSignal
+
+from reports_filter import ReportsIndex
+
+# Acciones disponibles según el estado: (clave, icono, descripción)
+ACCIONES = {
+    "reportada": [
+        ("revisar", "✔️", "Marcar como revisada"),
+        ("eliminar_postgres", "🗑️", "Eliminar de PostgreSQL"),
+    ],
+    "revisada": [
+        ("eliminar_chroma", "🗑️", "Eliminar de Chroma"),
+        ("reactivar", "🔄", "Reactivar reporte"),
+    ],
+    "eliminada": [
+        ("reactivar", "🔄", "Reactivar reporte"),
+    ],
+}
+
+ANCHO_BOTON = 34
+ALTO_BOTON = 24
+SEPARACION = 6
+
+
+def formatear_fecha(valor):
+    try:
+        return datetime.fromisoformat(valor).strftime("%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return str(valor or "")
+
+
+class ReportsModel(QAbstractTableModel):
+    IdRole = Qt.ItemDataRole.UserRole + 1
+
+    fetch_requested = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.estado = "reportada"
+        self.total = None
+        self._filas = []
+        self._columnas = []
+        self._hay_mas = False
+        self._cargando = False
+        self.index_busqueda = ReportsIndex()
+        self._set_columnas()
+
+    def _set_columnas(self):
+        columnas = [("id", "ID"), ("pregunta", "Pregunta"), ("respuesta", "Respuesta"), ("fecha", "Fecha")]
+        if self.estado in {"revisada", "eliminada"}:
+            columnas.append(("respuesta_experto", "Respuesta Experto"))
+        columnas.append(("accion", "Acción"))
+        self._columnas = columnas
+
+    # --- API de Qt ----------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columnas)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._columnas[section][1]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == self.IdRole:
+            return self._filas[index.row()]["id"]
+        clave = self._columnas[index.column()][0]
+        if clave == "accion":
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            fila = self._filas[index.row()]
+            if clave == "fecha":
+                # Se formatea al mostrarla por primera vez, no al cargar
+                texto = fila.get("_fecha")
+                if texto is None:
+                    texto = fila["_fecha"] = formatear_fecha(fila.get("fecha"))
+                return texto
+            valor = fila.get(clave)
+            if role == Qt.ItemDataRole.ToolTipRole and clave not in {"pregunta", "respuesta", "respuesta_experto"}:
+                return None
+            return "" if valor is None else str(valor)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._hay_mas and not self._cargando
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._cargando = True
+            self.fetch_requested.emit(len(self._filas))
+
+    # --- datos --------------------------------------------------------------
+
+    def set_reports(self, estado, filas, hay_mas=False, total=None, indice=None):
+        """Reemplaza las filas; `indice` es el índice de búsqueda de esas filas, si ya se tiene."""
+        self.beginResetModel()
+        self.estado = estado
+        self.total = total
+        self._filas = list(filas)
+        self._hay_mas = hay_mas
+        self._cargando = False
+        self._set_columnas()
+        if indice is None:
+            indice = ReportsIndex()
+            indice.add(self._filas)
+        self.index_busqueda = indice
+        self.endResetModel()
+
+    def state(self):
+        """(filas, hay_mas, total, índice) del estado actual, para restaurarlo luego con set_reports."""
+        return list(self._filas), self._hay_mas, self.total, self.index_busqueda
+
+    def append_reports(self, filas, hay_mas, total=None):
+        self._cargando = False
+        self._hay_mas = hay_mas
+        if total is not None:
+            self.total = total
+        if filas:
+            # Una fila que llegó antes en vivo (merge_changes) corre las páginas: no se repite
+            presentes = {fila["id"] for fila in self._filas}
+            filas = [fila for fila in filas if fila["id"] not in presentes]
+        if filas:
+            inicio = len(self._filas)
+            self.index_busqueda.add(filas)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(filas) - 1)
+            self._filas.extend(filas)
+            self.endInsertRows()
+
+    def merge_changes(self, cambios):
+        """Aplica filas nuevas o modificadas de cualquier estado; devuelve cuántas cambiaron la tabla.
+
+        Las del estado que se ve se actualizan en su lugar o se insertan por
+        fecha; las que pasaron a otro estado se quitan. Una fila sin "estado"
+        (como las de /preguntas-reportadas) se toma como del estado que se ve.
+        Una fila más antigua que la última cargada se deja para cuando llegue
+        su página.
+        """
+        posiciones = {fila["id"]: i for i, fila in enumerate(self._filas)}
+        quitar, nuevas, del_estado, cambiadas = [], [], [], 0
+        for cambio in cambios:
+            fila = posiciones.get(cambio["id"])
+            if cambio.get("estado", self.estado) != self.estado:
+                if fila is not None:
+                    quitar.append(cambio["id"])
+                continue
+            del_estado.append(cambio)
+            if fila is not None:
+                # El estado no se compara: las filas cargadas por página no lo traen
+                actual = {clave: valor for clave, valor in self._filas[fila].items()
+                          if not clave.startswith("_") and clave != "estado"}
+                if actual == {clave: valor for clave, valor in cambio.items() if clave != "estado"}:
+                    continue
+                self._filas[fila] = dict(cambio)
+                self.dataChanged.emit(self.index(fila, 0), self.index(fila, len(self._columnas) - 1))
+                cambiadas += 1
+            else:
+                nuevas.append(dict(cambio))
+        if quitar:
+            cambiadas += len(self.take_reports(quitar))
+        for fila in nuevas:
+            fecha = fila.get("fecha") or ""
+            # Las filas están de la más reciente a la más antigua; lo nuevo suele ir arriba
+            pos = next((i for i, f in enumerate(self._filas) if (f.get("fecha") or "") < fecha), len(self._filas))
+            if pos == len(self._filas) and self._hay_mas:
+                if self.total is not None:
+                    self.total += 1
+                continue
+            self.restore_report(pos, fila)
+            cambiadas += 1
+        self.index_busqueda.add(del_estado)
+        return cambiadas
+
+    def merge_first_page(self, estado, filas, hay_mas):
+        """Aplica la primera página de `estado` vuelta a pedir; devuelve cuántas filas cambiaron la tabla.
+
+        Además de lo que hace merge_changes, quita las filas cargadas que
+        faltan en la página dentro de las fechas que cubre: otro experto las
+        revisó o las borró. Si hay más páginas, las filas con la fecha de la
+        última de esta se dejan, porque pueden haber pasado a la siguiente.
+        """
+        if estado != self.estado or (hay_mas and not filas):
+            return 0
+        ids = {fila["id"] for fila in filas}
+        desde = min((fila.get("fecha") or "" for fila in filas), default="") if hay_mas else None
+        quitar = [fila["id"] for fila in self._filas
+                  if fila["id"] not in ids and (desde is None or (fila.get("fecha") or "") > desde)]
+        cambiadas = len(self.take_reports(quitar)) if quitar else 0
+        return cambiadas + self.merge_changes(filas)
+
+    def row_of(self, report_id):
+        for i, fila in enumerate(self._filas):
+            if fila["id"] == report_id:
+                return i
+        return -1
+
+    def take_report(self, report_id):
+        """Quita la fila del reporte y devuelve (posición, datos) para poder restaurarla."""
+        quitados = self.take_reports([report_id])
+        return quitados[0] if quitados else None
+
+    def take_reports(self, report_ids):
+        """Quita varias filas en una sola pasada; devuelve [(posición, datos)] en orden."""
+        buscados = set(report_ids)
+        posiciones = [i for i, fila in enumerate(self._filas) if fila["id"] in buscados]
+        quitados = [(i, self._filas[i]) for i in posiciones]
+        # Se quitan de abajo hacia arriba, por tramos contiguos
+        fin = len(posiciones) - 1
+        while fin >= 0:
+            inicio = fin
+            while inicio > 0 and posiciones[inicio - 1] == posiciones[inicio] - 1:
+                inicio -= 1
+            self.beginRemoveRows(QModelIndex(), posiciones[inicio], posiciones[fin])
+            del self._filas[posiciones[inicio]:posiciones[fin] + 1]
+            self.endRemoveRows()
+            fin = inicio - 1
+        if self.total is not None:
+            self.total -= len(quitados)
+        return quitados
+
+    def restore_report(self, fila, datos):
+        fila = min(fila, len(self._filas))
+        self.beginInsertRows(QModelIndex(), fila, fila)
+        self._filas.insert(fila, datos)
+        self.endInsertRows()
+        if self.total is not None:
+            self.total += 1
+
+    def restore_reports(self, quitados, restaurar_ids):
+        """Vuelve a insertar, en su posición original, las filas de restaurar_ids.
+
+        quitados es lo que devolvió take_reports; las filas que no se restauran
+        desplazan hacia arriba a las que sí.
+        """
+        omitidas = 0
+        for fila, datos in quitados:
+            if datos["id"] in restaurar_ids:
+                self.restore_report(fila - omitidas, datos)
+            else:
+                omitidas += 1
+
+    def fetch_failed(self):
+        # Sin reintentos automáticos: la vista volvería a pedir la página en cada scroll
+        self._cargando = False
+        self._hay_mas = False
+
+    def is_loading(self):
+        return self._cargando
+
+    def is_complete(self):
+        """True si ya se cargaron todas las páginas del estado actual."""
+        return not self._hay_mas
+
+    def columna(self, clave):
+        for i, (c, _) in enumerate(self._columnas):
+            if c == clave:
+                return i
+        return -1
+
+    def acciones(self):
+        return ACCIONES.get(self.estado, [])
+
+    def report(self, fila):
+        return self._filas[fila]
+
+    def report_id(self, fila):
+        return self._filas[fila]["id"]
+
+    def ids(self, filas):
+        return [self._filas[f]["id"] for f in filas]
+
+    def respuestas_experto(self):
+        """{id: respuesta_experto} de todas las filas cargadas."""
+        return {fila["id"]: fila.get("respuesta_experto") or "" for fila in self._filas}
+
+
+class ReportActionsDelegate(QStyledItemDelegate):
+    """Dibuja los botones de la columna "Acción" y emite la acción pulsada."""
+
+    accion = pyqtSignal(str, object)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self._model = model
+        self._presionado = None
+
+    def _botones(self, rect):
+        acciones = self._model.acciones()
+        ancho_total = len(acciones) * ANCHO_BOTON + max(0, len(acciones) - 1) * SEPARACION
+        x = rect.left() + (rect.width() - ancho_total) // 2
+        y = rect.top() + (rect.height() - ALTO_BOTON) // 2
+        botones = []
+        for clave, icono, descripcion in acciones:
+            botones.append((QRect(x, y, ANCHO_BOTON, ALTO_BOTON), clave, icono, descripcion))
+            x += ANCHO_BOTON + SEPARACION
+        return botones
+
+    def _boton_en(self, rect, pos):
+        for boton in self._botones(rect):
+            if boton[0].contains(pos):
+                return boton
+        return None
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        painter.setFont(option.font)
+        for rect, clave, icono, _ in self._botones(option.rect):
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#3a3a3a"))
+            painter.drawRoundedRect(rect, 8, 8)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter.value, icono)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        tipo = event.type()
+        if tipo not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease):
+            return False
+        boton = self._boton_en(option.rect, event.position().toPoint())
+        report_id = index.data(ReportsModel.IdRole)
+        if tipo == QEvent.Type.MouseButtonPress:
+            self._presionado = (report_id, boton[1]) if boton else None
+            return boton is not None
+        presionado, self._presionado = self._presionado, None
+        if boton is not None and presionado == (report_id, boton[1]) \
+                and event.button() == Qt.MouseButton.LeftButton:
+            self.accion.emit(boton[1], report_id)
+        return boton is not None
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.Type.ToolTip:
+            boton = self._boton_en(option.rect, event.pos())
+            if boton is not None:
+                QToolTip.showText(event.globalPos(), boton[3], view)
+                return True
+        return super().helpEvent(event, view, option, index)
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        acciones = len(self._model.acciones())
+        size.setWidth(acciones * (ANCHO_BOTON + SEPARACION) + SEPARACION)
+        return size
@@ -0,0 +1,204 @@
+"""Subida de PDFs grandes sin cargarlos en memoria.
+
+MultipartPdf arma el cuerpo multipart/form-data a medida que requests lo lee
+(read/__len__), a partir de un generador que lee el archivo en bloques de
+tamaño fijo; así el consumo de memoria no depende del tamaño del PDF.
+
+Si el servidor anuncia "carga_por_partes" en /capacidades, el archivo se
+envía en partes con PUT y la carga se puede reanudar desde lo último que el
+servidor confirmó (contrato en UsuarioExperto/README.txt).
+"""
+import os
+import time
+import uuid
+
+TAM_BLOQUE = 1024 * 1024
+TAM_PARTE = 8 * 1024 * 1024
+
+# Intervalo mínimo (s) entre avisos de progreso para no saturar la interfaz
+INTERVALO_PROGRESO = 0.1
+
+# 409 seguidos (posición distinta en el servidor) antes de dar la carga por fallida
+MAX_RESINCRONIZACIONES = 5
+
+
+class CargaCancelada(Exception):
+    pass
+
+
+class ArchivoModificado(OSError):
+    """El archivo cambió mientras se enviaba; requests la entrega envuelta en ConnectionError."""
+
+
+def archivo_modificado(error):
+    """La ArchivoModificado que originó `error`, buscándola en su cadena y en sus argumentos."""
+    pendientes, vistos = [error], set()
+    while pendientes:
+        e = pendientes.pop()
+        if isinstance(e, ArchivoModificado):
+            return e
+        if not isinstance(e, BaseException) or id(e) in vistos:
+            continue
+        vistos.add(id(e))
+        pendientes += [e.__cause__, e.__context__, *e.args]
+    return None
+
+
+class LectorPorBloques:
+    """Adapta un generador de bytes a la interfaz de archivo que usa requests.
+
+    crear_bloques() debe devolver un generador nuevo desde el principio: así
+    el cuerpo se puede rebobinar (seek(0)) si urllib3 reintenta la petición.
+    """
+
+    def __init__(self, crear_bloques, largo):
+        self._crear_bloques = crear_bloques
+        self._largo = largo
+        self.seek(0)
+
+    def __len__(self):
+        return self._largo
+
+    def tell(self):
+        return self._leidos
+
+    def seek(self, pos, whence=os.SEEK_SET):
+        if pos != 0 or whence != os.SEEK_SET:
+            raise OSError("Solo se puede volver al inicio del cuerpo")
+        self._bloques = self._crear_bloques()
+        self._actual = b""
+        self._pos = 0
+        self._leidos = 0
+        return 0
+
+    def read(self, n=-1):
+        # Se recorta el bloque actual por posición, sin copiarlo entero en cada lectura
+        trozos = []
+        faltan = n
+        while faltan != 0:
+            if self._pos >= len(self._actual):
+                self._actual, self._pos = next(self._bloques, b""), 0
+                if not self._actual:
+                    break
+            fin = len(self._actual) if faltan < 0 else self._pos + faltan
+            trozo = self._actual[self._pos:fin]
+            self._pos += len(trozo)
+            trozos.append(trozo)
+            if faltan > 0:
+                faltan -= len(trozo)
+        datos = b"".join(trozos)
+        self._leidos += len(datos)
+        return datos
+
+
+def leer_bloques(f, inicio, largo, al_leer=None, cancelado=None, tam_bloque=TAM_BLOQUE):
+    """Genera `largo` bytes de `f` desde `inicio`, en bloques de tam_bloque.
+
+    Antes de cada bloque consulta cancelado() y después avisa el total leído
+    con al_leer(leidos).
+    """
+    f.seek(inicio)
+    leidos = 0
+    while leidos < largo:
+        if cancelado and cancelado():
+            raise CargaCancelada("Carga cancelada")
+        bloque = f.read(min(tam_bloque, largo - leidos))
+        if not bloque:
+            raise ArchivoModificado("El archivo cambió de tamaño durante la carga")
+        leidos += len(bloque)
+        yield bloque
+        if al_leer:
+            al_leer(leidos)
+
+
+class MultipartPdf(LectorPorBloques):
+    """Cuerpo multipart con un único campo de archivo, leído del disco por bloques."""
+
+    def __init__(self, f, nombre, campo="archivo", al_leer=None, cancelado=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        tamano = os.fstat(f.fileno()).st_size
+        nombre = nombre.replace('"', "%22")
+        cabecera = (f"--{self.boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{campo}"; filename="{nombre}"\r\n'
+                    "Content-Type: application/pdf\r\n\r\n").encode("utf-8")
+        cierre = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+
+        def partes():
+            yield cabecera
+            yield from leer_bloques(f, 0, tamano, al_leer, cancelado)
+            yield cierre
+
+        super().__init__(partes, len(cabecera) + tamano + len(cierre))
+
+
+class AvisoProgreso:
+    """Llama a emitir(enviados) como mucho cada INTERVALO_PROGRESO segundos (y siempre al final)."""
+
+    def __init__(self, emitir, total):
+        self.emitir = emitir
+        self.total = total
+        self._ultimo = 0.0
+
+    def __call__(self, enviados):
+        ahora = time.monotonic()
+        if enviados >= self.total or ahora - self._ultimo >= INTERVALO_PROGRESO:
+            self._ultimo = ahora
+            self.emitir(enviados)
+
+
+def subir_por_partes(api, f, nombre, timeout, carga_id=None, al_crear=None, al_leer=None,
+                     cancelado=None, tam_parte=TAM_PARTE, sha256=None):
+    """Sube `f` con el protocolo de carga por partes y devuelve la respuesta de /completar.
+
+    Si se indica carga_id se pregunta al servidor cuánto recibió y se sigue
+    desde ahí; si ya no la conoce (404) se empieza una carga nueva. al_crear
+    recibe el id de cada carga nueva para poder reanudarla más adelante.
+    """
+    tamano = os.fstat(f.fileno()).st_size
+    recibido = None
+    if carga_id:
+        r = api.get(f"/cargas-pdf/{carga_id}")
+        if r.status_code == 200:
+            recibido = r.json().get("recibido", 0)
+        elif r.status_code != 404:
+            r.raise_for_status()
+    if recibido is None:
+        datos = {"nombre": nombre, "tamano": tamano}
+        if sha256:
+            datos["sha256"] = sha256
+        r = api.post("/cargas-pdf", json=datos)
+        r.raise_for_status()
+        datos = r.json()
+        carga_id, recibido = datos["id"], 0
+        tam_parte = datos.get("tam_parte") or tam_parte
+        if al_crear:
+            al_crear(carga_id)
+
+    resincronizaciones = 0
+    while recibido < tamano:
+        largo = min(tam_parte, tamano - recibido)
+        parte = LectorPorBloques(
+            lambda inicio=recibido, largo=largo: leer_bloques(
+                f, inicio, largo, al_leer and (lambda leidos: al_leer(inicio + leidos)), cancelado),
+            largo)
+        r = api.put(f"/cargas-pdf/{carga_id}", params={"offset": recibido}, data=parte,
+                    headers={"Content-Type": "application/octet-stream"}, timeout=timeout)
+        if r.status_code == 409:
+            # El servidor tiene otra posición (p. ej. una parte anterior llegó dos veces)
+            resincronizaciones += 1
+            if resincronizaciones > MAX_RESINCRONIZACIONES:
+                import requests  # ya cargado por el cliente
+
+                raise requests.HTTPError(
+                    f"409: el servidor no acepta la parte en la posición que indica ({recibido}) "
+                    f"tras {MAX_RESINCRONIZACIONES} intentos", response=r)
+            recibido = r.json().get("recibido", 0)
+            continue
+        resincronizaciones = 0
+        r.raise_for_status()
+        recibido = r.json().get("recibido", recibido + largo)
+
+    if cancelado and cancelado():
+        raise CargaCancelada("Carga cancelada")
+    return api.post(f"/cargas-pdf/{carga_id}/completar", timeout=timeout)
@@ -0,0 +1,101 @@
+"""Registro local de los documentos ya cargados, por huella SHA-256.
+
+Cada PDF subido con éxito queda anotado con la huella de su contenido y el
+servidor al que se subió, para avisar u omitir la carga si el mismo
+contenido vuelve a seleccionarse (aunque tenga otro nombre o ruta). También
+se recuerda la huella de cada ruta (por tamaño y fecha de modificación) para
+no volver a leer archivos que no cambiaron.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from local_data import data_dir
+from streaming_upload import CargaCancelada, TAM_BLOQUE
+
+
+def ruta_manifiesto():
+    return os.path.join(data_dir(), "documentos_cargados.sqlite3")
+
+
+def sha256_archivo(ruta, cancelado=None, tam_bloque=TAM_BLOQUE):
+    """Huella SHA-256 del archivo, leído por bloques (memoria constante)."""
+    huella = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        while True:
+            if cancelado and cancelado():
+                raise CargaCancelada("Cálculo de huella cancelado")
+            bloque = f.read(tam_bloque)
+            if not bloque:
+                return huella.hexdigest()
+            huella.update(bloque)
+
+
+class UploadManifest:
+    def __init__(self, servidor, path=None):
+        self.servidor = servidor
+        self.path = path or ruta_manifiesto()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documentos (
+                    servidor TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    nombre TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    cargado REAL NOT NULL,
+                    PRIMARY KEY (servidor, sha256)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS huellas (
+                    ruta TEXT PRIMARY KEY,
+                    tamano INTEGER NOT NULL,
+                    modificado INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL
+                )
+            """)
+
+    def huella(self, ruta, cancelado=None):
+        """SHA-256 de `ruta`, reutilizando la calculada antes si el archivo no cambió."""
+        info = os.stat(ruta)
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT sha256 FROM huellas WHERE ruta = ? AND tamano = ? AND modificado = ?",
+                (ruta, info.st_size, info.st_mtime_ns),
+            ).fetchone()
+        if fila:
+            return fila[0]
+        sha = sha256_archivo(ruta, cancelado)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO huellas (ruta, tamano, modificado, sha256) VALUES (?, ?, ?, ?)",
+                (ruta, info.st_size, info.st_mtime_ns, sha),
+            )
+        return sha
+
+    def get(self, sha256):
+        """Datos de la carga anterior de ese contenido en este servidor, o None."""
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT nombre, tamano, cargado FROM documentos WHERE servidor = ? AND sha256 = ?",
+                (self.servidor, sha256),
+            ).fetchone()
+        if fila is None:
+            return None
+        return {"nombre": fila[0], "tamano": fila[1], "cargado": fila[2]}
+
+    def add(self, sha256, nombre, tamano):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documentos (servidor, sha256, nombre, tamano, cargado) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.servidor, sha256, nombre, tamano, time.time()),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,510 @@
+"""Cola de carga de PDFs para la ventana de documentos.
+
+UploadQueueModel guarda un archivo por fila (tamaño, estado, intentos y
+detalle) y UploadQueue lo va subiendo a /cargar-documento-pdf en segundo
+plano, con un máximo de cargas simultáneas configurable. Los fallos de red o
+del servidor (5xx) se reintentan solos con espera creciente; el resto queda
+marcado como error y se puede reintentar a mano.
+
+El cuerpo de cada carga se lee del disco por bloques (streaming_upload), de
+modo que el progreso por archivo es real y la carga se puede cancelar.
+
+Antes de subir se calcula en segundo plano la huella SHA-256 de cada archivo;
+el contenido que ya figura en el registro local (upload_manifest) o en la
+misma cola se omite o se sube con aviso, según la opción elegida.
+"""
+import os
+import time
+from datetime import datetime
+
+from PyQt6.QtWidgets import QApplication, QStyledItemDelegate, QStyle, QStyleOptionProgressBar
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QThreadPool, QTimer, pyqtSignal
+
+from api_client import TIMEOUT_CONEXION
+from workers import Worker, start
+from streaming_upload import (MultipartPdf, AvisoProgreso, CargaCancelada, archivo_modificado, subir_por_partes,
+                              TAM_PARTE)
+
+# El servidor procesa el PDF completo antes de responder
+TIMEOUT_CARGA = 600
+
+CONCURRENCIA_CARGA = int(os.environ.get("BOXIA_CONCURRENCIA_CARGA", 3))
+MAX_CONCURRENCIA_CARGA = 8
+
+# Intentos automáticos por archivo y espera (s) antes del segundo; se duplica en cada uno
+MAX_INTENTOS = 3
+ESPERA_REINTENTO_CARGA = 2.0
+
+CALCULANDO, PENDIENTE, SUBIENDO, ESPERANDO, CARGADO, DUPLICADO, ERROR = (
+    "calculando", "pendiente", "subiendo", "esperando", "cargado", "duplicado", "error")
+TEXTO_ESTADO = {
+    CALCULANDO: "🔎 Calculando huella",
+    PENDIENTE: "⏳ Pendiente",
+    SUBIENDO: "📤 Subiendo",
+    ESPERANDO: "🔁 Reintento en espera",
+    CARGADO: "✅ Cargado",
+    DUPLICADO: "⏭️ Ya cargado",
+    ERROR: "❌ Error",
+}
+
+
+class ErrorCarga(Exception):
+    def __init__(self, mensaje, reintentable=False):
+        super().__init__(mensaje)
+        self.reintentable = reintentable
+
+
+def buscar_pdfs(carpeta):
+    """Rutas de todos los PDF bajo `carpeta` (recursivo), ordenadas."""
+    rutas = []
+    for raiz, carpetas, archivos in os.walk(carpeta):
+        carpetas.sort()
+        rutas.extend(os.path.join(raiz, a) for a in sorted(archivos) if a.lower().endswith(".pdf"))
+    return rutas
+
+
+def formatear_tamano(bytes_):
+    for unidad in ("B", "KB", "MB"):
+        if bytes_ < 1024:
+            return f"{bytes_:.0f} {unidad}" if unidad == "B" else f"{bytes_:.1f} {unidad}"
+        bytes_ /= 1024
+    return f"{bytes_:.1f} GB"
+
+
+def calcular_huellas(worker, manifest, rutas):
+    """Calcula la huella de cada ruta y emite ("huella", ruta, sha256, error) al terminar cada una."""
+    for ruta in rutas:
+        try:
+            sha, error = manifest.huella(ruta, worker.is_cancelled), ""
+        except OSError as e:
+            sha, error = None, f"No se pudo leer el archivo: {e}"
+        worker.signals.progreso.emit((ruta, sha, error))
+
+
+def describir_carga_previa(previa):
+    fecha = datetime.fromtimestamp(previa["cargado"]).strftime("%Y-%m-%d %H:%M")
+    return f"Mismo contenido ya cargado el {fecha} como {previa['nombre']}"
+
+
+def subir_pdf(worker, api, ruta, carga_id=None, sha256=None, consultar_servidor=False):
+    """Sube un PDF; devuelve (CARGADO, mensaje) o (DUPLICADO, mensaje).
+
+    Con consultar_servidor, si el servidor anuncia "consulta_hash" en
+    /capacidades, antes de enviar nada se le pregunta si ya tiene ese
+    contenido. Lanza ErrorCarga si falla.
+
+    Emite por worker.signals.progreso ("enviados", bytes) y, si la carga es
+    por partes, ("carga_id", id) para poder reanudarla en otro intento.
+    """
+    import requests  # ya cargado por el cliente; no se importa al abrir la ventana
+
+    nombre = os.path.basename(ruta)
+    timeout = (TIMEOUT_CONEXION, TIMEOUT_CARGA)
+    try:
+        if sha256 and consultar_servidor and api.capabilities().get("consulta_hash"):
+            r = api.get(f"/documentos/{sha256}")
+            if r.status_code == 200:
+                return DUPLICADO, f"El servidor ya tiene este contenido ({r.json().get('nombre', 'sin nombre')})"
+            if r.status_code != 404:
+                r.raise_for_status()
+        with open(ruta, "rb") as f:
+            tamano = os.fstat(f.fileno()).st_size
+            aviso = AvisoProgreso(lambda enviados: worker.signals.progreso.emit(("enviados", enviados)), tamano)
+            if tamano > TAM_PARTE and api.capabilities().get("carga_por_partes"):
+                r = subir_por_partes(
+                    api, f, nombre, timeout, carga_id, sha256=sha256,
+                    al_crear=lambda nuevo_id: worker.signals.progreso.emit(("carga_id", nuevo_id)),
+                    al_leer=aviso, cancelado=worker.is_cancelled)
+            else:
+                cuerpo = MultipartPdf(f, nombre, al_leer=aviso, cancelado=worker.is_cancelled)
+                headers = {"Content-Type": cuerpo.content_type}
+                if sha256:
+                    headers["X-Contenido-SHA256"] = sha256
+                r = api.post("/cargar-documento-pdf", data=cuerpo, headers=headers, timeout=timeout)
+    except CargaCancelada:
+        raise
+    except requests.HTTPError as e:
+        raise ErrorCarga(str(e)[:300], reintentable=e.response is None or e.response.status_code >= 500) from e
+    except requests.RequestException as e:
+        # Un archivo que cambió al leer el cuerpo llega como error de conexión: no se reintenta
+        modificado = archivo_modificado(e)
+        if modificado is not None:
+            raise ErrorCarga(f"No se pudo leer el archivo: {modificado}") from e
+        # Va antes que OSError: las excepciones de requests también lo son
+        raise ErrorCarga(f"Sin conexión con el servidor: {e}", reintentable=True) from e
+    except OSError as e:
+        raise ErrorCarga(f"No se pudo leer el archivo: {e}") from e
+    if r.status_code != 200:
+        try:
+            detalle = r.json().get("detail") or r.text
+        except ValueError:
+            detalle = r.text
+        raise ErrorCarga(f"HTTP {r.status_code}: {detalle}"[:300], reintentable=r.status_code >= 500)
+    try:
+        return CARGADO, r.json().get("mensaje", "Documento cargado correctamente.")
+    except (ValueError, AttributeError):
+        return CARGADO, "Documento cargado correctamente."
+
+
+class UploadQueueModel(QAbstractTableModel):
+    COLUMNAS = [("nombre", "Archivo"), ("tamano", "Tamaño"), ("estado", "Estado"),
+                ("progreso", "Progreso"), ("intentos", "Intentos"), ("detalle", "Detalle")]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._archivos = []
+        self._rutas = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._archivos)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNAS[section][1]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        archivo = self._archivos[index.row()]
+        clave = self.COLUMNAS[index.column()][0]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if clave == "tamano":
+                return formatear_tamano(archivo["tamano"])
+            if clave == "estado":
+                return TEXTO_ESTADO[archivo["estado"]]
+            if clave == "progreso":
+                return self.progreso(index.row())
+            return str(archivo[clave])
+        if role == Qt.ItemDataRole.ToolTipRole and clave in {"nombre", "detalle"}:
+            return archivo["ruta"] if clave == "nombre" else archivo["detalle"]
+        return None
+
+    def add_files(self, rutas):
+        """Agrega a la cola los archivos que no estén ya; devuelve las rutas agregadas.
+
+        Las filas nuevas quedan en CALCULANDO hasta que se conoce su huella.
+        """
+        nuevos = []
+        for ruta in rutas:
+            ruta = os.path.abspath(ruta)
+            if ruta in self._rutas:
+                continue
+            try:
+                tamano = os.path.getsize(ruta)
+            except OSError:
+                continue
+            self._rutas.add(ruta)
+            nuevos.append({
+                "ruta": ruta, "nombre": os.path.basename(ruta), "tamano": tamano,
+                "estado": CALCULANDO, "intentos": 0, "detalle": "", "enviados": 0,
+                "carga_id": None, "sha256": None, "aviso_duplicado": False,
+            })
+        if nuevos:
+            inicio = len(self._archivos)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevos) - 1)
+            self._archivos.extend(nuevos)
+            self.endInsertRows()
+        return [a["ruta"] for a in nuevos]
+
+    def archivo(self, fila):
+        return self._archivos[fila]
+
+    def actualizar(self, fila, **campos):
+        self._archivos[fila].update(campos)
+        self.dataChanged.emit(self.index(fila, 0), self.index(fila, len(self.COLUMNAS) - 1))
+
+    def progreso(self, fila):
+        archivo = self._archivos[fila]
+        if archivo["estado"] == CARGADO:
+            return 100
+        if not archivo["tamano"]:
+            return 0
+        return int(100 * archivo["enviados"] / archivo["tamano"])
+
+    def filas_en(self, *estados):
+        return [i for i, a in enumerate(self._archivos) if a["estado"] in estados]
+
+    def fila_de(self, ruta):
+        for i, a in enumerate(self._archivos):
+            if a["ruta"] == ruta:
+                return i
+        return -1
+
+    def con_huella(self, sha256, excluir=None):
+        """Otro archivo de la cola con el mismo contenido que no haya fallado ni se haya omitido."""
+        for a in self._archivos:
+            if a is not excluir and a["sha256"] == sha256 and a["estado"] not in (ERROR, DUPLICADO):
+                return a
+        return None
+
+    def clear_finished(self):
+        """Quita de la lista los archivos ya cargados u omitidos por duplicados."""
+        for fila in reversed(self.filas_en(CARGADO, DUPLICADO)):
+            self.beginRemoveRows(QModelIndex(), fila, fila)
+            self._rutas.discard(self._archivos.pop(fila)["ruta"])
+            self.endRemoveRows()
+
+    def totales(self):
+        """(archivos, cargados, errores, omitidos, bytes totales, bytes cargados).
+
+        Los omitidos por duplicados no cuentan en los bytes.
+        """
+        cargados = errores = omitidos = bytes_cargados = bytes_totales = 0
+        for a in self._archivos:
+            if a["estado"] == DUPLICADO:
+                omitidos += 1
+                continue
+            bytes_totales += a["tamano"]
+            if a["estado"] == CARGADO:
+                cargados += 1
+                bytes_cargados += a["tamano"]
+            elif a["estado"] == ERROR:
+                errores += 1
+            else:
+                bytes_cargados += a["enviados"]
+        return len(self._archivos), cargados, errores, omitidos, bytes_totales, bytes_cargados
+
+
+class ProgressDelegate(QStyledItemDelegate):
+    """Dibuja la columna "Progreso" como una barra, sin widgets por fila."""
+
+    def paint(self, painter, option, index):
+        opcion = QStyleOptionProgressBar()
+        opcion.rect = option.rect.adjusted(4, 6, -4, -6)
+        opcion.minimum = 0
+        opcion.maximum = 100
+        opcion.progress = int(index.data() or 0)
+        opcion.text = f"{opcion.progress}%"
+        opcion.textVisible = True
+        opcion.state = option.state | QStyle.StateFlag.State_Horizontal
+        QApplication.style().drawControl(QStyle.ControlElement.CE_ProgressBar, opcion, painter)
+
+
+class UploadQueue(QObject):
+    """Reparte las filas pendientes de un UploadQueueModel entre N cargas simultáneas.
+
+    Emite cambio cada vez que un archivo cambia de estado y terminado cuando
+    ya no queda nada pendiente ni en curso.
+    """
+
+    cambio = pyqtSignal()
+    terminado = pyqtSignal()
+
+    def __init__(self, api, model, manifest, concurrencia=CONCURRENCIA_CARGA, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.model = model
+        self.manifest = manifest
+        self.omitir_duplicados = True
+        self.pool = QThreadPool(self)
+        self._activos = {}
+        self._en_marcha = False
+        self._inicio = None
+        self._fin = None
+        self._bytes_sesion = 0
+        self._docs_sesion = 0
+        self.set_concurrencia(concurrencia)
+
+    def set_concurrencia(self, n):
+        self.concurrencia = max(1, min(int(n), MAX_CONCURRENCIA_CARGA))
+        self.pool.setMaxThreadCount(self.concurrencia)
+        self._despachar()
+
+    def en_marcha(self):
+        return self._en_marcha
+
+    def agregar(self, rutas):
+        """Agrega rutas a la cola y calcula sus huellas en segundo plano; devuelve cuántas se agregaron."""
+        nuevas = self.model.add_files(rutas)
+        if nuevas:
+            self._calcular_huellas(nuevas)
+        return len(nuevas)
+
+    def _calcular_huellas(self, rutas):
+        # Un solo hilo para las huellas: leer varios archivos a la vez no acelera el disco
+        worker = Worker(calcular_huellas, self.manifest, rutas)
+        worker.signals.progreso.connect(lambda p: self._on_huella(*p))
+        start(worker)
+
+    def set_omitir_duplicados(self, omitir):
+        """Cambia la política para los duplicados ya detectados que aún no se subieron."""
+        self.omitir_duplicados = omitir
+        estados = (PENDIENTE,) if omitir else (DUPLICADO,)
+        for fila in self.model.filas_en(*estados):
+            archivo = self.model.archivo(fila)
+            if archivo.get("aviso_duplicado") and archivo["intentos"] == 0:
+                self.model.actualizar(fila, estado=DUPLICADO if omitir else PENDIENTE)
+        self._siguiente()
+
+    def iniciar(self):
+        if not self.model.filas_en(CALCULANDO, PENDIENTE, ESPERANDO) and not self._activos:
+            return False
+        if not self._en_marcha:
+            self._en_marcha = True
+            self._inicio, self._fin = time.monotonic(), None
+            self._bytes_sesion = self._docs_sesion = 0
+        self._despachar()
+        self.cambio.emit()
+        return True
+
+    def detener(self):
+        """Cancela las cargas en curso y deja todo lo no cargado como pendiente.
+
+        Una carga cuyo cuerpo ya se envió no se corta: el servidor puede
+        aceptar el archivo igual, así que se espera su respuesta (ver
+        _on_terminado) y mientras tanto sigue contando como activa.
+        """
+        self._en_marcha = False
+        for archivo, worker in self._activos.values():
+            worker.cancel()
+            fila = self._fila(archivo)
+            if fila >= 0:
+                self.model.actualizar(fila, detalle="Cancelando…")
+        for fila in self.model.filas_en(ESPERANDO):
+            self.model.actualizar(fila, estado=PENDIENTE)
+        self._cerrar_sesion()
+        self.cambio.emit()
+
+    def reintentar_fallidos(self):
+        sin_huella = []
+        for fila in self.model.filas_en(ERROR):
+            archivo = self.model.archivo(fila)
+            if archivo["sha256"] is None:
+                sin_huella.append(archivo["ruta"])
+            self.model.actualizar(fila, estado=CALCULANDO if archivo["sha256"] is None else PENDIENTE,
+                                  intentos=0, detalle="")
+        if sin_huella:
+            self._calcular_huellas(sin_huella)
+        return self.iniciar()
+
+    def rendimiento(self):
+        """(MB/s, documentos/min) de la sesión de carga actual o de la última."""
+        if self._inicio is None:
+            return 0.0, 0.0
+        transcurrido = max((self._fin or time.monotonic()) - self._inicio, 1e-6)
+        return self._bytes_sesion / transcurrido / 1e6, self._docs_sesion * 60 / transcurrido
+
+    def _despachar(self):
+        if not self._en_marcha:
+            return
+        for fila in self.model.filas_en(PENDIENTE):
+            if len(self._activos) >= self.concurrencia:
+                break
+            self._iniciar_carga(fila)
+
+    def _iniciar_carga(self, fila):
+        archivo = self.model.archivo(fila)
+        # Solo una carga por partes retoma lo ya enviado; el multipart empieza de cero
+        enviados = archivo["enviados"] if archivo["carga_id"] else 0
+        self.model.actualizar(fila, estado=SUBIENDO, intentos=archivo["intentos"] + 1, detalle="", enviados=enviados)
+        worker = Worker(subir_pdf, self.api, archivo["ruta"], archivo["carga_id"], archivo["sha256"],
+                        self.omitir_duplicados)
+        self._activos[archivo["ruta"]] = (archivo, worker)
+        worker.signals.progreso.connect(lambda p, a=archivo: self._on_progreso(a, *p))
+        worker.signals.resultado.connect(lambda r, a=archivo: self._on_cargado(a, *r))
+        worker.signals.error.connect(lambda e, a=archivo: self._on_error(a, e))
+        worker.signals.terminado.connect(lambda a=archivo, w=worker: self._on_terminado(a, w))
+        start(worker, self.pool)
+
+    def _fila(self, archivo):
+        # Las filas pueden moverse si se limpian los cargados mientras tanto
+        for fila in self.model.filas_en(archivo["estado"]):
+            if self.model.archivo(fila) is archivo:
+                return fila
+        return -1
+
+    def _on_huella(self, ruta, sha, error):
+        fila = self.model.fila_de(ruta)
+        if fila < 0 or self.model.archivo(fila)["estado"] != CALCULANDO:
+            return
+        archivo = self.model.archivo(fila)
+        if error:
+            self.model.actualizar(fila, estado=ERROR, detalle=error)
+        else:
+            previa = self.manifest.get(sha)
+            if previa is not None:
+                aviso = describir_carga_previa(previa)
+            else:
+                en_cola = self.model.con_huella(sha, excluir=archivo)
+                aviso = f"Mismo contenido que {en_cola['nombre']}, en esta cola" if en_cola else ""
+            self.model.actualizar(
+                fila, sha256=sha, aviso_duplicado=bool(aviso),
+                estado=DUPLICADO if aviso and self.omitir_duplicados else PENDIENTE,
+                detalle=f"⚠️ {aviso}" if aviso else "")
+        self._siguiente()
+
+    def _on_progreso(self, archivo, tipo, valor):
+        if archivo["ruta"] not in self._activos:
+            return
+        if tipo == "carga_id":
+            archivo["carga_id"] = valor
+            return
+        fila = self._fila(archivo)
+        if fila >= 0:
+            self.model.actualizar(fila, enviados=valor)
+
+    def _on_cargado(self, archivo, estado, mensaje):
+        self._activos.pop(archivo["ruta"], None)
+        fila = self._fila(archivo)
+        if archivo["aviso_duplicado"] and estado == CARGADO:
+            mensaje = f"{mensaje} ⚠️ Contenido repetido"
+        if fila >= 0:
+            self.model.actualizar(fila, estado=estado, detalle=mensaje, carga_id=None,
+                                  enviados=archivo["tamano"] if estado == CARGADO else 0)
+        # Lo que ya tenía el servidor también se anota para no volver a consultarlo
+        self.manifest.add(archivo["sha256"], archivo["nombre"], archivo["tamano"])
+        if estado == CARGADO:
+            self._bytes_sesion += archivo["tamano"]
+            self._docs_sesion += 1
+        self._siguiente()
+
+    def _on_error(self, archivo, error):
+        self._activos.pop(archivo["ruta"], None)
+        fila = self._fila(archivo)
+        reintentable = getattr(error, "reintentable", False)
+        if fila >= 0:
+            if reintentable and archivo["intentos"] < MAX_INTENTOS and self._en_marcha:
+                espera = ESPERA_REINTENTO_CARGA * 2 ** (archivo["intentos"] - 1)
+                self.model.actualizar(fila, estado=ESPERANDO,
+                                      detalle=f"{error} (reintento en {espera:.0f} s)")
+                QTimer.singleShot(int(espera * 1000), lambda a=archivo: self._reencolar(a))
+            else:
+                self.model.actualizar(fila, estado=ERROR, detalle=str(error))
+        self._siguiente()
+
+    def _on_terminado(self, archivo, worker):
+        # Solo las cargas canceladas: el resto ya terminó por _on_cargado o _on_error
+        if not worker.is_cancelled() or self._activos.get(archivo["ruta"], (None, None))[1] is not worker:
+            return
+        if worker.resultado is not None:
+            # El servidor respondió aunque se canceló: se anota para no volver a subirlo
+            self._on_cargado(archivo, *worker.resultado)
+            return
+        self._activos.pop(archivo["ruta"])
+        fila = self._fila(archivo)
+        if fila >= 0:
+            # enviados se conserva: si la carga es por partes se reanuda desde ahí
+            self.model.actualizar(fila, estado=PENDIENTE, detalle="Cancelado")
+        self._siguiente()
+
+    def _reencolar(self, archivo):
+        fila = self._fila(archivo)
+        if fila >= 0 and archivo["estado"] == ESPERANDO:
+            self.model.actualizar(fila, estado=PENDIENTE)
+            self._despachar()
+
+    def _siguiente(self):
+        self._despachar()
+        if not self._activos and (not self._en_marcha or not self.model.filas_en(CALCULANDO, PENDIENTE, ESPERANDO)):
+            self._en_marcha = False
+            self._cerrar_sesion()
+        self.cambio.emit()
+
+    def _cerrar_sesion(self):
+        if self._inicio is not None and self._fin is None and not self._activos:
+            self._fin = time.monotonic()
+            self.terminado.emit()
@@ -1,38 +1,93 @@
 # -*- mode: python ; coding: utf-8 -*-
+import argparse
+import os
+
+# Arranque rápido: pyinstaller BoxIA-Chat.spec -- --onedir
+# Genera la carpeta dist/BoxIA-Chat/ en lugar de un único ejecutable, que en
+# cada inicio se descomprime entero en una carpeta temporal.
+parser = argparse.ArgumentParser()
+parser.add_argument('--onedir', action='store_true')
+opciones = parser.parse_args()
+
+# Módulos que la aplicación no usa: no se empaquetan ni arrastran sus bibliotecas de Qt
+EXCLUIR = [
+    'tkinter', 'unittest', 'pydoc', 'doctest', 'xmlrpc',
+    'numpy', 'pandas', 'PIL',
+    'PyQt6.QtNetwork', 'PyQt6.QtQml', 'PyQt6.QtQuick', 'PyQt6.QtQuickWidgets', 'PyQt6.QtQuick3D',
+    'PyQt6.QtWebEngineCore', 'PyQt6.QtWebEngineWidgets', 'PyQt6.QtWebEngineQuick',
+    'PyQt6.QtWebChannel', 'PyQt6.QtWebSockets', 'PyQt6.QtMultimedia', 'PyQt6.QtMultimediaWidgets',
+    'PyQt6.QtSpatialAudio', 'PyQt6.QtTextToSpeech', 'PyQt6.QtSql', 'PyQt6.QtTest',
+    'PyQt6.QtDesigner', 'PyQt6.QtHelp', 'PyQt6.QtPdf', 'PyQt6.QtPdfWidgets',
+    'PyQt6.QtOpenGL', 'PyQt6.QtOpenGLWidgets', 'PyQt6.QtSvg', 'PyQt6.QtSvgWidgets',
+    'PyQt6.QtPrintSupport', 'PyQt6.QtBluetooth', 'PyQt6.QtNfc', 'PyQt6.QtPositioning',
+    'PyQt6.QtSensors', 'PyQt6.QtSerialPort', 'PyQt6.QtRemoteObjects', 'PyQt6.QtDBus', 'PyQt6.QtXml',
+    'PyQt6.Qt3DCore', 'PyQt6.Qt3DRender', 'PyQt6.Qt3DInput', 'PyQt6.Qt3DLogic', 'PyQt6.Qt3DAnimation',
+    'PyQt6.Qt3DExtras', 'PyQt6.QtCharts', 'PyQt6.QtDataVisualization',
+]
 
 
 a = Analysis(
     ['interfaz_chat.py'],
-    pathex=[],
+    pathex=[os.path.join(SPECPATH, os.pardir, 'Comun')],
     binaries=[],
     datas=[],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUIR,
     noarchive=False,
     optimize=0,
 )
+# Las traducciones de Qt no se usan (los textos de la interfaz ya están en español)
+a.datas = [d for d in a.datas if not d[0].startswith(os.path.join('PyQt6', 'Qt6', 'translations'))]
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='BoxIA-Chat',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
+if opciones.onedir:
+    # Sin UPX: descomprimir cada biblioteca también retrasa el arranque
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='BoxIA-Chat',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        name='BoxIA-Chat',
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='BoxIA-Chat',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=True,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
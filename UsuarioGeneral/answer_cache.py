@@ -0,0 +1,89 @@
+"""Caché local de respuestas de la IA.
+
+Guarda en un SQLite pequeño la respuesta de cada pregunta, indexada por la
+pregunta normalizada (sin mayúsculas, tildes ni espacios repetidos), con
+expiración por antigüedad (TTL) y desalojo de las menos usadas (LRU).
+"""
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from local_data import data_dir
+
+MAX_ENTRADAS = 500
+TTL_SEGUNDOS = 7 * 24 * 3600
+
+
+def ruta_cache():
+    return os.path.join(data_dir(), "cache_respuestas.sqlite3")
+
+
+def normalizar_pregunta(texto):
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+
+class AnswerCache:
+    def __init__(self, path=None, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS):
+        self.path = path or ruta_cache()
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    pregunta TEXT NOT NULL,
+                    respuesta TEXT NOT NULL,
+                    creada REAL NOT NULL,
+                    usada REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_usada ON respuestas(usada)")
+
+    def get(self, pregunta):
+        clave = normalizar_pregunta(pregunta)
+        ahora = time.time()
+        with self._lock, self._conn:
+            fila = self._conn.execute(
+                "SELECT respuesta, creada FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None:
+                return None
+            respuesta, creada = fila
+            if ahora - creada > self.ttl:
+                self._conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                return None
+            self._conn.execute("UPDATE respuestas SET usada = ? WHERE clave = ?", (ahora, clave))
+            return respuesta
+
+    def put(self, pregunta, respuesta):
+        clave = normalizar_pregunta(pregunta)
+        ahora = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, pregunta, respuesta, creada, usada) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (clave, pregunta, respuesta, ahora, ahora),
+            )
+            self._conn.execute(
+                "DELETE FROM respuestas WHERE clave IN ("
+                "SELECT clave FROM respuestas ORDER BY usada DESC LIMIT -1 OFFSET ?)",
+                (self.max_entradas,),
+            )
+
+    def invalidate(self, pregunta):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM respuestas WHERE clave = ?", (normalizar_pregunta(pregunta),))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM respuestas")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
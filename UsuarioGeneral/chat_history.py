@@ -0,0 +1,90 @@
+"""Historial persistente del chat.
+
+Cada mensaje terminado (pregunta, respuesta o respuesta parcial) se guarda en
+un SQLite local. La ventana solo mantiene en memoria los más recientes y pide
+los anteriores por páginas al desplazarse hacia arriba; al abrir el chat se
+leen únicamente los últimos.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from local_data import data_dir
+
+# Mensajes que se conservan en disco; los más antiguos se borran al agregar
+MAX_MENSAJES = 20000
+
+
+def ruta_historial():
+    return os.path.join(data_dir(), "historial_chat.sqlite3")
+
+
+class ChatHistory:
+    def __init__(self, path=None, max_mensajes=MAX_MENSAJES):
+        self.path = path or ruta_historial()
+        self.max_mensajes = max_mensajes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            # Cada mensaje es una escritura desde la interfaz: WAL evita un fsync completo por mensaje
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS mensajes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    remitente TEXT NOT NULL,
+                    texto TEXT NOT NULL,
+                    tooltip TEXT,
+                    creado REAL NOT NULL
+                )
+            """)
+
+    def add(self, remitente, texto, tooltip=None):
+        """Guarda un mensaje y devuelve su id."""
+        with self._lock, self._conn:
+            mensaje_id = self._conn.execute(
+                "INSERT INTO mensajes (remitente, texto, tooltip, creado) VALUES (?, ?, ?, ?)",
+                (remitente, texto, tooltip, time.time()),
+            ).lastrowid
+            # Los id son crecientes: borrar por id no necesita ordenar la tabla
+            self._conn.execute("DELETE FROM mensajes WHERE id <= ?", (mensaje_id - self.max_mensajes,))
+        return mensaje_id
+
+    def update(self, mensaje_id, texto, tooltip=None):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE mensajes SET texto = ?, tooltip = ? WHERE id = ?",
+                               (texto, tooltip, mensaje_id))
+
+    def recientes(self, cantidad):
+        """Los últimos `cantidad` mensajes, del más antiguo al más nuevo, y si hay anteriores."""
+        return self._pagina("SELECT id, remitente, texto, tooltip FROM mensajes "
+                            "ORDER BY id DESC LIMIT ?", (cantidad + 1,), cantidad)
+
+    def anteriores(self, antes_de, cantidad):
+        """Los `cantidad` mensajes previos al id `antes_de`, y si hay más todavía."""
+        return self._pagina("SELECT id, remitente, texto, tooltip FROM mensajes WHERE id < ? "
+                            "ORDER BY id DESC LIMIT ?", (antes_de, cantidad + 1), cantidad)
+
+    def posteriores(self, despues_de, cantidad):
+        """Los `cantidad` mensajes siguientes al id `despues_de`, y si hay más todavía."""
+        mensajes, hay_mas = self._pagina("SELECT id, remitente, texto, tooltip FROM mensajes WHERE id > ? "
+                                         "ORDER BY id LIMIT ?", (despues_de, cantidad + 1), cantidad)
+        # _pagina invierte el orden pensando en consultas descendentes
+        return mensajes[::-1], hay_mas
+
+    def _pagina(self, sql, params, cantidad):
+        with self._lock:
+            filas = self._conn.execute(sql, params).fetchall()
+        mensajes = [{"id": f[0], "remitente": f[1], "texto": f[2], "tooltip": f[3]}
+                    for f in reversed(filas[:cantidad])]
+        return mensajes, len(filas) > cantidad
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM mensajes")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
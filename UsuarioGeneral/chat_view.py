@@ -0,0 +1,330 @@
+"""Modelo y delegado del historial del chat.
+
+El historial se muestra en un QListView: cada mensaje es una fila del
+ChatModel y ChatDelegate lo dibuja directamente, sin crear widgets. Solo se
+pintan las filas visibles y los tamaños calculados se guardan en caché, así
+que agregar un mensaje no depende de cuántos haya en la conversación.
+
+Con una ventana (ventana=N) el modelo conserva alrededor de N mensajes: al
+agregar, los más antiguos se descartan (siguen en el historial guardado) y
+se vuelven a cargar con prepend() al subir; al cargar los antiguos se
+descartan los más nuevos, que vuelven con append_historial() al bajar.
+"""
+from PyQt6.QtWidgets import QStyledItemDelegate
+from PyQt6.QtGui import QColor, QFont, QFontMetrics
+from PyQt6.QtCore import Qt, QAbstractListModel, QEvent, QModelIndex, QRect, QSize, pyqtSignal
+
+MARGEN = 10
+PADDING = 10
+ANCHO_ICONO = 44
+ALTO_BOTON = 28
+TEXTO_BOTON = "📩 Reportar respuesta"
+FLAGS_TEXTO = Qt.TextFlag.TextWordWrap.value
+
+ICONOS = {"bot": ("🤖", 24), "respuesta": ("💬", 30)}
+
+# Mensajes de más que se toleran sobre la ventana antes de descartar los antiguos,
+# para no reordenar la vista en cada mensaje nuevo
+MARGEN_VENTANA = 50
+
+
+class ChatModel(QAbstractListModel):
+    """Mensajes de la conversación.
+
+    remitente es "user" (pregunta), "bot" (aviso o marcador de espera) o
+    "respuesta" (respuesta de la IA). Solo una respuesta, la última, muestra
+    el botón de reporte. Cada mensaje tiene un uid fijo (las filas cambian al
+    cargar o descartar mensajes antiguos) y el id del historial si ya se guardó.
+    """
+
+    MensajeRole = Qt.ItemDataRole.UserRole + 1
+    ReportableRole = Qt.ItemDataRole.UserRole + 2
+
+    def __init__(self, parent=None, ventana=None):
+        super().__init__(parent)
+        self._mensajes = []
+        self._fila_reportable = -1
+        self._siguiente_uid = 0
+        self.ventana = ventana
+        self.hay_anteriores = False
+        self.hay_posteriores = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._mensajes)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        mensaje = self._mensajes[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return mensaje["texto"]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return mensaje.get("tooltip") or None
+        if role == self.MensajeRole:
+            return mensaje
+        if role == self.ReportableRole:
+            return index.row() == self._fila_reportable
+        return None
+
+    def mensaje(self, fila):
+        return self._mensajes[fila]
+
+    def fila_reportable(self):
+        return self._fila_reportable
+
+    def uid(self, fila):
+        return self._mensajes[fila]["uid"]
+
+    def fila_de(self, uid):
+        # Los mensajes que se buscan (el que se está respondiendo) están al final
+        for fila in range(len(self._mensajes) - 1, -1, -1):
+            if self._mensajes[fila]["uid"] == uid:
+                return fila
+        return -1
+
+    def primer_id(self):
+        """id en el historial del mensaje más antiguo cargado."""
+        return next((m["id"] for m in self._mensajes if m.get("id") is not None), None)
+
+    def ultimo_id(self):
+        """id en el historial del mensaje más nuevo cargado."""
+        return next((m["id"] for m in reversed(self._mensajes) if m.get("id") is not None), None)
+
+    def asignar_id(self, fila, mensaje_id):
+        # No cambia nada visible: no se emite dataChanged
+        self._mensajes[fila]["id"] = mensaje_id
+
+    def append(self, remitente, texto, **campos):
+        self._recortar()
+        fila = len(self._mensajes)
+        self.beginInsertRows(QModelIndex(), fila, fila)
+        self._mensajes.append(self._nuevo_mensaje(remitente, texto, campos))
+        self.endInsertRows()
+        return fila
+
+    def actualizar(self, fila, **campos):
+        self._mensajes[fila].update(campos)
+        indice = self.index(fila)
+        self.dataChanged.emit(indice, indice)
+
+    def set_reportable(self, fila):
+        anterior = self._fila_reportable
+        self._fila_reportable = fila
+        for f in (anterior, fila):
+            if 0 <= f < len(self._mensajes):
+                indice = self.index(f)
+                self.dataChanged.emit(indice, indice, [self.ReportableRole])
+
+    def remove_last(self):
+        if not self._mensajes:
+            return
+        fila = len(self._mensajes) - 1
+        self.beginRemoveRows(QModelIndex(), fila, fila)
+        self._mensajes.pop()
+        if self._fila_reportable == fila:
+            self._fila_reportable = -1
+        self.endRemoveRows()
+
+    def clear(self):
+        self.set_mensajes([], False)
+
+    def set_mensajes(self, mensajes, hay_anteriores):
+        """Reemplaza el contenido por mensajes del historial ({id, remitente, texto, tooltip})."""
+        self.beginResetModel()
+        self._mensajes = [self._desde_historial(m) for m in mensajes]
+        self._fila_reportable = -1
+        self.hay_anteriores = hay_anteriores
+        self.hay_posteriores = False
+        self.endResetModel()
+
+    def prepend(self, mensajes, hay_anteriores):
+        """Agrega al principio mensajes más antiguos del historial."""
+        self.hay_anteriores = hay_anteriores
+        if not mensajes:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(mensajes) - 1)
+        self._mensajes[:0] = [self._desde_historial(m) for m in mensajes]
+        if self._fila_reportable >= 0:
+            self._fila_reportable += len(mensajes)
+        self.endInsertRows()
+        self._recortar_final()
+
+    def append_historial(self, mensajes, hay_posteriores):
+        """Agrega al final mensajes más nuevos del historial, descartados al subir."""
+        self.hay_posteriores = hay_posteriores
+        if not mensajes:
+            return
+        self._recortar()
+        fila = len(self._mensajes)
+        self.beginInsertRows(QModelIndex(), fila, fila + len(mensajes) - 1)
+        self._mensajes.extend(self._desde_historial(m) for m in mensajes)
+        self.endInsertRows()
+
+    def _recortar_final(self):
+        # Un mensaje sin id (la respuesta en curso) todavía no está en el historial: no se descarta
+        if (not self.ventana or len(self._mensajes) < self.ventana + MARGEN_VENTANA
+                or self._mensajes[-1].get("id") is None):
+            return
+        self.beginRemoveRows(QModelIndex(), self.ventana, len(self._mensajes) - 1)
+        del self._mensajes[self.ventana:]
+        if self._fila_reportable >= self.ventana:
+            self._fila_reportable = -1
+        self.hay_posteriores = True
+        self.endRemoveRows()
+
+    def _recortar(self):
+        if not self.ventana or len(self._mensajes) < self.ventana + MARGEN_VENTANA:
+            return
+        sobran = len(self._mensajes) - self.ventana
+        self.beginRemoveRows(QModelIndex(), 0, sobran - 1)
+        del self._mensajes[:sobran]
+        self._fila_reportable = self._fila_reportable - sobran if self._fila_reportable >= sobran else -1
+        self.hay_anteriores = True
+        self.endRemoveRows()
+
+    def _desde_historial(self, mensaje):
+        return self._nuevo_mensaje(mensaje["remitente"], mensaje["texto"],
+                                   {"id": mensaje["id"], "tooltip": mensaje.get("tooltip")})
+
+    def _nuevo_mensaje(self, remitente, texto, campos):
+        self._siguiente_uid += 1
+        mensaje = {"uid": self._siguiente_uid, "remitente": remitente, "texto": texto}
+        mensaje.update(campos)
+        return mensaje
+
+
+class ChatDelegate(QStyledItemDelegate):
+    """Dibuja las burbujas del chat y el botón "Reportar respuesta"."""
+
+    reportar = pyqtSignal(QModelIndex)
+
+    def __init__(self, view, model):
+        super().__init__(view)
+        self._view = view
+        self._model = model
+        self._cache = {}
+        self._tamanos = {}
+        # Los mensajes que salen del modelo no deben quedar en las cachés
+        model.rowsAboutToBeRemoved.connect(self._olvidar_filas)
+        model.modelReset.connect(self.clear_cache)
+
+    # --- geometría ----------------------------------------------------------
+
+    def _ancho_texto(self, ancho, remitente):
+        ancho -= 2 * MARGEN + 2 * PADDING
+        if remitente != "user":
+            ancho -= ANCHO_ICONO
+        return max(50, ancho)
+
+    def _caja_texto(self, mensaje, ancho_texto, fm):
+        clave = (mensaje["texto"], ancho_texto)
+        guardado = self._cache.get(mensaje["uid"])
+        if guardado is not None and guardado[0] == clave:
+            return guardado[1]
+        caja = fm.boundingRect(QRect(0, 0, ancho_texto, 1_000_000), FLAGS_TEXTO, mensaje["texto"]).size()
+        self._cache[mensaje["uid"]] = (clave, caja)
+        return caja
+
+    def _geometria(self, rect, mensaje, reportable, fm):
+        remitente = mensaje["remitente"]
+        ancho_texto = self._ancho_texto(rect.width(), remitente)
+        caja = self._caja_texto(mensaje, ancho_texto, fm)
+        alto = max(caja.height(), fm.height()) + 2 * PADDING
+
+        if remitente == "user":
+            burbuja = QRect(rect.left() + MARGEN, rect.top() + MARGEN, rect.width() - 2 * MARGEN, alto)
+            return burbuja, None, None
+
+        icono = QRect(rect.left() + MARGEN, rect.top() + MARGEN, ANCHO_ICONO, ANCHO_ICONO)
+        burbuja = QRect(icono.right() + 1, rect.top() + MARGEN, caja.width() + 2 * PADDING, alto)
+        boton = None
+        if reportable:
+            ancho_boton = fm.horizontalAdvance(TEXTO_BOTON) + 2 * PADDING
+            boton = QRect(burbuja.left() + PADDING, burbuja.bottom() + 1, ancho_boton, ALTO_BOTON)
+        return burbuja, icono, boton
+
+    def sizeHint(self, option, index):
+        # El QListView pide el tamaño de todas las filas en cada reordenamiento;
+        # se responde desde la caché sin pasar por QVariant ni recalcular el texto.
+        fila = index.row()
+        mensaje = self._model.mensaje(fila)
+        clave = (mensaje["texto"], fila == self._model.fila_reportable(), self._view.viewport().width())
+        guardado = self._tamanos.get(mensaje["uid"])
+        if guardado is not None and guardado[0] == clave:
+            return guardado[1]
+
+        texto, reportable, ancho = clave
+        fm = QFontMetrics(option.font)
+        rect = QRect(0, 0, ancho, 0)
+        burbuja, icono, boton = self._geometria(rect, mensaje, reportable, fm)
+        alto = burbuja.height()
+        if icono is not None:
+            alto = max(alto, icono.height())
+        if boton is not None:
+            alto += boton.height() + MARGEN
+        tam = QSize(ancho, alto + 2 * MARGEN)
+        self._tamanos[mensaje["uid"]] = (clave, tam)
+        return tam
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._tamanos.clear()
+
+    def _olvidar_filas(self, parent, primera, ultima):
+        for fila in range(primera, ultima + 1):
+            uid = self._model.uid(fila)
+            self._cache.pop(uid, None)
+            self._tamanos.pop(uid, None)
+
+    # --- dibujo -------------------------------------------------------------
+
+    def paint(self, painter, option, index):
+        mensaje = index.data(ChatModel.MensajeRole)
+        reportable = index.data(ChatModel.ReportableRole)
+        fm = QFontMetrics(option.font)
+        burbuja, icono, boton = self._geometria(option.rect, mensaje, reportable, fm)
+
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        painter.setFont(option.font)
+
+        if mensaje["remitente"] == "user":
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#3a3a3a"))
+            painter.drawRoundedRect(burbuja, 10, 10)
+            alineacion = Qt.AlignmentFlag.AlignRight.value
+        else:
+            simbolo, tam = ICONOS.get(mensaje["remitente"], ICONOS["bot"])
+            fuente_icono = QFont(option.font)
+            fuente_icono.setPixelSize(tam)
+            painter.setFont(fuente_icono)
+            painter.setPen(QColor("white"))
+            painter.drawText(icono, Qt.AlignmentFlag.AlignCenter.value, simbolo)
+            painter.setFont(option.font)
+            alineacion = Qt.AlignmentFlag.AlignLeft.value
+
+        painter.setPen(QColor("white"))
+        painter.drawText(burbuja.adjusted(PADDING, PADDING, -PADDING, -PADDING),
+                         alineacion | FLAGS_TEXTO, mensaje["texto"])
+
+        if boton is not None:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#ff4d4d"))
+            painter.drawRoundedRect(boton, 6, 6)
+            painter.setPen(QColor("white"))
+            painter.drawText(boton, Qt.AlignmentFlag.AlignCenter.value, TEXTO_BOTON)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease):
+            return False
+        if not index.data(ChatModel.ReportableRole):
+            return False
+        fm = QFontMetrics(option.font)
+        _, _, boton = self._geometria(option.rect, index.data(ChatModel.MensajeRole), True, fm)
+        if boton is None or not boton.contains(event.position().toPoint()):
+            return False
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            self.reportar.emit(index)
+        return True
@@ -1,22 +1,225 @@
+import os
 import sys
-import requests
+import json
+import threading
+import time
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QTextEdit, QScrollArea, QMessageBox
+    QLabel, QPushButton, QTextEdit, QListView, QMessageBox, QMenu, QAbstractItemView,
+    QCheckBox
 )
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 from PyQt6.QtGui import QPixmap
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Comun"))
+from api_client import get_client, Cancelacion, peticiones_cancelables, TIMEOUT_CONEXION
+from startup import report_first_window
+from diagnostics import medir_ui
+from diagnostics_panel import install_diagnostics_shortcut
+from chat_view import ChatModel, ChatDelegate
+from answer_cache import AnswerCache, ruta_cache
+from chat_history import ChatHistory
+from report_outbox import ReportSender
+
+# Tiempos máximos (segundos) para las consultas a la IA
+TIMEOUT_LECTURA = 120
+TIMEOUT_TOTAL = 180
+
+# La caché local de respuestas es opcional; BOXIA_CACHE_RESPUESTAS=1 la activa al iniciar
+CACHE_POR_DEFECTO = os.environ.get("BOXIA_CACHE_RESPUESTAS", "0") == "1"
+
+# Intervalo (ms) con el que se vuelcan a la pantalla los fragmentos recibidos
+INTERVALO_STREAMING = 50
+
+RESPUESTA_INVALIDA = "⚠️ Error en la respuesta de la IA."
+
+# Mensajes que se mantienen en memoria; los anteriores se leen del historial al subir
+VENTANA_MENSAJES = 200
+PAGINA_HISTORIAL = 50
+
+# Con BOXIA_GUARDAR_HISTORIAL=0 el historial vive solo mientras la ventana está abierta
+GUARDAR_HISTORIAL = os.environ.get("BOXIA_GUARDAR_HISTORIAL", "1") != "0"
+
+# Los reportes que quedaron sin enviar se retoman poco después de abrir la ventana
+RETRASO_ENVIO_PENDIENTES = 2000
+DURACION_AVISO_REPORTE = 4000
+
+
+def leer_respuesta(response, on_token, cancelado):
+    """Lee la respuesta de /preguntar y devuelve el texto completo.
+
+    Si el servidor responde con SSE (text/event-stream) o texto plano por
+    fragmentos, cada trozo se entrega a on_token en cuanto llega. Si responde
+    con JSON se usa el campo "respuesta" como antes.
+    """
+    tipo = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    partes = []
+
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = "utf-8"
+
+    if tipo == "text/event-stream":
+        lineas = response.iter_lines(chunk_size=None, decode_unicode=True)
+        for linea in lineas:
+            if cancelado():
+                break
+            if not linea or not linea.startswith("data:"):
+                continue
+            dato = linea[5:].lstrip(" ")
+            if dato == "[DONE]":
+                # Se lee el final de la respuesta: si queda algo sin leer la conexión
+                # se descarta en vez de volver al pool
+                for _ in lineas:
+                    if cancelado():
+                        break
+                break
+            try:
+                evento = json.loads(dato)
+            except ValueError:
+                texto = dato
+            else:
+                texto = evento.get("token", "") if isinstance(evento, dict) else str(evento)
+            if texto:
+                partes.append(texto)
+                on_token(texto)
+        return "".join(partes)
+
+    if tipo == "text/plain":
+        for texto in response.iter_content(chunk_size=None, decode_unicode=True):
+            if cancelado():
+                break
+            if texto:
+                partes.append(texto)
+                on_token(texto)
+        return "".join(partes)
+
+    return response.json().get("respuesta", RESPUESTA_INVALIDA)
+
+
+def enviar_pregunta(pregunta, on_token, cancelado, streaming=True, api=None):
+    """Envía la pregunta a /preguntar y devuelve el texto de la respuesta.
+
+    on_token recibe cada fragmento en cuanto llega (ver leer_respuesta). Los
+    errores de red y HTTP se propagan; describir_error los explica al usuario.
+    """
+    headers = {"Accept": "text/event-stream, application/json"} if streaming else {}
+    with (api or get_client()).post(
+        "/preguntar",
+        json={"pregunta": pregunta},
+        headers=headers,
+        stream=streaming,
+        timeout=(TIMEOUT_CONEXION, TIMEOUT_LECTURA),
+    ) as response:
+        response.raise_for_status()
+        return leer_respuesta(response, on_token, cancelado)
+
+
+def describir_error(error):
+    """(título, mensaje) para mostrar un error de enviar_pregunta."""
+    import requests  # ya cargado por el cliente; no se importa al abrir la ventana
+
+    if isinstance(error, requests.exceptions.Timeout):
+        return "Tiempo agotado", "⌛ El servidor tardó demasiado en responder."
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "Error de conexión", "❌ No hay conexión con el servidor."
+    if isinstance(error, requests.exceptions.HTTPError):
+        return "Error HTTP", f"⚠️ Error al procesar la solicitud:\n{error}"
+    return "Error", f"⚠️ Ocurrió un error inesperado:\n{str(error)}"
+
+
+class PreguntaSignals(QObject):
+    token = pyqtSignal(int, str)
+    primer_token = pyqtSignal(int, float)
+    resultado = pyqtSignal(int, str, float)
+    error = pyqtSignal(int, str, str)
+
+
+class PreguntaWorker(QRunnable):
+    """Envía una pregunta a /preguntar fuera del hilo de la interfaz."""
+
+    def __init__(self, request_id, pregunta, streaming=True):
+        super().__init__()
+        self.request_id = request_id
+        self.pregunta = pregunta
+        self.streaming = streaming
+        self.signals = PreguntaSignals()
+        self._cancelado = threading.Event()
+        self._cancelacion = Cancelacion()
+        self._inicio = 0.0
+        self._ttft = None
+
+    def cancel(self):
+        self._cancelado.set()
+        # Cierra la conexión: el hilo del pool queda libre sin esperar a que el servidor termine
+        self._cancelacion.cancel()
+
+    def is_cancelled(self):
+        return self._cancelado.is_set()
+
+    def run(self):
+        self._inicio = time.perf_counter()
+        try:
+            with peticiones_cancelables(self._cancelacion):
+                respuesta_ia = enviar_pregunta(self.pregunta, self._on_token, self.is_cancelled, self.streaming)
+        except Exception as e:
+            self._emit_error(*describir_error(e))
+            return
+
+        if not self.is_cancelled():
+            total = time.perf_counter() - self._inicio
+            self.signals.resultado.emit(self.request_id, respuesta_ia or RESPUESTA_INVALIDA, total)
+
+    def _on_token(self, texto):
+        if self._ttft is None:
+            self._ttft = time.perf_counter() - self._inicio
+            self.signals.primer_token.emit(self.request_id, self._ttft)
+        self.signals.token.emit(self.request_id, texto)
+
+    def _emit_error(self, titulo, mensaje):
+        if not self.is_cancelled():
+            self.signals.error.emit(self.request_id, titulo, mensaje)
+
+
 class ChatUI(QWidget):
-    def __init__(self):
+    def __init__(self, streaming=True, usar_cache=CACHE_POR_DEFECTO):
         super().__init__()
         self.setWindowTitle("BOX IA - Chatbot")
         self.setGeometry(100, 100, 900, 600)
         self.ultima_pregunta = ""
         self.ultima_respuesta = ""
+        self.ultimo_ttft = None
+        self.streaming = streaming
+        self.api = get_client()
+        self.usar_cache = usar_cache
+        self._cache = None
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(2)
+        self._request_seq = 0
+        self._worker_actual = None
+        # uid (no fila) de los mensajes en curso: las filas cambian al cargar mensajes anteriores
+        self._placeholder = None
+        self._watchdog = QTimer(self)
+        self._watchdog.setSingleShot(True)
+        self._watchdog.timeout.connect(self._on_timeout_total)
+        self._respuesta = None
+        self._texto_stream = ""
+        self._fragmentos = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(INTERVALO_STREAMING)
+        self._flush_timer.timeout.connect(self._flush_fragmentos)
+        self.history = ChatHistory(None if GUARDAR_HISTORIAL else ":memory:")
+        self.report_sender = ReportSender(self.api, parent=self)
         self.init_ui()
         self.apply_styles()
+        install_diagnostics_shortcut(self)
+        self.load_history()
+        self.report_sender.cambio.connect(self.on_reportes_pendientes)
+        self.report_sender.enviado.connect(
+            lambda n: self.aviso_reporte("✔️ Reporte enviado." if n == 1 else f"✔️ {n} reportes enviados."))
+        self.report_sender.rechazado.connect(
+            lambda detalle: self.aviso_reporte(f"⚠️ El servidor rechazó un reporte: {detalle}", error=True))
+        QTimer.singleShot(RETRASO_ENVIO_PENDIENTES, self.report_sender.flush)
 
     def apply_styles(self):
         self.setStyleSheet("""
@@ -24,6 +227,9 @@ class ChatUI(QWidget):
                 background-color: #1e1e1e;
                 color: white;
             }
+            QListView {
+                border: none;
+            }
             QScrollBar:vertical {
                 border: none;
                 background: #2a2a2a;
@@ -81,19 +287,44 @@ class ChatUI(QWidget):
         clear_btn.setStyleSheet("background-color: white; color: black; padding: 6px 12px; border-radius: 8px;")
         clear_btn.clicked.connect(self.clear_chat)
 
+        self.cache_check = QCheckBox("⚡ Caché de respuestas")
+        self.cache_check.setChecked(self.usar_cache)
+        self.cache_check.toggled.connect(self.set_usar_cache)
+        self.cache_label = QLabel("")
+        self.cache_label.setStyleSheet("color: #aaaaaa; padding: 5px;")
+        self.report_label = QLabel("")
+        self.report_label.setStyleSheet("color: #aaaaaa; padding: 5px;")
+        self._report_label_timer = QTimer(self)
+        self._report_label_timer.setSingleShot(True)
+        self._report_label_timer.timeout.connect(
+            lambda: self.on_reportes_pendientes(self.report_sender.pendientes()))
+
         top_bar.addWidget(logo)
         top_bar.addStretch()
+        top_bar.addWidget(self.report_label)
+        top_bar.addWidget(self.cache_label)
+        top_bar.addWidget(self.cache_check)
         top_bar.addWidget(clear_btn)
         layout.addLayout(top_bar)
 
         # Chat area
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.chat_container = QWidget()
-        self.chat_layout = QVBoxLayout(self.chat_container)
-        self.chat_layout.addStretch()
-        self.scroll_area.setWidget(self.chat_container)
-        layout.addWidget(self.scroll_area)
+        self.chat_model = ChatModel(self, ventana=VENTANA_MENSAJES)
+        self.chat_view = QListView()
+        self.chat_view.setModel(self.chat_model)
+        self.chat_delegate = ChatDelegate(self.chat_view, self.chat_model)
+        self.chat_delegate.reportar.connect(lambda index: self.reportar_respuesta(index.row()))
+        self.chat_view.setItemDelegate(self.chat_delegate)
+        self.chat_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.chat_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.chat_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.chat_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.chat_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.chat_view.customContextMenuRequested.connect(self.mostrar_menu_mensaje)
+        # Un cambio de texto (streaming) o del botón de reporte cambia el alto de la fila;
+        # se agenda un único reordenamiento por vuelta del bucle de eventos.
+        self.chat_model.dataChanged.connect(lambda *_: self.chat_view.scheduleDelayedItemsLayout())
+        self.chat_view.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        layout.addWidget(self.chat_view)
 
         # Input
         input_layout = QHBoxLayout()
@@ -110,13 +341,13 @@ class ChatUI(QWidget):
         self.input_box.textChanged.connect(self.ajustar_altura_input)
         self.input_box.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
 
-        send_btn = QPushButton("➤")
-        send_btn.setFixedSize(40, 40)
-        send_btn.setStyleSheet("background-color: white; color: black; border-radius: 20px;")
-        send_btn.clicked.connect(self.send_message)
+        self.send_btn = QPushButton("➤")
+        self.send_btn.setFixedSize(40, 40)
+        self.send_btn.setStyleSheet("background-color: white; color: black; border-radius: 20px;")
+        self.send_btn.clicked.connect(self.on_send_clicked)
 
         input_layout.addWidget(self.input_box)
-        input_layout.addWidget(send_btn)
+        input_layout.addWidget(self.send_btn)
         layout.addLayout(input_layout)
 
     def ajustar_altura_input(self):
@@ -125,119 +356,279 @@ class ChatUI(QWidget):
         self.input_box.setFixedHeight(nueva_altura)
 
     def add_message(self, sender, text):
-        message = QLabel()
-        message.setWordWrap(True)
-        message.setText(text)
-        message.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-
-        if sender == "user":
-            message.setStyleSheet("background-color: #3a3a3a; padding: 10px; border-radius: 10px; margin: 10px;")
-            message.setAlignment(Qt.AlignmentFlag.AlignRight)
-            self.chat_layout.insertWidget(self.chat_layout.count() - 1, message)
+        self._volver_al_final()
+        fila = self.chat_model.append("user" if sender == "user" else "bot", text)
+        self.chat_view.scrollToBottom()
+        return fila
+
+    def load_history(self):
+        mensajes, hay_anteriores = self.history.recientes(PAGINA_HISTORIAL)
+        self.chat_model.set_mensajes(mensajes, hay_anteriores)
+        # La última respuesta de la sesión anterior se puede seguir reportando
+        if len(mensajes) >= 2 and mensajes[-1]["remitente"] == "respuesta" and mensajes[-2]["remitente"] == "user":
+            self.ultima_pregunta = mensajes[-2]["texto"]
+            self.ultima_respuesta = mensajes[-1]["texto"]
+            self.chat_model.set_reportable(len(mensajes) - 1)
+        self.chat_view.scrollToBottom()
+
+    def on_scroll(self, valor):
+        barra = self.chat_view.verticalScrollBar()
+        if valor == barra.minimum() and self.chat_model.hay_anteriores:
+            self.load_older_messages()
+        elif valor == barra.maximum() and self.chat_model.hay_posteriores:
+            self.load_newer_messages()
+
+    def load_older_messages(self):
+        primer_id = self.chat_model.primer_id()
+        if primer_id is None:
+            return
+        mensajes, hay_anteriores = self.history.anteriores(primer_id, PAGINA_HISTORIAL)
+        self.chat_model.prepend(mensajes, hay_anteriores)
+        if mensajes:
+            # El mensaje que estaba arriba queda en el mismo lugar
+            self.chat_view.scrollTo(self.chat_model.index(len(mensajes)), QAbstractItemView.ScrollHint.PositionAtTop)
+
+    def load_newer_messages(self):
+        """Vuelve a cargar los mensajes más nuevos que se descartaron al subir."""
+        ultimo_id = self.chat_model.ultimo_id()
+        if ultimo_id is None:
+            return
+        ultimo = self.chat_model.uid(self.chat_model.rowCount() - 1)
+        mensajes, hay_posteriores = self.history.posteriores(ultimo_id, PAGINA_HISTORIAL)
+        self.chat_model.append_historial(mensajes, hay_posteriores)
+        fila = self.chat_model.rowCount() - 1
+        if (not hay_posteriores and self.ultima_respuesta and self.chat_model.mensaje(fila)["remitente"] == "respuesta"
+                and self.chat_model.mensaje(fila)["texto"] == self.ultima_respuesta):
+            self.chat_model.set_reportable(fila)
+        if mensajes:
+            # El mensaje que estaba abajo queda en el mismo lugar aunque se descarten los antiguos
+            self.chat_view.scrollTo(self.chat_model.index(self.chat_model.fila_de(ultimo)),
+                                    QAbstractItemView.ScrollHint.PositionAtBottom)
+
+    def _volver_al_final(self):
+        # Lo nuevo va después del último mensaje guardado, no de lo que se está leyendo arriba
+        if self.chat_model.hay_posteriores:
+            self.load_history()
+
+    def _guardar(self, fila):
+        """Guarda (o actualiza) en el historial el mensaje de esa fila, ya terminado."""
+        mensaje = self.chat_model.mensaje(fila)
+        if mensaje.get("id") is None:
+            mensaje_id = self.history.add(mensaje["remitente"], mensaje["texto"], mensaje.get("tooltip"))
+            self.chat_model.asignar_id(fila, mensaje_id)
         else:
-            message.setStyleSheet("background-color: transparent; padding: 10px; margin: 10px; color: white;")
-            icon = QLabel("🤖")
-            icon.setStyleSheet("font-size: 24px; margin-right: 6px;")
-            row = QHBoxLayout()
-            row.addWidget(icon)
-            row.addWidget(message)
-            row.addStretch()
-            container = QWidget()
-            container.setLayout(row)
-            self.chat_layout.insertWidget(self.chat_layout.count() - 1, container)
-
-        self.scroll_area.verticalScrollBar().setValue(self.scroll_area.verticalScrollBar().maximum())
+            self.history.update(mensaje["id"], mensaje["texto"], mensaje.get("tooltip"))
+
+    def mostrar_menu_mensaje(self, pos):
+        indice = self.chat_view.indexAt(pos)
+        if not indice.isValid():
+            return
+        menu = QMenu(self)
+        copiar = menu.addAction("📋 Copiar mensaje")
+        if menu.exec(self.chat_view.viewport().mapToGlobal(pos)) == copiar:
+            QApplication.clipboard().setText(indice.data())
+
+    def on_send_clicked(self):
+        if self._worker_actual is not None:
+            self.cancel_pending()
+        else:
+            self.send_message()
 
     def send_message(self):
         user_text = self.input_box.toPlainText().strip()
-        if not user_text:
+        if not user_text or self._worker_actual is not None:
             return
 
-        self.add_message("user", user_text)
+        self._guardar(self.add_message("user", user_text))
         self.input_box.clear()
         self.ultima_pregunta = user_text
-
-        try:
-            response = requests.post("http://localhost:8000/preguntar", json={"pregunta": user_text})
-            response.raise_for_status()
-            respuesta_ia = response.json().get("respuesta", "⚠️ Error en la respuesta de la IA.")
-        except requests.exceptions.ConnectionError:
-            QMessageBox.critical(self, "Error de conexión", "❌ No hay conexión con el servidor.")
+        self.ultima_respuesta = ""
+        self.ultimo_ttft = None
+
+        if self.usar_cache:
+            respuesta = self.answer_cache().get(user_text)
+            self.cache_label.setText("Caché: acierto" if respuesta is not None else "Caché: fallo")
+            if respuesta is not None:
+                self.ultima_respuesta = respuesta
+                fila = self.add_bot_response_with_button(respuesta)
+                self.chat_model.actualizar(fila, tooltip="⚡ Respuesta desde la caché local")
+                self._guardar(fila)
+                return
+
+        self._request_seq += 1
+        worker = PreguntaWorker(self._request_seq, user_text, self.streaming)
+        worker.signals.primer_token.connect(self.on_primer_token)
+        worker.signals.token.connect(self.on_token)
+        worker.signals.resultado.connect(self.on_respuesta)
+        worker.signals.error.connect(self.on_error_respuesta)
+        self._worker_actual = worker
+        self._placeholder = self.chat_model.uid(self.add_message("bot", "⏳ Pensando..."))
+        self.send_btn.setText("■")
+        self.send_btn.setToolTip("Cancelar pregunta")
+        self._watchdog.start(TIMEOUT_TOTAL * 1000)
+        self.thread_pool.start(worker)
+
+    def on_primer_token(self, request_id, segundos):
+        if not self._is_current(request_id):
             return
-        except requests.exceptions.HTTPError as e:
-            QMessageBox.critical(self, "Error HTTP", f"⚠️ Error al procesar la solicitud:\n{e}")
+        self.ultimo_ttft = segundos
+        self._texto_stream = ""
+        if self._placeholder is not None:
+            # El marcador "Pensando..." se convierte en la respuesta
+            self._respuesta = self._placeholder
+            self._placeholder = None
+            fila = self.chat_model.fila_de(self._respuesta)
+            self.chat_model.actualizar(fila, remitente="respuesta", texto="")
+            self.chat_model.set_reportable(fila)
+        else:
+            self._respuesta = self.chat_model.uid(self.add_bot_response_with_button(""))
+        self._flush_timer.start()
+
+    def on_token(self, request_id, texto):
+        if self._is_current(request_id):
+            self._fragmentos.append(texto)
+
+    def _flush_fragmentos(self):
+        if not self._fragmentos or self._respuesta is None:
             return
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"⚠️ Ocurrió un error inesperado:\n{str(e)}")
+        self._texto_stream += "".join(self._fragmentos)
+        self._fragmentos.clear()
+        with medir_ui("chat.actualizar_respuesta", mensajes=self.chat_model.rowCount()):
+            self.chat_model.actualizar(self.chat_model.fila_de(self._respuesta), texto=self._texto_stream)
+            self.chat_view.scrollToBottom()
+
+    def on_respuesta(self, request_id, respuesta_ia, total):
+        if not self._is_current(request_id):
             return
-
+        respuesta = self._respuesta
+        self._finish_pending()
         self.ultima_respuesta = respuesta_ia
-        self.add_bot_response_with_button(respuesta_ia)
+        if self.ultimo_ttft is not None:
+            tooltip = f"Primer token: {self.ultimo_ttft:.2f} s · Total: {total:.2f} s"
+        else:
+            tooltip = f"Tiempo de respuesta: {total:.2f} s"
+        if respuesta is None:
+            fila = self.add_bot_response_with_button(respuesta_ia)
+        else:
+            fila = self.chat_model.fila_de(respuesta)
+        self.chat_model.actualizar(fila, texto=respuesta_ia, tooltip=tooltip)
+        self._guardar(fila)
+        # El servidor respondió: los reportes que esperaban un reintento salen ya
+        self.report_sender.server_reachable()
+        if self.usar_cache and respuesta_ia != RESPUESTA_INVALIDA:
+            self.answer_cache().put(self.ultima_pregunta, respuesta_ia)
+
+    def on_error_respuesta(self, request_id, titulo, mensaje):
+        if not self._is_current(request_id):
+            return
+        respuesta = self._respuesta
+        self._finish_pending()
+        if respuesta is not None:
+            fila = self.chat_model.fila_de(respuesta)
+            texto = self.chat_model.mensaje(fila)["texto"]
+            self.chat_model.actualizar(fila, texto=texto + "\n\n⚠️ Respuesta incompleta.")
+            self._guardar(fila)
+        QMessageBox.critical(self, titulo, mensaje)
+
+    def _on_timeout_total(self):
+        if self._worker_actual is None:
+            return
+        self.cancel_pending()
+        QMessageBox.critical(self, "Tiempo agotado", "⌛ El servidor tardó demasiado en responder.")
+
+    def cancel_pending(self):
+        if self._worker_actual is not None:
+            self._worker_actual.cancel()
+        respuesta = self._respuesta
+        self._finish_pending()
+        if respuesta is not None:
+            # Lo recibido hasta cancelar también queda en el historial
+            self._guardar(self.chat_model.fila_de(respuesta))
+
+    def _is_current(self, request_id):
+        return self._worker_actual is not None and self._worker_actual.request_id == request_id
+
+    def _finish_pending(self):
+        self._watchdog.stop()
+        self._flush_timer.stop()
+        self._flush_fragmentos()
+        self._fragmentos.clear()
+        self._worker_actual = None
+        self._respuesta = None
+        self._remove_placeholder()
+        self.send_btn.setText("➤")
+        self.send_btn.setToolTip("")
+
+    def _remove_placeholder(self):
+        if self._placeholder is not None:
+            # El marcador siempre es la última fila mientras se espera
+            self.chat_model.remove_last()
+            self._placeholder = None
 
 
     def add_bot_response_with_button(self, respuesta):
-        # Oculta botones previos
-        for i in reversed(range(self.chat_layout.count() - 1)):
-            item = self.chat_layout.itemAt(i)
-            widget = item.widget()
-            if widget:
-                for sub in widget.findChildren(QPushButton):
-                    if sub.text().startswith("📩"):
-                        sub.hide()
-
-        respuesta_label = QLabel(respuesta)
-        respuesta_label.setWordWrap(True)
-        respuesta_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-        respuesta_label.setStyleSheet("background-color: transparent; padding: 10px; margin: 10px; color: white;")
-
-        icon = QLabel("💬")
-        icon.setStyleSheet("font-size: 30px; margin-right: 6px;")
-
-        reportar_btn = QPushButton("📩 Reportar respuesta")
-        reportar_btn.setStyleSheet("background-color: #ff4d4d; color: white; padding: 4px; border-radius: 6px;")
-        reportar_btn.clicked.connect(self.reportar_respuesta)
-
-        col = QVBoxLayout()
-        col.addWidget(respuesta_label)
-        col.addWidget(reportar_btn, alignment=Qt.AlignmentFlag.AlignLeft)
-
-        row = QHBoxLayout()
-        row.addWidget(icon)
-        row.addLayout(col)
-        row.addStretch()
-
-        container = QWidget()
-        container.setLayout(row)
-        self.chat_layout.insertWidget(self.chat_layout.count() - 1, container)
-
-        self.scroll_area.verticalScrollBar().setValue(self.scroll_area.verticalScrollBar().maximum())
-
-    def reportar_respuesta(self):
-        if not self.ultima_pregunta or not self.ultima_respuesta:
+        # Solo la última respuesta muestra el botón de reporte
+        self._volver_al_final()
+        fila = self.chat_model.append("respuesta", respuesta)
+        self.chat_model.set_reportable(fila)
+        self.chat_view.scrollToBottom()
+        return fila
+
+    def answer_cache(self):
+        if self._cache is None:
+            self._cache = AnswerCache()
+        return self._cache
+
+    def set_usar_cache(self, activo):
+        self.usar_cache = activo
+        self.cache_label.setText("")
+
+    def reportar_respuesta(self, fila=None):
+        """Guarda el reporte en la bandeja de salida; se envía en segundo plano.
+
+        Con `fila` se reporta esa respuesta y la pregunta que la originó; sin
+        ella, la última pregunta y respuesta.
+        """
+        pregunta, respuesta = self.ultima_pregunta, self.ultima_respuesta
+        if fila is not None and 0 <= fila < self.chat_model.rowCount():
+            respuesta = self.chat_model.mensaje(fila)["texto"]
+            for anterior in range(fila - 1, -1, -1):
+                if self.chat_model.mensaje(anterior)["remitente"] == "user":
+                    pregunta = self.chat_model.mensaje(anterior)["texto"]
+                    break
+        if not pregunta or not respuesta:
             return
 
-        try:
-            payload = {
-                "pregunta": self.ultima_pregunta,
-                "respuesta": self.ultima_respuesta
-            }
-            r = requests.post("http://localhost:8000/reportar-pregunta", json=payload)
-            if r.status_code == 200:
-                QMessageBox.information(self, "Reporte de pregunta", r.json().get("mensaje", "Reporte exitoso."))
-            else:
-                QMessageBox.critical(self, "Error", r.json().get("detail", "Error al reportar."))
-        except Exception as e:
-            QMessageBox.critical(self, "Error de conexión", f"⚠️ No se pudo conectar con el servidor")
+        # Una respuesta reportada no debe volver a servirse desde la caché
+        if self._cache is not None or os.path.exists(ruta_cache()):
+            self.answer_cache().invalidate(pregunta)
+
+        self.report_sender.agregar(pregunta, respuesta)
+        self.aviso_reporte("📨 Reporte guardado; se enviará en segundo plano.")
+
+    def on_reportes_pendientes(self, pendientes):
+        if self._report_label_timer.isActive():
+            return
+        self.report_label.setStyleSheet("color: #aaaaaa; padding: 5px;")
+        self.report_label.setText(f"📨 {pendientes} reportes por enviar" if pendientes else "")
+
+    def aviso_reporte(self, mensaje, error=False):
+        self.report_label.setStyleSheet(f"color: {'#ff6b6b' if error else '#7CFC00'}; padding: 5px;")
+        self.report_label.setText(mensaje)
+        self._report_label_timer.start(DURACION_AVISO_REPORTE * (2 if error else 1))
 
     def clear_chat(self):
-        for i in reversed(range(self.chat_layout.count() - 1)):
-            widget = self.chat_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
+        self.cancel_pending()
+        self.history.clear()
+        self.chat_model.clear()
+        self.chat_delegate.clear_cache()
+        self.ultima_pregunta = ""
+        self.ultima_respuesta = ""
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = ChatUI()
     window.show()
+    report_first_window(app)
     sys.exit(app.exec())
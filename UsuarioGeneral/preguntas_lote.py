@@ -0,0 +1,248 @@
+"""Envía en lote preguntas conocidas a /preguntar, sin ventana.
+
+Uso:
+    python3 preguntas_lote.py preguntas.csv [--salida resultados.jsonl]
+                              [--concurrencia 4] [--qps 2] [--sin-streaming]
+                              [--comparar resultados_anteriores.jsonl]
+                              [--marcar "no tengo información"] [--reportar]
+
+Las preguntas se leen de un CSV (columna "pregunta"; si no la tiene, la
+primera) o de un JSONL (objetos con "pregunta", o textos). Las columnas
+opcionales "id" y "esperada" se usan para identificar cada pregunta y para
+marcar las respuestas que no coinciden con la esperada.
+
+Cada resultado se escribe como una línea JSON en cuanto termina (en la
+salida estándar si no se indica --salida) y al final se muestra un resumen
+con p50/p95/p99 del primer fragmento y del total, y preguntas por segundo.
+Usa el mismo envío y la misma lectura de la respuesta que el chat
+(enviar_pregunta / leer_respuesta) y respeta BOXIA_API_URL, también con
+varias réplicas.
+
+Con --comparar se indica en cada resultado si la respuesta cambió respecto
+de una ejecución anterior (p. ej. antes de actualizar la base de
+conocimiento). Con --reportar, las respuestas marcadas (distintas de la
+esperada o que coinciden con --marcar) se envían como reportes, por lotes a
+/reportar-pregunta-lote si el servidor lo anuncia.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Comun"))
+from api_client import ApiClient, API_BASE, CONEXIONES_POR_HOST
+from diagnostics import percentil
+from interfaz_chat import enviar_pregunta, describir_error, RESPUESTA_INVALIDA
+from report_outbox import enviar_reportes, TAM_LOTE_REPORTES
+
+
+def leer_preguntas(path):
+    """Lista de {"id", "pregunta", "esperada"} en el orden del archivo."""
+    preguntas = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            filas = (json.loads(linea) for linea in f if linea.strip())
+            filas = ({"pregunta": fila} if isinstance(fila, str) else fila for fila in filas)
+        else:
+            lector = csv.DictReader(f)
+            campo = "pregunta" if "pregunta" in (lector.fieldnames or []) else (lector.fieldnames or [None])[0]
+            if campo is None:
+                return []
+            filas = (dict(fila, pregunta=fila.get(campo)) for fila in lector)
+        for i, fila in enumerate(filas, 1):
+            pregunta = (fila.get("pregunta") or "").strip()
+            if pregunta:
+                preguntas.append({"id": fila.get("id") or i, "pregunta": pregunta, "esperada": fila.get("esperada")})
+    return preguntas
+
+
+def leer_anteriores(path):
+    """Respuestas de un resultado anterior de este script, por pregunta."""
+    anteriores = {}
+    with open(path, encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                fila = json.loads(linea)
+                if not fila.get("error"):
+                    anteriores[fila["pregunta"]] = fila.get("respuesta") or ""
+    return anteriores
+
+
+def _comparable(texto):
+    return " ".join((texto or "").split())
+
+
+class LimiteTasa:
+    """Espacia los envíos para no pasar de `qps` preguntas por segundo entre todos los hilos."""
+
+    def __init__(self, qps):
+        self.intervalo = 1 / qps if qps > 0 else 0
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._proximo)
+            self._proximo = turno + self.intervalo
+        time.sleep(max(0.0, turno - ahora))
+
+
+def ejecutar_pregunta(api, item, streaming, limite, cancelado):
+    limite.esperar()
+    inicio = time.perf_counter()
+    primer = []
+
+    def on_token(texto):
+        if not primer:
+            primer.append(time.perf_counter() - inicio)
+
+    resultado = {"id": item["id"], "pregunta": item["pregunta"], "inicio": round(time.time(), 3)}
+    try:
+        respuesta = enviar_pregunta(item["pregunta"], on_token, cancelado.is_set, streaming, api)
+    except Exception as e:
+        titulo, _ = describir_error(e)
+        resultado.update(error=f"{titulo}: {e}", total_ms=round((time.perf_counter() - inicio) * 1000, 1))
+        return resultado
+    total = time.perf_counter() - inicio
+    resultado.update(
+        respuesta=respuesta or RESPUESTA_INVALIDA,
+        error=None if respuesta else "Respuesta vacía",
+        ttft_ms=round((primer[0] if primer else total) * 1000, 1),
+        total_ms=round(total * 1000, 1),
+    )
+    return resultado
+
+
+def marcar(resultado, item, anteriores, patron):
+    if resultado["error"]:
+        return
+    respuesta = resultado["respuesta"]
+    motivos = []
+    if item.get("esperada") is not None and _comparable(item["esperada"]) != _comparable(respuesta):
+        motivos.append("distinta de la esperada")
+    if patron is not None and patron.search(respuesta):
+        motivos.append(f"coincide con «{patron.pattern}»")
+    if motivos:
+        resultado["marcada"] = ", ".join(motivos)
+    if anteriores is not None and item["pregunta"] in anteriores:
+        resultado["cambio"] = _comparable(anteriores[item["pregunta"]]) != _comparable(respuesta)
+
+
+def reportar(api, marcadas):
+    """Envía las respuestas marcadas como reportes; devuelve (enviados, rechazados, sin enviar)."""
+    reportes = [{"id": i, "id_cliente": uuid.uuid4().hex, "pregunta": r["pregunta"], "respuesta": r["respuesta"]}
+                for i, r in enumerate(marcadas)]
+    enviados, rechazados, reintentar = [], [], []
+    for i in range(0, len(reportes), TAM_LOTE_REPORTES):
+        e, r, p = enviar_reportes(None, api, reportes[i:i + TAM_LOTE_REPORTES])
+        enviados += e
+        rechazados += r
+        reintentar += p
+    return enviados, rechazados, reintentar
+
+
+def _ms(valores, p):
+    valor = percentil(valores, p)
+    return "—" if valor is None else f"{valor:.0f} ms"
+
+
+def resumen(resultados, duracion):
+    correctas = [r for r in resultados if not r["error"]]
+    lineas = [
+        f"Preguntas: {len(resultados)}  correctas: {len(correctas)}  con error: {len(resultados) - len(correctas)}",
+        f"Duración: {duracion:.1f} s  ->  {len(resultados) / duracion if duracion else 0:.2f} preguntas/s",
+    ]
+    for campo, nombre in (("ttft_ms", "Primer fragmento"), ("total_ms", "Total")):
+        valores = [r[campo] for r in correctas]
+        lineas.append(f"{nombre}: p50 {_ms(valores, 50)}  p95 {_ms(valores, 95)}  p99 {_ms(valores, 99)}")
+    marcadas = sum(1 for r in resultados if r.get("marcada"))
+    cambiadas = [r for r in resultados if "cambio" in r]
+    if marcadas:
+        lineas.append(f"Marcadas: {marcadas}")
+    if cambiadas:
+        lineas.append(f"Cambiaron respecto de la ejecución anterior: "
+                      f"{sum(1 for r in cambiadas if r['cambio'])} de {len(cambiadas)}")
+    return "\n".join(lineas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envía en lote preguntas a /preguntar y mide la latencia")
+    parser.add_argument("entrada", help="CSV (columna pregunta) o JSONL con las preguntas")
+    parser.add_argument("--salida", default="-", help="archivo JSONL de resultados (- = salida estándar)")
+    parser.add_argument("--servidor", default=API_BASE,
+                        help="URL del servidor o réplicas separadas por comas (por defecto BOXIA_API_URL)")
+    parser.add_argument("--concurrencia", type=int, default=4, help="preguntas en curso a la vez")
+    parser.add_argument("--qps", type=float, default=0.0, help="máximo de preguntas por segundo (0 = sin límite)")
+    parser.add_argument("--sin-streaming", action="store_true", help="pedir la respuesta en JSON, sin fragmentos")
+    parser.add_argument("--comparar", help="JSONL de una ejecución anterior para indicar qué respuestas cambiaron")
+    parser.add_argument("--marcar", help="expresión regular: las respuestas que coinciden quedan marcadas")
+    parser.add_argument("--reportar", action="store_true",
+                        help="enviar las respuestas marcadas a /reportar-pregunta (por lotes si se puede)")
+    args = parser.parse_args()
+
+    preguntas = leer_preguntas(args.entrada)
+    if not preguntas:
+        parser.error(f"{args.entrada} no tiene preguntas")
+    anteriores = leer_anteriores(args.comparar) if args.comparar else None
+    patron = re.compile(args.marcar, re.IGNORECASE) if args.marcar else None
+    concurrencia = max(1, args.concurrencia)
+    api = ApiClient(args.servidor, conexiones=max(CONEXIONES_POR_HOST, concurrencia))
+    try:
+        # Sin servidor cada pregunta agotaría sus reintentos de conexión: se avisa una sola vez
+        api.get("/capacidades", timeout=(5, 10)).close()
+    except Exception as e:
+        print(describir_error(e)[1], e, sep="\n", file=sys.stderr)
+        return 2
+    limite = LimiteTasa(args.qps)
+    cancelado = threading.Event()
+
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    resultados = []
+    inicio = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=concurrencia)
+    try:
+        futuros = {pool.submit(ejecutar_pregunta, api, item, not args.sin_streaming, limite, cancelado): item
+                   for item in preguntas}
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            marcar(resultado, futuros[futuro], anteriores, patron)
+            resultados.append(resultado)
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            salida.flush()
+            if salida is not sys.stdout:
+                print(f"\r{len(resultados)}/{len(preguntas)}", end="", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        # Las respuestas en curso se cortan y las que no empezaron no se envían
+        cancelado.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        print("\nInterrumpido.", file=sys.stderr)
+    finally:
+        pool.shutdown(wait=True)
+        if salida is not sys.stdout:
+            salida.close()
+            print(file=sys.stderr)
+    duracion = time.perf_counter() - inicio
+    print(resumen(resultados, duracion), file=sys.stderr)
+
+    marcadas = [r for r in resultados if r.get("marcada")]
+    if args.reportar and marcadas:
+        enviados, rechazados, sin_enviar = reportar(api, marcadas)
+        print(f"Reportes: {len(enviados)} enviados, {len(rechazados)} rechazados, "
+              f"{len(sin_enviar)} sin enviar", file=sys.stderr)
+        for _, detalle in rechazados + sin_enviar[:1]:
+            print(f"  {detalle}", file=sys.stderr)
+    api.close()
+    return 1 if any(r["error"] for r in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""Envío en segundo plano de los reportes de respuestas.
+
+Cada reporte (la pregunta y la respuesta exactas) se guarda primero en una
+bandeja de salida local (SQLite) y después ReportSender lo envía sin bloquear
+el chat: por lotes a /reportar-pregunta-lote si el servidor anuncia
+"reportes_lote" en /capacidades, o de a uno a /reportar-pregunta si no.
+
+Los fallos de red o del servidor (5xx, 408, 429) se reintentan con espera
+exponencial por reporte; lo que queda sin enviar se retoma al volver a abrir
+el chat. Cada reporte lleva un id_cliente para que el servidor pueda
+descartar los repetidos si una respuesta se perdió después de guardarlo.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from local_data import data_dir
+from workers import Worker, start
+
+TAM_LOTE_REPORTES = 50
+
+# Espera (s) antes del primer reintento; se duplica en cada fallo hasta el máximo
+ESPERA_INICIAL = 5.0
+ESPERA_MAXIMA = 600.0
+
+# Estados HTTP que no dicen nada del reporte en sí: se vuelve a intentar más tarde
+ESTADOS_REINTENTABLES = frozenset({408, 429})
+
+
+def ruta_bandeja():
+    return os.path.join(data_dir(), "reportes_pendientes.sqlite3")
+
+
+def espera_reintento(intentos):
+    """Segundos hasta el próximo intento tras `intentos` fallos, con ±20 % de variación."""
+    espera = min(ESPERA_MAXIMA, ESPERA_INICIAL * 2 ** max(0, intentos - 1))
+    return espera * random.uniform(0.8, 1.2)
+
+
+class ReportOutbox:
+    def __init__(self, path=None):
+        self.path = path or ruta_bandeja()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS reportes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id_cliente TEXT NOT NULL UNIQUE,
+                    pregunta TEXT NOT NULL,
+                    respuesta TEXT NOT NULL,
+                    creado REAL NOT NULL,
+                    intentos INTEGER NOT NULL DEFAULT 0,
+                    proximo_intento REAL NOT NULL DEFAULT 0,
+                    ultimo_error TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS reportes_proximo ON reportes (proximo_intento)")
+
+    def add(self, pregunta, respuesta):
+        """Guarda el reporte y devuelve su id; el mismo par aún sin enviar no se duplica."""
+        with self._lock, self._conn:
+            fila = self._conn.execute(
+                "SELECT id FROM reportes WHERE pregunta = ? AND respuesta = ?", (pregunta, respuesta)).fetchone()
+            if fila is not None:
+                return fila[0]
+            return self._conn.execute(
+                "INSERT INTO reportes (id_cliente, pregunta, respuesta, creado) VALUES (?, ?, ?, ?)",
+                (uuid.uuid4().hex, pregunta, respuesta, time.time()),
+            ).lastrowid
+
+    def listos(self, cantidad, ahora=None):
+        """Hasta `cantidad` reportes cuyo próximo intento ya llegó, del más antiguo al más nuevo."""
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT id, id_cliente, pregunta, respuesta, intentos FROM reportes "
+                "WHERE proximo_intento <= ? ORDER BY id LIMIT ?", (ahora or time.time(), cantidad)).fetchall()
+        return [{"id": f[0], "id_cliente": f[1], "pregunta": f[2], "respuesta": f[3], "intentos": f[4]}
+                for f in filas]
+
+    def remove(self, ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM reportes WHERE id = ?", [(i,) for i in ids])
+
+    def postpone(self, fallos):
+        """fallos: [(id, error)]; cada uno se reintenta tras su espera exponencial."""
+        ahora = time.time()
+        with self._lock, self._conn:
+            for reporte_id, error in fallos:
+                fila = self._conn.execute("SELECT intentos FROM reportes WHERE id = ?", (reporte_id,)).fetchone()
+                if fila is None:
+                    continue
+                intentos = fila[0] + 1
+                self._conn.execute(
+                    "UPDATE reportes SET intentos = ?, proximo_intento = ?, ultimo_error = ? WHERE id = ?",
+                    (intentos, ahora + espera_reintento(intentos), str(error)[:300], reporte_id))
+
+    def retry_now(self):
+        """Adelanta todos los reintentos (p. ej. cuando el servidor vuelve a responder)."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE reportes SET proximo_intento = 0 WHERE proximo_intento > 0")
+
+    def next_attempt(self):
+        """Momento (time.time()) del próximo intento, o None si no hay nada pendiente."""
+        with self._lock:
+            return self._conn.execute("SELECT MIN(proximo_intento) FROM reportes").fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reportes").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _detalle(r):
+    try:
+        return r.json().get("detail") or r.text
+    except (ValueError, AttributeError):
+        return r.text
+
+
+def enviar_reportes(worker, api, reportes):
+    """Envía los reportes y devuelve (enviados, rechazados, reintentar).
+
+    enviados son ids; rechazados y reintentar, [(id, detalle)]. Rechazados son
+    los que el servidor no acepta (4xx): reintentarlos no cambiaría nada.
+    worker puede ser None si no hace falta poder cancelar.
+    """
+    import requests  # ya cargado por el cliente; no se importa al abrir la ventana
+
+    enviados, rechazados, reintentar = [], [], []
+    if len(reportes) > 1 and api.capabilities().get("reportes_lote"):
+        cuerpo = {"reportes": [{"id_cliente": r["id_cliente"], "pregunta": r["pregunta"],
+                                "respuesta": r["respuesta"]} for r in reportes]}
+        try:
+            r = api.post("/reportar-pregunta-lote", json=cuerpo)
+        except requests.RequestException as e:
+            return [], [], [(rep["id"], f"Sin conexión con el servidor: {e}") for rep in reportes]
+        if r.status_code >= 500 or r.status_code in ESTADOS_REINTENTABLES:
+            return [], [], [(rep["id"], f"HTTP {r.status_code}: {_detalle(r)}") for rep in reportes]
+        if r.status_code == 200:
+            por_cliente = {rep["id_cliente"]: rep["id"] for rep in reportes}
+            for fallido in r.json().get("fallidos", []):
+                reporte_id = por_cliente.pop(fallido.get("id_cliente"), None)
+                if reporte_id is not None:
+                    rechazados.append((reporte_id, fallido.get("detalle", "Rechazado")))
+            return list(por_cliente.values()), rechazados, reintentar
+        # Cualquier otra respuesta al lote: se decide reporte por reporte con el endpoint de siempre
+
+    for i, reporte in enumerate(reportes):
+        if worker is not None and worker.is_cancelled():
+            break
+        try:
+            r = api.post("/reportar-pregunta", json={
+                "pregunta": reporte["pregunta"], "respuesta": reporte["respuesta"],
+                "id_cliente": reporte["id_cliente"]})
+        except requests.RequestException as e:
+            # Sin conexión: los demás fallarían igual
+            error = f"Sin conexión con el servidor: {e}"
+            reintentar.extend((rep["id"], error) for rep in reportes[i:])
+            break
+        if r.status_code == 200:
+            enviados.append(reporte["id"])
+        elif r.status_code >= 500 or r.status_code in ESTADOS_REINTENTABLES:
+            reintentar.append((reporte["id"], f"HTTP {r.status_code}: {_detalle(r)}"))
+        else:
+            rechazados.append((reporte["id"], f"HTTP {r.status_code}: {_detalle(r)}"))
+    return enviados, rechazados, reintentar
+
+
+class ReportSender(QObject):
+    """Vacía la bandeja de salida de a un lote por vez, sin bloquear la ventana.
+
+    Emite cambio con la cantidad de reportes sin enviar, enviado con la
+    cantidad confirmada en cada lote y rechazado con el detalle de cada
+    reporte que el servidor no aceptó (y que se descarta).
+    """
+
+    cambio = pyqtSignal(int)
+    enviado = pyqtSignal(int)
+    rechazado = pyqtSignal(str)
+
+    def __init__(self, api, outbox=None, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self._outbox = outbox
+        self._worker = None
+        self._pendientes = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def outbox(self):
+        if self._outbox is None:
+            self._outbox = ReportOutbox()
+        return self._outbox
+
+    def pendientes(self):
+        if self._pendientes is None:
+            self._pendientes = self.outbox().count()
+        return self._pendientes
+
+    def agregar(self, pregunta, respuesta):
+        self.outbox().add(pregunta, respuesta)
+        self._actualizar_pendientes()
+        self.flush()
+
+    def server_reachable(self):
+        """El servidor respondió otra cosa: los reportes en espera no tienen por qué esperar más."""
+        if self.pendientes() and self._worker is None:
+            self.outbox().retry_now()
+            self.flush()
+
+    def flush(self):
+        if self._worker is not None:
+            return
+        reportes = self.outbox().listos(TAM_LOTE_REPORTES)
+        if not reportes:
+            self._programar()
+            return
+        self._timer.stop()
+        worker = Worker(enviar_reportes, self.api, reportes)
+        worker.signals.resultado.connect(lambda r: self._on_enviados(*r))
+        worker.signals.error.connect(
+            lambda e: self._on_enviados([], [], [(rep["id"], str(e)) for rep in reportes]))
+        self._worker = start(worker)
+
+    def stop(self):
+        self._timer.stop()
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def _on_enviados(self, enviados, rechazados, reintentar):
+        self._worker = None
+        outbox = self.outbox()
+        outbox.remove(enviados + [reporte_id for reporte_id, _ in rechazados])
+        outbox.postpone(reintentar)
+        self._actualizar_pendientes()
+        if enviados:
+            self.enviado.emit(len(enviados))
+        for _, detalle in rechazados:
+            self.rechazado.emit(detalle)
+        if enviados or rechazados:
+            # Si el lote pasó puede haber otro listo; si no, se espera al próximo reintento
+            self.flush()
+        else:
+            self._programar()
+
+    def _programar(self):
+        proximo = self.outbox().next_attempt()
+        if proximo is None:
+            self._timer.stop()
+            return
+        self._timer.start(max(0, int((proximo - time.time()) * 1000)))
+
+    def _actualizar_pendientes(self):
+        self._pendientes = self.outbox().count()
+        self.cambio.emit(self._pendientes)
@@ -0,0 +1,59 @@
+"""Pruebas contra el servidor simulado (Herramientas/mock_backend.py), sin pantalla.
+
+    python -m pytest -q tests
+
+Cada servidor se levanta en un puerto libre dentro del mismo proceso.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+for carpeta in ("Comun", "UsuarioGeneral", "UsuarioExperto", "Herramientas"):
+    sys.path.insert(0, os.path.join(RAIZ, carpeta))
+
+# Antes de importar los módulos de la aplicación: nada se escribe en ~/.boxia
+os.environ["BOXIA_DATA_DIR"] = tempfile.mkdtemp(prefix="boxia-pruebas-")
+os.environ["BOXIA_DIAGNOSTICO"] = "0"
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import mock_backend  # noqa: E402
+
+
+@pytest.fixture
+def servidor():
+    """Fábrica: servidor(**opciones) arranca un servidor simulado y devuelve (servidor, url)."""
+    servidores = []
+
+    def crear(**opciones):
+        srv = mock_backend.crear_servidor(0, **opciones)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servidores.append(srv)
+        return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+    yield crear
+    for srv in servidores:
+        srv.shutdown()
+        srv.server_close()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+def esperar(app, condicion, segundos=10):
+    """Procesa eventos de Qt hasta que se cumple la condición o pasa el tiempo."""
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        app.processEvents()
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return condicion()
@@ -0,0 +1,51 @@
+"""Carga por partes (streaming_upload.subir_por_partes) contra el servidor simulado."""
+import pytest
+import requests
+
+import streaming_upload
+from api_client import ApiClient
+
+
+def test_sube_en_partes_y_completa(servidor, tmp_path):
+    srv, url = servidor(retardo_carga=0)
+    pdf = tmp_path / "grande.pdf"
+    pdf.write_bytes(b"%PDF" + bytes(range(256)) * 400)
+    with open(pdf, "rb") as f:
+        r = streaming_upload.subir_por_partes(ApiClient(url), f, "grande.pdf", (5, 30), tam_parte=10_000)
+    assert r.status_code == 200
+    assert "102404 bytes" in r.json()["mensaje"]
+
+
+class Respuesta:
+    def __init__(self, status_code, datos):
+        self.status_code = status_code
+        self._datos = datos
+
+    def json(self):
+        return self._datos
+
+    def raise_for_status(self):
+        pass
+
+
+class ServidorTrabado:
+    """Responde 409 a cada parte con una posición que luego tampoco acepta."""
+
+    def __init__(self):
+        self.puts = 0
+
+    def post(self, ruta, **kwargs):
+        return Respuesta(200, {"id": "abc"})
+
+    def put(self, ruta, **kwargs):
+        self.puts += 1
+        return Respuesta(409, {"recibido": 0})
+
+
+def test_409_sin_fin_termina_con_error(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"x" * 1000)
+    api = ServidorTrabado()
+    with open(pdf, "rb") as f, pytest.raises(requests.HTTPError):
+        streaming_upload.subir_por_partes(api, f, "doc.pdf", (5, 30), tam_parte=100)
+    assert api.puts == streaming_upload.MAX_RESINCRONIZACIONES + 1
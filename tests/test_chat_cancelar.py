@@ -0,0 +1,80 @@
+"""Cancelar una pregunta en curso libera el hilo del pool en el acto."""
+import threading
+import time
+
+import pytest
+from PyQt6.QtCore import Qt
+
+import api_client
+from interfaz_chat import PreguntaWorker
+
+
+@pytest.fixture
+def cliente(servidor, monkeypatch):
+    def crear(**opciones):
+        _, url = servidor(**opciones)
+        monkeypatch.setattr(api_client, "_cliente", api_client.ApiClient(url))
+
+    return crear
+
+
+def correr(worker):
+    eventos = []
+    # Directas: el hilo de la prueba no procesa eventos de Qt
+    directa = Qt.ConnectionType.DirectConnection
+    worker.signals.token.connect(lambda _, texto: eventos.append(("token", texto)), directa)
+    worker.signals.resultado.connect(lambda *a: eventos.append(("resultado",)), directa)
+    worker.signals.error.connect(lambda *a: eventos.append(("error",)), directa)
+    hilo = threading.Thread(target=worker.run, daemon=True)
+    hilo.start()
+    return hilo, eventos
+
+
+def test_cancelar_mientras_el_servidor_piensa(qapp, cliente):
+    cliente(retardo_pregunta=10)
+    worker = PreguntaWorker(1, "hola")
+    hilo, eventos = correr(worker)
+    time.sleep(0.3)
+    inicio = time.monotonic()
+    worker.cancel()
+    hilo.join(2)
+    assert not hilo.is_alive()
+    assert time.monotonic() - inicio < 1
+    assert eventos == []
+
+
+def test_cancelar_a_mitad_de_la_respuesta(qapp, cliente):
+    cliente(retardo_token=0.5)
+    worker = PreguntaWorker(1, "hola")
+    hilo, eventos = correr(worker)
+    limite = time.monotonic() + 5
+    while not eventos and time.monotonic() < limite:
+        time.sleep(0.01)
+    worker.cancel()
+    hilo.join(1)
+    assert not hilo.is_alive()
+    assert ("resultado",) not in eventos and ("error",) not in eventos
+
+
+def test_cancelar_antes_de_enviar(qapp, cliente):
+    cliente(retardo_pregunta=10)
+    worker = PreguntaWorker(1, "hola")
+    worker.cancel()
+    hilo, eventos = correr(worker)
+    hilo.join(2)
+    assert not hilo.is_alive()
+    assert eventos == []
+
+
+def test_la_conexion_sigue_sirviendo_despues_de_cancelar(qapp, cliente):
+    cliente(retardo_token=0.3)
+    worker = PreguntaWorker(1, "hola")
+    hilo, eventos = correr(worker)
+    time.sleep(0.2)
+    worker.cancel()
+    hilo.join(2)
+    siguiente = PreguntaWorker(2, "otra")
+    siguiente.streaming = False
+    hilo, eventos = correr(siguiente)
+    hilo.join(10)
+    assert ("resultado",) in eventos
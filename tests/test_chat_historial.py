@@ -0,0 +1,47 @@
+"""Ventana de mensajes del chat (chat_view.ChatModel) sobre el historial guardado."""
+from chat_history import ChatHistory
+from chat_view import ChatModel, MARGEN_VENTANA
+
+VENTANA = 100
+PAGINA = 50
+
+
+def historial(cantidad):
+    history = ChatHistory(":memory:")
+    for i in range(cantidad):
+        history.add("user" if i % 2 == 0 else "respuesta", f"mensaje {i}")
+    return history
+
+
+def ids(model):
+    return [model.mensaje(fila)["id"] for fila in range(model.rowCount())]
+
+
+def test_subir_y_bajar_mantiene_la_ventana(qapp):
+    history = historial(2000)
+    model = ChatModel(ventana=VENTANA)
+    model.set_mensajes(*history.recientes(PAGINA))
+
+    while model.hay_anteriores:
+        model.prepend(*history.anteriores(model.primer_id(), PAGINA))
+        assert model.rowCount() < VENTANA + MARGEN_VENTANA + PAGINA
+    assert ids(model)[0] == 1
+    assert model.hay_posteriores
+
+    while model.hay_posteriores:
+        model.append_historial(*history.posteriores(model.ultimo_id(), PAGINA))
+        assert model.rowCount() < VENTANA + MARGEN_VENTANA + PAGINA
+        assert ids(model) == list(range(ids(model)[0], ids(model)[0] + model.rowCount()))
+    assert ids(model)[-1] == 2000
+    assert model.hay_anteriores
+
+
+def test_no_descarta_la_respuesta_en_curso(qapp):
+    history = historial(500)
+    model = ChatModel(ventana=VENTANA)
+    model.set_mensajes(*history.recientes(PAGINA))
+    model.append("bot", "⏳ Pensando...")
+    for _ in range(5):
+        model.prepend(*history.anteriores(model.primer_id(), PAGINA))
+    assert model.mensaje(model.rowCount() - 1)["texto"] == "⏳ Pensando..."
+    assert not model.hay_posteriores
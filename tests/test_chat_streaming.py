@@ -0,0 +1,48 @@
+"""Respuestas del chat por partes (SSE) o en JSON, y conexiones del cliente compartido."""
+import mock_backend
+from api_client import ApiClient
+from interfaz_chat import enviar_pregunta
+
+
+def test_streaming_entrega_cada_token(servidor):
+    _, url = servidor(retardo_token=0.001)
+    tokens = []
+    respuesta = enviar_pregunta("hola", tokens.append, lambda: False, streaming=True, api=ApiClient(url))
+    assert tokens == mock_backend.TOKENS
+    assert respuesta == "".join(mock_backend.TOKENS)
+
+
+def test_servidor_sin_streaming_responde_json(servidor):
+    _, url = servidor(retardo_token=0.001, streaming=False)
+    tokens = []
+    respuesta = enviar_pregunta("hola", tokens.append, lambda: False, streaming=True, api=ApiClient(url))
+    assert tokens == []
+    assert respuesta == "".join(mock_backend.TOKENS)
+
+
+def test_cancelar_corta_la_lectura(servidor):
+    _, url = servidor(retardo_token=0.001)
+    tokens = []
+    respuesta = enviar_pregunta("hola", tokens.append, lambda: len(tokens) >= 3, streaming=True,
+                                api=ApiClient(url))
+    assert tokens == mock_backend.TOKENS[:3]
+    assert respuesta == "".join(mock_backend.TOKENS[:3])
+
+
+def test_reutiliza_la_conexion(servidor):
+    srv, url = servidor(retardo_token=0)
+    conexiones = []
+    procesar = srv.process_request
+    srv.process_request = lambda pedido, direccion: (conexiones.append(direccion), procesar(pedido, direccion))
+    api = ApiClient(url)
+    for _ in range(5):
+        api.get("/capacidades").close()
+        enviar_pregunta("hola", lambda _: None, lambda: False, api=api)
+    assert len(conexiones) == 1
+
+
+def test_reintenta_los_503_de_las_consultas(servidor):
+    srv, url = servidor(fallos_503=2)
+    r = ApiClient(url).get("/capacidades")
+    assert r.status_code == 200
+    assert srv.fallos_503 == 0
@@ -0,0 +1,64 @@
+"""Cola de carga de PDFs (upload_queue) contra el servidor simulado."""
+import pytest
+
+import streaming_upload
+from api_client import ApiClient
+from conftest import esperar
+from upload_manifest import UploadManifest
+from upload_queue import UploadQueue, UploadQueueModel, ErrorCarga, subir_pdf, CARGADO, SUBIENDO
+
+
+def test_detener_con_el_cuerpo_enviado_espera_la_respuesta(servidor, qapp, tmp_path):
+    srv, url = servidor(retardo_carga=1.0)
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF" + b"x" * 5000)
+    model = UploadQueueModel()
+    manifest = UploadManifest(url, str(tmp_path / "manifest.sqlite3"))
+    queue = UploadQueue(ApiClient(url), model, manifest, concurrencia=1)
+    queue.agregar([str(pdf)])
+    assert esperar(qapp, lambda: model.archivo(0)["sha256"] is not None)
+    sha = model.archivo(0)["sha256"]
+    assert queue.iniciar()
+    # El servidor tarda en responder después de recibir el archivo completo
+    assert esperar(qapp, lambda: model.archivo(0)["enviados"] == model.archivo(0)["tamano"])
+
+    queue.detener()
+    # Sigue activa hasta que el servidor responde: volver a iniciar no la sube otra vez
+    assert model.archivo(0)["estado"] == SUBIENDO
+    queue.iniciar()
+    assert len(queue._activos) == 1
+
+    assert esperar(qapp, lambda: model.archivo(0)["estado"] == CARGADO)
+    assert not queue._activos
+    assert manifest.get(sha) is not None
+    assert list(srv.documentos) == [sha]
+
+
+class Senal:
+    def __init__(self, al_emitir):
+        self.emit = al_emitir
+
+
+class WorkerFalso:
+    def __init__(self, al_progreso):
+        self.signals = type("Senales", (), {"progreso": Senal(al_progreso)})()
+
+    def is_cancelled(self):
+        return False
+
+
+def test_archivo_que_se_achica_no_se_reintenta(servidor, tmp_path):
+    srv, url = servidor(retardo_carga=0)
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF" + b"x" * (3 * streaming_upload.TAM_BLOQUE))
+
+    def achicar(progreso):
+        if progreso[0] == "enviados":
+            with open(pdf, "r+b") as f:
+                f.truncate(streaming_upload.TAM_BLOQUE)
+
+    with pytest.raises(ErrorCarga) as error:
+        subir_pdf(WorkerFalso(achicar), ApiClient(url), str(pdf))
+    assert str(error.value).startswith("No se pudo leer el archivo")
+    assert not error.value.reintentable
+    assert not srv.documentos
@@ -0,0 +1,57 @@
+"""Varias réplicas en ApiClient: reparto de /preguntar, réplica fija y paso a otra réplica."""
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+from api_client import ApiClient
+
+
+def url_sin_servidor():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def preguntar(api):
+    r = api.post("/preguntar", json={"pregunta": "hola"})
+    r.raise_for_status()
+    return r.json()["respuesta"]
+
+
+def test_pasa_a_la_segunda_replica_si_la_primera_rechaza_conexiones(servidor):
+    srv, url = servidor(retardo_token=0)
+    api = ApiClient(f"{url_sin_servidor()},{url}")
+
+    assert api.get("/preguntas-reportadas", params={"estado": "reportada"}).status_code == 200
+    assert preguntar(api)
+    caida, viva = api.backends_status()
+    assert not caida["disponible"] and not caida["fija"]
+    assert viva["disponible"] and viva["fija"]
+    assert srv.preguntas_atendidas == 1
+
+
+def test_preguntar_ocupada_503_pasa_a_otra_replica(servidor):
+    ocupada, url_ocupada = servidor(retardo_token=0, capacidad=1)
+    libre, url_libre = servidor(retardo_token=0)
+    # Su única plaza queda tomada: cada /preguntar recibe 503
+    ocupada.preguntas_en_curso = 1
+    api = ApiClient(f"{url_ocupada},{url_libre}")
+
+    assert all(preguntar(api) for _ in range(5))
+    assert libre.preguntas_atendidas == 5
+    assert ocupada.preguntas_atendidas == 0
+    # La que respondió 503 queda fuera un tiempo en vez de recibir cada pregunta primero
+    assert not api.backends_status()[0]["disponible"]
+
+
+def test_preguntar_prefiere_la_replica_rapida_y_lo_demas_queda_fijo(servidor):
+    rapida, url_rapida = servidor(retardo_token=0, retardo_pregunta=0.02)
+    lenta, url_lenta = servidor(retardo_token=0, retardo_pregunta=0.3)
+    api = ApiClient(f"{url_lenta},{url_rapida}")
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: preguntar(api), range(40)))
+    assert rapida.preguntas_atendidas > 3 * lenta.preguntas_atendidas
+    assert all(b["en_curso"] == 0 for b in api.backends_status())
+    # Los endpoints de administración siguen en la primera réplica
+    assert api.backends_status()[0]["fija"]
+    assert api.url("/capacidades").startswith(url_lenta)
@@ -0,0 +1,130 @@
+"""Actualización en vivo de la tabla de reportes (reports_live + ReportsModel.merge_changes/merge_first_page)."""
+from datetime import datetime
+
+import pytest
+
+import mock_backend
+import reports_live
+from api_client import ApiClient
+from conftest import esperar
+from manage_reports import fetch_reports_page
+from reports_model import ReportsModel
+
+
+def agregar_reporte(srv, pregunta):
+    with srv.lock:
+        srv.ultimo_id += 1
+        srv.reportes.append({"id": srv.ultimo_id, "pregunta": pregunta, "respuesta": "r",
+                             "fecha": datetime.now().isoformat(timespec="seconds"),
+                             "estado": "reportada", "respuesta_experto": ""})
+        mock_backend.registrar_cambio(srv, srv.ultimo_id, "reportada")
+        return srv.ultimo_id
+
+
+def cambiar_estado(srv, reporte_id, nuevo):
+    with srv.lock:
+        reporte = next(r for r in srv.reportes if r["id"] == reporte_id)
+        mock_backend.registrar_cambio(srv, reporte_id, reporte["estado"], nuevo)
+        reporte["estado"] = nuevo
+
+
+@pytest.fixture
+def tabla(qapp, servidor, monkeypatch):
+    """Devuelve arrancar(**opciones del servidor) -> (srv, model, live) con la página 0 cargada."""
+    monkeypatch.setattr(reports_live, "INTERVALO_RESPALDO", 0.1)
+    vivos = []
+
+    def arrancar(**opciones):
+        srv, url = servidor(reportes=30, **opciones)
+        api = ApiClient(url)
+        model = ReportsModel()
+        filas, hay_mas, total, _ = fetch_reports_page(None, api, "reportada", 0, 200)
+        model.set_reports("reportada", filas, hay_mas, total)
+        live = reports_live.LiveUpdates(
+            api, lambda: model.estado,
+            lambda estado, etag: fetch_reports_page(None, api, estado, 0, 200, etag))
+        live.cambios.connect(model.merge_changes)
+        live.pagina.connect(model.merge_first_page)
+        vivos.append(live)
+        return srv, model, live
+
+    yield arrancar
+    for live in vivos:
+        live.set_enabled(False)
+
+
+def test_items_sin_estado_no_quitan_filas(qapp):
+    model = ReportsModel()
+    filas = [{"id": i, "pregunta": f"p{i}", "respuesta": "r", "fecha": f"2024-01-0{i}", "respuesta_experto": ""}
+             for i in range(1, 6)]
+    model.set_reports("reportada", [dict(f, estado="reportada") for f in filas])
+    assert model.merge_changes(filas) == 0
+    assert model.rowCount() == 5
+
+
+def test_primera_pagina_quita_solo_en_sus_fechas(qapp):
+    model = ReportsModel()
+    filas = [{"id": i, "pregunta": f"p{i}", "respuesta": "r", "fecha": f"2024-01-{30 - i:02d}", "respuesta_experto": ""}
+             for i in range(1, 11)]
+    model.set_reports("reportada", [dict(f) for f in filas], hay_mas=True)
+    # Página de 4 filas: la 2 desapareció, la 6 pasó a la página siguiente
+    pagina = [filas[0], filas[2], filas[3], filas[4]]
+    assert model.merge_first_page("reportada", pagina, True) == 1
+    assert [model.report(i)["id"] for i in range(model.rowCount())] == [1, 3, 4, 5, 6, 7, 8, 9, 10]
+    # Otro estado (el experto cambió de vista mientras se consultaba) no toca la tabla
+    assert model.merge_first_page("revisada", [], False) == 0
+    # La última página: todo lo que no está se quitó
+    assert model.merge_first_page("reportada", [filas[0], filas[8]], False) == 7
+    assert [model.report(i)["id"] for i in range(model.rowCount())] == [1, 9]
+
+
+def test_respaldo_con_etag_conserva_filas_y_agrega_nuevas(qapp, tabla):
+    srv, model, live = tabla(cambios=False)
+    cargadas = model.rowCount()
+    consultas = []
+    live.consultado.connect(consultas.append)
+    live.set_enabled(True)
+    # La primera revisión no es condicional: trae las mismas filas, sin "estado"
+    assert esperar(qapp, lambda: len(consultas) >= 3)
+    assert model.rowCount() == cargadas
+
+    nuevo = agregar_reporte(srv, "¿Pregunta nueva?")
+    assert esperar(qapp, lambda: model.report(0)["id"] == nuevo)
+    assert model.rowCount() == cargadas + 1
+
+
+def test_respaldo_sin_etag_conserva_filas(qapp, tabla):
+    srv, model, live = tabla(cambios=False, etag=False)
+    cargadas = model.rowCount()
+    consultas = []
+    live.consultado.connect(consultas.append)
+    live.set_enabled(True)
+    assert esperar(qapp, lambda: len(consultas) >= 3)
+    assert model.rowCount() == cargadas
+
+
+def test_consulta_larga_agrega_y_quita(qapp, tabla):
+    srv, model, live = tabla()
+    cargadas = model.rowCount()
+    live.set_enabled(True)
+    assert esperar(qapp, lambda: live._cursor is not None)
+
+    nuevo = agregar_reporte(srv, "¿Pregunta en vivo?")
+    assert esperar(qapp, lambda: model.row_of(nuevo) == 0)
+    assert model.rowCount() == cargadas + 1
+
+    revisado = model.report(3)["id"]
+    cambiar_estado(srv, revisado, "revisada")
+    assert esperar(qapp, lambda: model.row_of(revisado) == -1)
+    assert model.rowCount() == cargadas
+
+
+@pytest.mark.parametrize("etag", [True, False])
+def test_respaldo_quita_las_revisadas_por_otro(qapp, tabla, etag):
+    srv, model, live = tabla(cambios=False, etag=etag)
+    cargadas = model.rowCount()
+    live.set_enabled(True)
+    revisado = model.report(3)["id"]
+    cambiar_estado(srv, revisado, "revisada")
+    assert esperar(qapp, lambda: model.row_of(revisado) == -1)
+    assert model.rowCount() == cargadas - 1
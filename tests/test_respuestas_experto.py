@@ -0,0 +1,78 @@
+"""Lectura y comparación de la planilla de respuestas del experto (expert_answers)."""
+import pytest
+
+import expert_answers
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def planilla(tmp_path, filas, titulos=("ID", "Pregunta", "Respuesta experto")):
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.append(list(titulos))
+    for fila in filas:
+        hoja.append(list(fila))
+    path = tmp_path / "respuestas.xlsx"
+    libro.save(path)
+    return str(path)
+
+
+def test_compara_con_las_respuestas_cargadas(tmp_path):
+    path = planilla(tmp_path, [
+        (1, "¿a?", "nueva"),
+        (2, "¿b?", "  igual  "),
+        (3, "¿c?", None),
+        (4, "¿d?", "   "),
+        (99, "¿x?", "de otra lista"),
+        (None, None, None),
+    ])
+    resumen = expert_answers.comparar_respuestas(path, {1: "vieja", 2: "igual", 3: "algo", 4: None})
+    assert resumen["cambios"] == [(1, "nueva")]
+    assert resumen["sin_cambios"] == 1
+    assert resumen["vacias"] == 2
+    assert resumen["desconocidos"] == [99]
+    assert resumen["invalidas"] == [] and resumen["duplicados"] == []
+
+
+def test_ids_de_distintos_tipos(tmp_path):
+    path = planilla(tmp_path, [
+        (1.0, "", "float entero"),
+        (" 2 ", "", "texto con espacios"),
+        (3.5, "", "float con decimales"),
+        (True, "", "booleano"),
+        ("abc", "", "texto"),
+        (None, "", "sin id"),
+    ])
+    resumen = expert_answers.comparar_respuestas(path, {1: "", 2: ""})
+    assert resumen["cambios"] == [(1, "float entero"), (2, "texto con espacios")]
+    assert resumen["invalidas"] == [(4, 3.5), (5, True), (6, "abc"), (7, None)]
+
+
+def test_id_repetido_usa_la_ultima_fila(tmp_path):
+    path = planilla(tmp_path, [(5, "", "primera"), (6, "", "otra"), ("5", "", "última")])
+    resumen = expert_answers.comparar_respuestas(path, {5: "", 6: "otra"})
+    assert resumen["cambios"] == [(5, "última")]
+    assert resumen["duplicados"] == [5]
+    assert resumen["sin_cambios"] == 1
+
+
+@pytest.mark.parametrize("titulos, falta", [
+    (("Pregunta", "respuesta_experto"), "id"),
+    (("id", "Pregunta", "Respuesta"), "respuesta_experto"),
+])
+def test_faltan_columnas(tmp_path, titulos, falta):
+    path = planilla(tmp_path, [(1, "¿a?", "x")], titulos)
+    with pytest.raises(expert_answers.ErrorExcel, match=falta):
+        expert_answers.comparar_respuestas(path, {1: ""})
+
+
+def test_titulos_sin_mayusculas_ni_guiones(tmp_path):
+    path = planilla(tmp_path, [("x", 7, "respuesta")], ("Pregunta", " Id ", "RESPUESTA-DEL-EXPERTO"))
+    assert expert_answers.comparar_respuestas(path, {7: ""})["cambios"] == [(7, "respuesta")]
+
+
+def test_archivo_que_no_es_excel(tmp_path):
+    path = tmp_path / "respuestas.xlsx"
+    path.write_text("no es un excel")
+    with pytest.raises(expert_answers.ErrorExcel, match="No se pudo leer"):
+        expert_answers.comparar_respuestas(str(path), {})